@@ -1,7 +1,24 @@
-import pyodbc
 import datetime
+import time
 
-from .db import get_connection
+from . import audit_log, perf, slow_query_log
+from .db import get_connection, get_storage
+
+LOGICAL_PK_FIELDS = ["EA_Code_15", "Building_No", "Household_No", "Population_No"]
+
+# ฟิลด์ที่แสดงได้แต่ห้ามแก้ไข (ชื่อ-นามสกุล)
+NON_EDITABLE_FIELDS = ["FirstName", "LastName"]
+
+# คอลัมน์ที่ทุกการบันทึกประทับผู้แก้ไข/เวลา
+EDIT_STAMP_FIELDS = ["fullname", "time_edit"]
+
+# ลายนิ้วมือของแถวตอนค้นหา (storage.row_version_sql) ใช้ตรวจว่ามีคนอื่นแก้แถวไปก่อนบันทึกหรือไม่
+ROW_VERSION_FIELD = "row_version"
+
+# จำนวนแถวต่อคำสั่ง SELECT ตอนดึงค่าปัจจุบันของแถวที่ขัดแย้ง
+CONFLICT_FETCH_BATCH_SIZE = 100
+
+_r_alldata_fields_cache = []
 
 
 def fetch_all_r_alldata_fields():
@@ -13,9 +30,9 @@ def fetch_all_r_alldata_fields():
             # print("Database Error: Cannot get r_alldata fields: No connection.")
             return []
         with conn.cursor() as cursor:
-            cursor.execute("SELECT TOP 0 * FROM r_alldata")
+            cursor.execute(get_storage().empty_select_sql("r_alldata"))
             return [col[0] for col in cursor.description]
-    except pyodbc.Error as e:
+    except get_storage().Error as e:
         # print(f"Database Error: Error fetching r_alldata schema: {e}")
         return []
     finally:
@@ -23,9 +40,39 @@ def fetch_all_r_alldata_fields():
             conn.close()
 
 
-def search_r_alldata(codes, all_db_fields_r_alldata, logical_pk_fields):
+def get_r_alldata_fields(fetch_if_missing=True):
     """
-    Searches data from r_alldata_edit table only based on provided codes.
+    Returns the r_alldata column names, fetching them at most once per process.
+    An empty result (e.g. no connection) is not cached so a later call retries.
+    """
+    global _r_alldata_fields_cache
+    if _r_alldata_fields_cache:
+        perf.count("r_alldata_fields.hit")
+    elif fetch_if_missing:
+        perf.count("r_alldata_fields.miss")
+        _r_alldata_fields_cache = fetch_all_r_alldata_fields()
+    return list(_r_alldata_fields_cache)
+
+
+def row_version_fields(all_db_fields_r_alldata):
+    """Columns the row fingerprint covers: every field the search returns."""
+    return list(all_db_fields_r_alldata) + EDIT_STAMP_FIELDS
+
+
+def row_version_sql(all_db_fields_r_alldata, alias=None, as_text=False):
+    """
+    SQL expression of the row fingerprint over every field the search returns.
+    as_text gives it as a hex string (for staging tables with text columns).
+    """
+    return get_storage().row_version_sql(
+        row_version_fields(all_db_fields_r_alldata), alias, as_text
+    )
+
+
+def area_conditions(codes, alias="rae"):
+    """
+    WHERE conditions (list) and params for the area codes of a search, on the
+    table aliased as alias. Codes that are None are not filtered on.
     """
     sql_conditions = []
     params = []
@@ -33,26 +80,37 @@ def search_r_alldata(codes, all_db_fields_r_alldata, logical_pk_fields):
     if codes.get("RegCode") is not None:
         if codes["RegCode"] == 0:
             sql_conditions.append(
-                "(rae.RegCode = ? AND rae.RegCode IS NOT NULL AND rae.RegCode <> '')"
+                f"({alias}.RegCode = ? AND {alias}.RegCode IS NOT NULL"
+                f" AND {alias}.RegCode <> '')"
             )
         else:
-            sql_conditions.append("rae.RegCode = ?")
+            sql_conditions.append(f"{alias}.RegCode = ?")
         params.append(codes["RegCode"])
 
-    if codes["ProvCode"] is not None:
-        sql_conditions.append("rae.ProvCode = ?")
-        params.append(codes["ProvCode"])
+    for code_field in ("ProvCode", "DistCode", "SubDistCode"):
+        if codes[code_field] is not None:
+            sql_conditions.append(f"{alias}.{code_field} = ?")
+            params.append(codes[code_field])
 
-    if codes["DistCode"] is not None:
-        sql_conditions.append("rae.DistCode = ?")
-        params.append(codes["DistCode"])
+    return sql_conditions, params
 
-    if codes["SubDistCode"] is not None:
-        sql_conditions.append("rae.SubDistCode = ?")
-        params.append(codes["SubDistCode"])
 
+def build_search_query(
+    codes, all_db_fields_r_alldata, with_row_version=False, edited_since=None
+):
+    """
+    Builds the r_alldata_edit search SQL for the given area codes.
+    Returns (query, params); query is None when no code is given.
+    with_row_version adds the ROW_VERSION_FIELD column used by the save conflict check.
+    edited_since keeps only rows whose time_edit is later (the change feed).
+    """
+    sql_conditions, params = area_conditions(codes)
     if not sql_conditions:
-        return [], [], "No search criteria provided."
+        return None, []
+
+    if edited_since is not None:
+        sql_conditions.append("rae.time_edit > ?")
+        params.append(edited_since)
 
     # เปลี่ยนให้ดึงจาก r_alldata_edit เท่านั้น
     select_clauses = []
@@ -63,6 +121,10 @@ def search_r_alldata(codes, all_db_fields_r_alldata, logical_pk_fields):
     # เพิ่ม fullname และ time_edit
     select_clauses.append("rae.fullname")
     select_clauses.append("rae.time_edit")
+    if with_row_version:
+        select_clauses.append(
+            f"{row_version_sql(all_db_fields_r_alldata, 'rae')} AS {ROW_VERSION_FIELD}"
+        )
 
     select_sql_part = ", ".join(select_clauses)
 
@@ -74,78 +136,330 @@ def search_r_alldata(codes, all_db_fields_r_alldata, logical_pk_fields):
     if sql_conditions:
         query += " WHERE " + " AND ".join(sql_conditions)
     query += " ORDER BY rae.RegName, rae.ProvName, rae.DistName, rae.SubDistName"
+    return query, params
+
+
+def search_r_alldata(codes, all_db_fields_r_alldata, logical_pk_fields):
+    """
+    Searches data from r_alldata_edit table only based on provided codes.
+    Each row also carries ROW_VERSION_FIELD for save_edited_r_alldata_rows.
+    """
+    query, params = build_search_query(
+        codes, all_db_fields_r_alldata, with_row_version=True
+    )
+    if query is None:
+        return [], [], "No search criteria provided."
 
     conn = None
+    perf.count("search.requests")
+    search_span = perf.span("search", filters=len(params), rows=0)
     try:
-        conn = get_connection()
-        if not conn:
-            return [], [], "Cannot connect to the database."
+        with search_span:
+            conn = get_connection()
+            if not conn:
+                return [], [], "Cannot connect to the database."
 
-        with conn.cursor() as cursor:
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            db_column_names = [col[0] for col in cursor.description]
+            with conn.cursor() as cursor:
+                t0 = time.perf_counter()
+                with perf.span("search.execute"):
+                    cursor.execute(query, params)
+                execute_ms = (time.perf_counter() - t0) * 1000
+                with perf.span("search.fetch") as fetch_span:
+                    results = cursor.fetchall()
+                    fetch_span.set(rows=len(results))
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+                perf.count("search.rows", len(results))
+                db_column_names = [col[0] for col in cursor.description]
+                search_span.set(rows=len(results))
+
+            if slow_query_log.is_slow(elapsed_ms):
+                slow_query_log.record_slow_query(
+                    "search",
+                    query,
+                    params,
+                    len(results),
+                    elapsed_ms,
+                    connection=conn,
+                    execute_ms=round(execute_ms, 3),
+                )
             return results, db_column_names, None
 
-    except pyodbc.Error as e:
+    except get_storage().Error as e:
         return [], [], f"Error during search: {e}"
     finally:
         if conn:
             conn.close()
 
 
-def save_edited_r_alldata_rows(list_of_data_to_save_dicts, all_db_fields_r_alldata):
+def fetch_changed_r_alldata(codes, all_db_fields_r_alldata, edited_since):
     """
-    Updates multiple edited rows in the r_alldata_edit table.
-    Each dictionary in list_of_data_to_save_dicts should be a complete record
-    for one row to be updated, including 'fullname' and 'time_edit'.
+    Rows of the area saved after edited_since (time_edit > edited_since), in the
+    same shape as search_r_alldata, so the cost follows the number of edits
+    rather than the size of the area. Returns (results, db_column_names, error).
     """
+    query, params = build_search_query(
+        codes, all_db_fields_r_alldata, with_row_version=True, edited_since=edited_since
+    )
+    if query is None:
+        return [], [], "No search criteria provided."
+
     conn = None
-    updated_rows_count = 0
+    try:
+        with perf.span("change_feed", rows=0) as feed_span:
+            conn = get_connection()
+            if not conn:
+                return [], [], "Cannot connect to the database."
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                results = cursor.fetchall()
+                db_column_names = [col[0] for col in cursor.description]
+            feed_span.set(rows=len(results))
+            perf.count("change_feed.rows", len(results))
+            return results, db_column_names, None
+    except get_storage().Error as e:
+        return [], [], f"Error during change feed query: {e}"
+    finally:
+        if conn:
+            conn.close()
 
-    LOGICAL_PK_FIELDS = ["EA_Code_15", "Building_No", "Household_No", "Population_No"]
 
-    if not list_of_data_to_save_dicts:
-        return 0, "No data provided to save."
+def stream_search_r_alldata(codes, all_db_fields_r_alldata, batch_size=5000):
+    """
+    Same query as search_r_alldata, but yields (db_column_names, rows) batches
+    from cursor.fetchmany so the full result is never held in memory.
+    Raises ValueError/RuntimeError or the storage Error instead of returning a message.
+    """
+    query, params = build_search_query(codes, all_db_fields_r_alldata)
+    if query is None:
+        raise ValueError("No search criteria provided.")
 
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Cannot connect to the database.")
+    perf.count("search.requests")
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            db_column_names = [col[0] for col in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                perf.count("search.rows", len(rows))
+                yield db_column_names, rows
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+
+def build_update_sql(all_db_fields_r_alldata, check_row_version=False):
+    """
+    Builds the per-row UPDATE for r_alldata_edit, matched on LOGICAL_PK_FIELDS.
+    Returns (sql, update_fields); parameters are update_fields then the PK values.
+    check_row_version also matches the row fingerprint taken at search time
+    (one more parameter after the PK values), so a row changed by someone else
+    is left alone and the statement reports rowcount 0.
+    """
     # เตรียม field สำหรับ UPDATE (ไม่รวม PK)
     update_fields = [
         col for col in all_db_fields_r_alldata if col not in LOGICAL_PK_FIELDS
     ]
-    update_fields += ["fullname", "time_edit"]
+    update_fields += EDIT_STAMP_FIELDS
 
     set_clause = ", ".join([f"[{field}] = ?" for field in update_fields])
     where_clause = " AND ".join([f"[{pk}] = ?" for pk in LOGICAL_PK_FIELDS])
+    if check_row_version:
+        where_clause += f" AND {row_version_sql(all_db_fields_r_alldata)} = ?"
 
     sql_update = f"UPDATE r_alldata_edit SET {set_clause} WHERE {where_clause}"
+    return sql_update, update_fields
+
+
+def fetch_rows_by_pk(cursor, all_db_fields_r_alldata, pk_tuples):
+    """
+    Current values (fields, stamps and ROW_VERSION_FIELD) of the given rows,
+    CONFLICT_FETCH_BATCH_SIZE rows per SELECT. Returns dict: PK tuple -> row dict.
+    """
+    select_sql = ", ".join(
+        [f"[{field}]" for field in all_db_fields_r_alldata]
+        + [f"[{field}]" for field in EDIT_STAMP_FIELDS]
+        + [f"{row_version_sql(all_db_fields_r_alldata)} AS {ROW_VERSION_FIELD}"]
+    )
+    row_condition = "(" + " AND ".join(f"[{pk}] = ?" for pk in LOGICAL_PK_FIELDS) + ")"
+    pk_tuples = list(pk_tuples)
+    current = {}
+    for start in range(0, len(pk_tuples), CONFLICT_FETCH_BATCH_SIZE):
+        batch = pk_tuples[start : start + CONFLICT_FETCH_BATCH_SIZE]
+        cursor.execute(
+            f"SELECT {select_sql} FROM r_alldata_edit"
+            f" WHERE {' OR '.join([row_condition] * len(batch))}",
+            [value for pk in batch for value in pk],
+        )
+        db_column_names = [col[0] for col in cursor.description]
+        for row in cursor.fetchall():
+            row_dict = dict(zip(db_column_names, row))
+            current[tuple(row_dict[pk] for pk in LOGICAL_PK_FIELDS)] = row_dict
+    return current
+
+
+def save_edited_r_alldata_rows(
+    list_of_data_to_save_dicts, all_db_fields_r_alldata, original_rows=None
+):
+    """
+    Updates multiple edited rows in the r_alldata_edit table.
+    Each dictionary in list_of_data_to_save_dicts should be a complete record
+    for one row to be updated, including 'fullname' and 'time_edit'.
+
+    A record that carries ROW_VERSION_FIELD (as returned by search_r_alldata) is
+    only written if the row still has that fingerprint; the check is part of the
+    same UPDATE, so it costs no extra round trip. Rows that fail it are not
+    written and come back as conflicts: dicts with "pk", "record" (the record
+    that was not saved) and "current" (the row as it is now, None if deleted).
+
+    Every changed field of a saved row is written to the audit table in the same
+    transaction (one executemany per call). original_rows, parallel to the
+    records, holds the values the editor started from (the search result); when
+    it is not given, the previous values are read in the transaction first.
+    Returns (updated_count, conflicts, error_message).
+    """
+    conn = None
+    updated_rows_count = 0
+    conflicts = []
+
+    if not list_of_data_to_save_dicts:
+        return 0, [], "No data provided to save."
 
+    sql_update, update_fields = build_update_sql(all_db_fields_r_alldata)
+    sql_checked_update, _ = build_update_sql(
+        all_db_fields_r_alldata, check_row_version=True
+    )
+
+    audited_fields = [
+        field for field in update_fields if field not in EDIT_STAMP_FIELDS
+    ]
+    audit_rows = []
+
+    save_span = perf.span("save", rows=len(list_of_data_to_save_dicts))
     try:
-        conn = get_connection()
-        if not conn:
-            return 0, "Database connection failed for updating."
+        with save_span:
+            audit_log.ensure_audit_table()
+            conn = get_connection()
+            if not conn:
+                return 0, [], "Database connection failed for updating."
 
-        with conn.cursor() as cursor:
-            for data_to_save in list_of_data_to_save_dicts:
-                update_values = [data_to_save.get(field) for field in update_fields]
-                pk_values = [data_to_save.get(pk) for pk in LOGICAL_PK_FIELDS]
-                all_values = update_values + pk_values
-                cursor.execute(sql_update, all_values)
-                updated_rows_count += cursor.rowcount
-
-        if updated_rows_count > 0:
-            conn.commit()
-            return updated_rows_count, None
-        else:
-            return 0, "No rows were actually updated."
+            # เวลาของคำสั่งที่ช้าที่สุดในรอบ (สำหรับ slow query log)
+            slowest_ms = -1.0
+            slowest_sql = sql_update
+            slowest_values = None
+            t0 = time.perf_counter()
+            with perf.span("save.execute") as execute_span:
+                # cursor ธรรมดา (ไม่ใช้ with ซึ่ง commit ตอนออก) ให้ commit จริงเกิดใน save.commit
+                cursor = conn.cursor()
+                try:
+                    if original_rows is None:
+                        previous = fetch_rows_by_pk(
+                            cursor,
+                            all_db_fields_r_alldata,
+                            [
+                                tuple(record.get(pk) for pk in LOGICAL_PK_FIELDS)
+                                for record in list_of_data_to_save_dicts
+                            ],
+                        )
+                        original_rows = [
+                            previous.get(
+                                tuple(record.get(pk) for pk in LOGICAL_PK_FIELDS), {}
+                            )
+                            for record in list_of_data_to_save_dicts
+                        ]
+                    for data_to_save, original_row in zip(
+                        list_of_data_to_save_dicts, original_rows
+                    ):
+                        update_values = [
+                            data_to_save.get(field) for field in update_fields
+                        ]
+                        pk_values = [data_to_save.get(pk) for pk in LOGICAL_PK_FIELDS]
+                        all_values = update_values + pk_values
+                        row_version = data_to_save.get(ROW_VERSION_FIELD)
+                        statement_sql = sql_update
+                        if row_version is not None:
+                            statement_sql = sql_checked_update
+                            all_values.append(row_version)
+                        statement_t0 = time.perf_counter()
+                        cursor.execute(statement_sql, all_values)
+                        statement_ms = (time.perf_counter() - statement_t0) * 1000
+                        if statement_ms > slowest_ms:
+                            slowest_ms = statement_ms
+                            slowest_sql = statement_sql
+                            slowest_values = all_values
+                        if cursor.rowcount > 0:
+                            updated_rows_count += cursor.rowcount
+                            audit_rows += audit_log.audit_rows(
+                                pk_values,
+                                audit_log.changed_fields(
+                                    original_row, data_to_save, audited_fields
+                                ),
+                                data_to_save.get("fullname"),
+                                data_to_save.get("time_edit"),
+                            )
+                        elif row_version is not None:
+                            conflicts.append(
+                                {"pk": tuple(pk_values), "record": data_to_save}
+                            )
+                    execute_span.set(
+                        updated=updated_rows_count, conflicts=len(conflicts)
+                    )
+                    audit_log.write_audit_rows(cursor, audit_rows)
+
+                    if conflicts:
+                        # ดึงค่าปัจจุบันเฉพาะเมื่อมีแถวที่ขัดแย้ง (ไว้แสดงให้ผู้ใช้รวมค่า)
+                        with perf.span("save.conflicts", rows=len(conflicts)):
+                            current = fetch_rows_by_pk(
+                                cursor,
+                                all_db_fields_r_alldata,
+                                [conflict["pk"] for conflict in conflicts],
+                            )
+                        for conflict in conflicts:
+                            conflict["current"] = current.get(conflict["pk"])
+                        perf.count("save.conflicts", len(conflicts))
+                finally:
+                    cursor.close()
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+
+            if slow_query_log.is_slow(elapsed_ms):
+                # log เฉพาะค่า PK ของคำสั่งที่ช้าที่สุด (ค่าที่ SET มีข้อมูลส่วนบุคคล)
+                slow_query_log.record_slow_query(
+                    "save",
+                    slowest_sql,
+                    slowest_values,
+                    updated_rows_count,
+                    elapsed_ms,
+                    connection=conn,
+                    log_params=slowest_values[len(update_fields):],
+                    statements=len(list_of_data_to_save_dicts),
+                    slowest_statement_ms=round(slowest_ms, 3),
+                )
+
+            if updated_rows_count > 0:
+                with perf.span("save.commit"):
+                    conn.commit()
+                perf.count("save.batches")
+                perf.count("save.rows_updated", updated_rows_count)
+                return updated_rows_count, conflicts, None
+            elif conflicts:
+                return 0, conflicts, None
+            else:
+                return 0, [], "No rows were actually updated."
 
-    except pyodbc.Error as e:
+    except get_storage().Error as e:
         if conn:
             conn.rollback()
-        return 0, f"Database error during update: {e}"
+        return 0, [], f"Database error during update: {e}"
     except Exception as ex:
         if conn:
             conn.rollback()
-        return 0, f"General error during update: {ex}"
+        return 0, [], f"General error during update: {ex}"
     finally:
         if conn:
             conn.close()
@@ -0,0 +1,14 @@
+import os
+
+# โฟลเดอร์เก็บข้อมูลของโปรแกรมบนเครื่องผู้ใช้ (cache, log ฯลฯ)
+# สามารถเปลี่ยนตำแหน่งได้ด้วย environment variable POP_EDIT_DATA_DIR
+APP_DATA_DIR_ENV = "POP_EDIT_DATA_DIR"
+DEFAULT_APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".pop_edit_data")
+
+
+def get_app_data_dir(*subdirs):
+    """คืนพาธโฟลเดอร์ข้อมูลของโปรแกรม และสร้างโฟลเดอร์ให้ถ้ายังไม่มี"""
+    base_dir = os.environ.get(APP_DATA_DIR_ENV) or DEFAULT_APP_DATA_DIR
+    path = os.path.join(base_dir, *subdirs)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,149 @@
+import bisect
+import heapq
+
+# ชื่อระดับพื้นที่สำหรับแสดงในผลการค้นหา (ตามลำดับชั้นใน LocationData)
+LEVEL_LABELS = ["ภาค", "จังหวัด", "อำเภอ/เขต", "ตำบล/แขวง"]
+
+# ความยาวรหัสเต็มของแต่ละระดับ (ภาคไม่มีรหัสให้ค้น เพราะเป็นเลขหลักเดียว)
+# จังหวัด 2 หลัก, อำเภอ 4 หลัก (จังหวัด+อำเภอ), ตำบล 6 หลัก (จังหวัด+อำเภอ+ตำบล)
+_CODE_LEVELS = {1: 1, 2: 2, 3: 3}
+
+
+def _normalize(text):
+    return "".join(str(text).split()).lower()
+
+
+def _ngrams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class AreaEntry:
+    """พื้นที่หนึ่งรายการในดัชนีค้นหา (ระดับใดก็ได้ตั้งแต่ภาคถึงตำบล)"""
+
+    __slots__ = ("level", "names", "codes", "full_code", "label", "parent", "_key")
+
+    def __init__(self, level, names, codes, parent):
+        self.level = level  # 0 = ภาค ... 3 = ตำบล
+        self.names = names  # ชื่อตั้งแต่ภาคจนถึงระดับนี้
+        self.codes = codes  # รหัสตั้งแต่ภาคจนถึงระดับนี้
+        self.parent = parent
+        self._key = _normalize(names[-1])
+
+        code_digits = _CODE_LEVELS.get(level)
+        self.full_code = (
+            "".join(f"{code:02d}" for code in codes[1:code_digits + 1])
+            if code_digits
+            else ""
+        )
+
+        ancestors = " / ".join(reversed(names[:-1]))
+        self.label = f"{LEVEL_LABELS[level]} {names[-1]}"
+        if ancestors:
+            self.label += f" - {ancestors}"
+        if self.full_code:
+            self.label += f" [{self.full_code}]"
+
+    def _match_rank(self, token):
+        """0 = ตรงทั้งชื่อ/รหัส, 1 = ขึ้นต้นด้วย, 2 = มีอยู่ในชื่อ, None = ไม่ตรง"""
+        if token == self._key or token == self.full_code:
+            return 0
+        if self._key.startswith(token) or (
+            self.full_code and self.full_code.startswith(token)
+        ):
+            return 1
+        if token in self._key:
+            return 2
+        return None
+
+    def _matches_path(self, token):
+        entry = self
+        while entry is not None:
+            if entry._match_rank(token) is not None:
+                return True
+            entry = entry.parent
+        return False
+
+
+class AreaSearchIndex:
+    """
+    ดัชนีค้นหาพื้นที่ทุกระดับจากชื่อบางส่วน (ภาษาไทย) หรือรหัส
+    ชื่อใช้ n-gram index (ตัวอักษรเดี่ยวและ bigram) ส่วนรหัสใช้รายการที่เรียงไว้กับ bisect
+    """
+
+    def __init__(self, root):
+        self.entries = []
+        self._unigrams = {}
+        self._bigrams = {}
+        self._build(root, 0, (), (), None)
+
+        self._codes = sorted(
+            (entry.full_code, idx)
+            for idx, entry in enumerate(self.entries)
+            if entry.full_code
+        )
+        self._code_keys = [code for code, _ in self._codes]
+
+    def _build(self, node, level, names, codes, parent):
+        for child_name in node.child_names:
+            child = node.children[child_name]
+            entry = AreaEntry(
+                level, names + (child_name,), codes + (child.code,), parent
+            )
+            entry_id = len(self.entries)
+            self.entries.append(entry)
+            for gram in _ngrams(entry._key, 1):
+                self._unigrams.setdefault(gram, set()).add(entry_id)
+            for gram in _ngrams(entry._key, 2):
+                self._bigrams.setdefault(gram, set()).add(entry_id)
+            self._build(child, level + 1, entry.names, entry.codes, entry)
+
+    def _candidates_for(self, token):
+        """รายการที่ชื่อของตัวเอง (ไม่รวมชื่อระดับบน) หรือรหัสอาจตรงกับ token"""
+        if token.isdigit():
+            start = bisect.bisect_left(self._code_keys, token)
+            end = bisect.bisect_right(self._code_keys, token + "\uffff")
+            return {idx for _, idx in self._codes[start:end]}
+
+        if len(token) == 1:
+            return set(self._unigrams.get(token, ()))
+
+        postings = [self._bigrams.get(gram) for gram in _ngrams(token, 2)]
+        if any(posting is None for posting in postings):
+            return set()
+        postings.sort(key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def search(self, query, limit=20):
+        """
+        คืนรายการ AreaEntry ที่ตรงกับคำค้นเรียงตามความเกี่ยวข้อง
+        คำค้นหลายคำคั่นด้วยช่องว่าง ทุกคำต้องตรงกับชื่อ/รหัสของพื้นที่นั้นหรือระดับบนของมัน
+        เช่น "เชียงใหม่ แจ่ม" จะได้ตำบลแจ่มหลวงในจังหวัดเชียงใหม่
+        """
+        tokens = [_normalize(token) for token in str(query).split()]
+        tokens = [token for token in tokens if token]
+        if not tokens:
+            return []
+
+        candidate_ids = set()
+        for token in tokens:
+            candidate_ids |= self._candidates_for(token)
+
+        ranked = []
+        for entry_id in candidate_ids:
+            entry = self.entries[entry_id]
+            own_ranks = [entry._match_rank(token) for token in tokens]
+            own_ranks = [rank for rank in own_ranks if rank is not None]
+            if not own_ranks:
+                continue
+            if not all(entry._matches_path(token) for token in tokens):
+                continue
+            sort_key = (
+                -len(own_ranks),
+                min(own_ranks),
+                entry.level,
+                len(entry._key),
+                entry.label,
+            )
+            ranked.append((sort_key, entry_id))
+
+        return [self.entries[entry_id] for _, entry_id in heapq.nsmallest(limit, ranked)]
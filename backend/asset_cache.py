@@ -0,0 +1,108 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from . import perf
+from .app_paths import get_app_data_dir
+
+# เพิ่มเลขนี้เมื่อรูปแบบไฟล์ cache เปลี่ยน เพื่อบังคับให้สร้างใหม่ทั้งหมด
+CACHE_FORMAT_VERSION = 1
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_file_path(excel_path, sheet_name):
+    """ชื่อไฟล์ cache ผูกกับพาธของไฟล์ Excel และชื่อชีต"""
+    key = f"{os.path.abspath(excel_path)}|{sheet_name}".encode("utf-8")
+    name = os.path.splitext(os.path.basename(excel_path))[0]
+    return os.path.join(
+        get_app_data_dir("cache"),
+        f"{name}-{hashlib.sha1(key).hexdigest()[:12]}.pkl",
+    )
+
+
+def _load_cache_entry(cache_path):
+    import pandas as pd
+
+    try:
+        with open(cache_path, "rb") as f:
+            entry = pickle.load(f)
+    except Exception:
+        return None
+
+    if (
+        not isinstance(entry, dict)
+        or entry.get("format_version") != CACHE_FORMAT_VERSION
+        or entry.get("pandas_version") != pd.__version__
+    ):
+        return None
+    return entry
+
+
+def _write_cache_entry(cache_path, entry):
+    """เขียนไฟล์ชั่วคราวก่อนแล้วค่อย rename เพื่อไม่ให้ได้ไฟล์ cache ที่เขียนไม่ครบ"""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(cache_path), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # เขียน cache ไม่ได้ (เช่นไม่มีสิทธิ์) ไม่ถือเป็นข้อผิดพลาด แค่ไม่ได้ใช้ cache
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_excel_cached(excel_path, sheet_name=0):
+    """
+    อ่านไฟล์ Excel แบบมี cache เป็น pickle ไว้ในโฟลเดอร์ข้อมูลของโปรแกรม
+
+    ถ้า mtime และขนาดไฟล์ตรงกับ cache จะโหลดจาก cache ทันที ถ้าไม่ตรงจะเทียบ
+    hash ของไฟล์ก่อน และจะอ่าน Excel ใหม่ (พร้อมสร้าง cache ใหม่) เมื่อเนื้อหาไฟล์เปลี่ยน
+    """
+    stat = os.stat(excel_path)
+    cache_path = _cache_file_path(excel_path, sheet_name)
+    entry = _load_cache_entry(cache_path)
+
+    if entry is not None:
+        if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            perf.count("asset_cache.hit")
+            return entry["frame"]
+
+        # mtime เปลี่ยนแต่เนื้อหาอาจเหมือนเดิม (เช่นคัดลอกไฟล์มาใหม่)
+        file_hash = _file_sha256(excel_path)
+        if entry["sha256"] == file_hash:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            entry["size"] = stat.st_size
+            _write_cache_entry(cache_path, entry)
+            perf.count("asset_cache.hit")
+            return entry["frame"]
+    else:
+        file_hash = _file_sha256(excel_path)
+
+    perf.count("asset_cache.miss")
+
+    # import pandas/openpyxl เฉพาะตอนที่ต้องใช้จริง เพื่อไม่ให้เพิ่มเวลาเปิดโปรแกรม
+    import pandas as pd
+
+    frame = pd.read_excel(excel_path, sheet_name=sheet_name)
+    _write_cache_entry(
+        cache_path,
+        {
+            "format_version": CACHE_FORMAT_VERSION,
+            "pandas_version": pd.__version__,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": file_hash,
+            "frame": frame,
+        },
+    )
+    return frame
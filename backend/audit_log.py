@@ -0,0 +1,165 @@
+"""
+ประวัติการแก้ไขรายช่อง (audit trail) ของ r_alldata_edit
+
+ทุกการบันทึก (หน้าจอแก้ไข / นำเข้าไฟล์แก้ไข) เขียนหนึ่งแถวต่อหนึ่งช่องที่ค่าเปลี่ยน
+ลงตาราง r_alldata_audit ใน transaction เดียวกับ UPDATE ด้วย executemany ครั้งเดียวต่อรอบบันทึก
+ตารางนี้เพิ่มข้อมูลอย่างเดียว (ไม่มีการแก้/ลบจากโปรแกรม)
+
+อ่านย้อนหลังด้วย fetch_history แบบ keyset (audit_id < ค่าสุดท้ายของหน้าก่อน)
+จึงเร็วเท่ากันทุกหน้าไม่ว่าประวัติจะยาวเท่าไร
+"""
+import datetime
+import threading
+
+from . import perf
+from .db import get_connection, get_storage
+
+AUDIT_TABLE = "r_alldata_audit"
+
+# ต้องตรงกับ alldata_operations.LOGICAL_PK_FIELDS
+AUDIT_KEY_FIELDS = ["EA_Code_15", "Building_No", "Household_No", "Population_No"]
+AUDIT_VALUE_FIELDS = ["field_name", "old_value", "new_value", "editor", "time_edit"]
+AUDIT_COLUMNS = AUDIT_KEY_FIELDS + AUDIT_VALUE_FIELDS
+
+DEFAULT_PAGE_SIZE = 100
+
+_ready_storages = set()
+_ready_lock = threading.Lock()
+
+
+def audit_text(value):
+    """ค่าที่เก็บใน audit (ข้อความ หรือ None) และใช้เทียบว่าค่าเปลี่ยนหรือไม่"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(" ")
+    text = str(value).strip()
+    return text if text else None
+
+
+def _key_text(value):
+    return "" if value is None else str(value)
+
+
+def ensure_audit_table():
+    """
+    สร้างตาราง audit ถ้ายังไม่มี (ครั้งแรกที่ใช้ใน process นี้ต่อ storage หนึ่งตัว)
+    ถ้าเชื่อมต่อไม่ได้จะไม่ทำอะไร ให้ผู้เรียกรายงานข้อผิดพลาดจากการเชื่อมต่อของตัวเอง
+    สร้างตารางไม่ได้ถือเป็นข้อผิดพลาด (บันทึก audit ไม่ได้) แต่สร้าง index ไม่ได้
+    (เช่น ไม่มีสิทธิ์ ALTER) แค่ทำให้อ่านประวัติช้าลง จึงไม่ขัดการบันทึก
+    """
+    storage = get_storage()
+    if id(storage) in _ready_storages:
+        return
+    with _ready_lock:
+        if id(storage) in _ready_storages:
+            return
+        conn = get_connection()
+        if not conn:
+            return
+        table_sql, *index_sqls = storage.create_audit_table_sql(
+            AUDIT_TABLE, AUDIT_KEY_FIELDS
+        )
+        cursor = conn.cursor()
+        try:
+            cursor.execute(table_sql)
+            conn.commit()
+            for statement in index_sqls:
+                try:
+                    cursor.execute(statement)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    perf.count("audit.index_error")
+        finally:
+            cursor.close()
+            conn.close()
+        _ready_storages.add(id(storage))
+
+
+def changed_fields(old_row, new_row, fields):
+    """ช่องใน fields ที่ค่าใน new_row ต่างจาก old_row: list ของ (field, old, new) เป็นข้อความ"""
+    changes = []
+    for field in fields:
+        old_text = audit_text(old_row.get(field))
+        new_text = audit_text(new_row.get(field))
+        if old_text != new_text:
+            changes.append((field, old_text, new_text))
+    return changes
+
+
+def audit_rows(pk_values, changes, editor, time_edit):
+    """แถวสำหรับ write_audit_rows ตามลำดับ AUDIT_COLUMNS"""
+    pk_texts = [_key_text(value) for value in pk_values]
+    return [
+        (*pk_texts, field, old_text, new_text, editor, time_edit)
+        for field, old_text, new_text in changes
+    ]
+
+
+def write_audit_rows(cursor, rows):
+    """
+    เพิ่ม rows ลงตาราง audit ด้วย executemany ครั้งเดียว (pyodbc fast_executemany ส่งรอบเดียว)
+    ใช้ cursor ของการบันทึก เพื่อให้ commit / rollback ไปพร้อมกับ UPDATE
+    """
+    if not rows:
+        return 0
+    if hasattr(cursor, "fast_executemany"):
+        cursor.fast_executemany = True
+    with perf.span("audit.insert", rows=len(rows)):
+        cursor.executemany(
+            f"INSERT INTO {AUDIT_TABLE}"
+            f" ({', '.join(f'[{col}]' for col in AUDIT_COLUMNS)})"
+            f" VALUES ({', '.join('?' for _ in AUDIT_COLUMNS)})",
+            rows,
+        )
+    perf.count("audit.rows", len(rows))
+    return len(rows)
+
+
+def fetch_history(pk_values=None, editor=None, before_id=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    ประวัติของแถวหนึ่ง (pk_values) หรือของผู้แก้ไขหนึ่งคน ใหม่สุดก่อน ครั้งละไม่เกิน limit รายการ
+    before_id คือ audit_id สุดท้ายของหน้าก่อน (keyset) คืน (entries, next_before_id)
+    next_before_id เป็น None เมื่อไม่มีหน้าถัดไป
+    """
+    conditions = []
+    params = []
+    if pk_values is not None:
+        conditions += [f"[{pk}] = ?" for pk in AUDIT_KEY_FIELDS]
+        params += [_key_text(value) for value in pk_values]
+    if editor is not None:
+        conditions.append("[editor] = ?")
+        params.append(editor)
+    if not conditions:
+        raise ValueError("A row or an editor is required.")
+    if before_id is not None:
+        conditions.append("[audit_id] < ?")
+        params.append(before_id)
+
+    ensure_audit_table()
+    storage = get_storage()
+    columns = ["audit_id"] + AUDIT_COLUMNS
+    sql = storage.paged_select_sql(
+        ", ".join(f"[{col}]" for col in columns),
+        f"FROM {AUDIT_TABLE} WHERE {' AND '.join(conditions)}"
+        " ORDER BY [audit_id] DESC",
+        limit + 1,
+    )
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Cannot connect to the database.")
+    try:
+        with perf.span("audit.history") as history_span:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            history_span.set(rows=len(rows))
+    finally:
+        conn.close()
+
+    entries = [dict(zip(columns, row)) for row in rows[:limit]]
+    next_before_id = entries[-1]["audit_id"] if len(rows) > limit else None
+    return entries, next_before_id
@@ -0,0 +1,439 @@
+"""
+งานกลางคืนแบบไม่มีหน้าจอ: ส่งออกข้อมูลและตรวจความถูกต้องทั้งจังหวัด/ทั้งประเทศแบบขนาน
+
+แบ่งงานตามอำเภอหรือตำบลจาก hierarchy ใน reg_prov_dist_subdist.xlsx (LocationData)
+แล้วกระจายให้ ProcessPoolExecutor โดยแต่ละ worker เปิด connection ฐานข้อมูลของตัวเองครั้งเดียว
+ใช้ซ้ำทุกพื้นที่ที่ได้รับ แต่ละพื้นที่เขียนไฟล์แยก (partition) แล้ว process หลักรวมสรุปผล
+
+    <output-dir>/extract/<พื้นที่>.<format>     ข้อมูลของพื้นที่ (ชื่อคอลัมน์จาก column_name.xlsx)
+    <output-dir>/validation/<พื้นที่>.csv       ค่าที่ไม่ผ่าน FIELD_VALIDATION_RULES (มีเฉพาะพื้นที่ที่พบ)
+    <output-dir>/summary.json, summary.csv      สรุปรวมและรายพื้นที่
+
+ตัวอย่าง:
+    python -m backend.batch_jobs --province 10 --workers 4
+    python -m backend.batch_jobs --level district --format parquet --output-dir D:\\nightly
+"""
+import argparse
+import collections
+import csv
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import util as multiprocessing_util
+
+from . import db, perf
+from .alldata_operations import LOGICAL_PK_FIELDS, build_search_query, get_r_alldata_fields
+from .app_paths import get_app_data_dir
+from .column_mapper import ColumnMapper
+from .exporter import EXPORT_FORMATS, export_rows
+from .location_data import LOCATION_LEVELS, LocationData
+from .storage import SqliteStorage, create_storage
+from .validation_rules import compile_validation_rules, find_invalid_values
+
+LEVELS = {"district": 3, "subdistrict": 4}
+DEFAULT_LEVEL = "subdistrict"
+DEFAULT_BATCH_SIZE = 5000
+
+VALIDATION_HEADERS = LOGICAL_PK_FIELDS + ["field", "column_name", "value", "message"]
+SUMMARY_CSV_HEADERS = [
+    "area",
+    "rows",
+    "invalid_values",
+    "invalid_rows",
+    "seconds",
+    "error",
+]
+
+# สถานะของ worker แต่ละ process (ตั้งใน _init_worker)
+_worker = {}
+
+
+def _storage_spec(storage):
+    """ข้อมูลสำหรับสร้าง storage ใหม่ใน worker (ตัว storage มี lock จึงส่งข้าม process ไม่ได้)"""
+    if isinstance(storage, SqliteStorage):
+        return storage.name, None, storage.db_path
+    return storage.name, storage.db_config, None
+
+
+def _init_worker(storage_spec, all_db_fields_r_alldata, column_names):
+    backend_name, db_config, sqlite_path = storage_spec
+    db.set_storage(create_storage(backend_name, db_config, sqlite_path))
+    connection = db.get_connection()
+    if connection is not None:
+        # ปิด connection ตอน worker จบ (atexit ไม่ทำงานใน process ของ multiprocessing)
+        multiprocessing_util.Finalize(None, connection.close, exitpriority=10)
+    _worker.update(
+        connection=connection,
+        fields=all_db_fields_r_alldata,
+        column_names=column_names,
+        rules=compile_validation_rules(),
+    )
+
+
+def area_label(codes):
+    """ชื่อ partition จากรหัสพื้นที่ เช่น 1_10_1001_100101"""
+    return "_".join(
+        str(codes[code_field])
+        for code_field, _ in LOCATION_LEVELS
+        if codes[code_field] is not None
+    )
+
+
+def plan_partitions(level=DEFAULT_LEVEL, region_codes=None, province_codes=None):
+    """รายการรหัสพื้นที่ (dict แบบ LocationData.get_codes) ระดับอำเภอหรือตำบลในขอบเขตที่เลือก"""
+    location_data = LocationData.get_instance()
+    if not location_data.has_data():
+        raise RuntimeError("reg_prov_dist_subdist.xlsx could not be loaded")
+    partitions = []
+    for _, codes in location_data.iter_areas(LEVELS[level]):
+        if region_codes and codes["RegCode"] not in region_codes:
+            continue
+        if province_codes and codes["ProvCode"] not in province_codes:
+            continue
+        partitions.append(codes)
+    return partitions
+
+
+def _text_frame(rows, columns, fields):
+    """แถวจากฐานข้อมูล -> DataFrame ของข้อความ (None = "") เฉพาะ fields ที่จะตรวจ"""
+    import pandas as pd
+
+    frame = pd.DataFrame([tuple(row) for row in rows], columns=columns, dtype=object)
+    frame = frame[fields].fillna("").astype(str)
+    return frame.apply(lambda column: column.str.strip())
+
+
+def process_area(connection, task, all_db_fields_r_alldata, column_names, rules):
+    """
+    ทำงานหนึ่งพื้นที่: ดึงข้อมูลทีละ batch_size แถวผ่าน connection ที่ส่งมา (ไม่ปิดให้)
+    เขียนไฟล์ส่งออก และตรวจค่าทุกช่องแบบ vectorized คืน dict สรุปผลของพื้นที่
+    """
+    started = time.perf_counter()
+    codes = task["codes"]
+    summary = {
+        "area": task["label"],
+        "codes": codes,
+        "rows": 0,
+        "invalid_values": 0,
+        "invalid_rows": 0,
+        "by_field": {},
+        "files": {},
+        "worker_pid": os.getpid(),
+        "error": None,
+    }
+    if connection is None:
+        summary["error"] = "Cannot connect to the database."
+        return summary
+
+    query, params = build_search_query(codes, all_db_fields_r_alldata)
+    by_field = collections.Counter()
+    invalid_rows = set()
+    validation_path = os.path.join(
+        task["output_dir"], "validation", f"{task['label']}.csv"
+    )
+    validation_file = None
+    validation_writer = None
+
+    def fetch_batches(cursor, columns):
+        nonlocal validation_file, validation_writer
+        validated_fields = [field for field in columns if field in rules]
+        while True:
+            rows = cursor.fetchmany(task["batch_size"])
+            if not rows:
+                break
+            batch_offset = summary["rows"]
+            summary["rows"] += len(rows)
+            if task["validate"]:
+                frame = _text_frame(rows, columns, LOGICAL_PK_FIELDS + validated_fields)
+                invalid = find_invalid_values(frame[validated_fields], rules)
+                if invalid and validation_writer is None:
+                    validation_file = open(
+                        validation_path, "w", encoding="utf-8-sig", newline=""
+                    )
+                    validation_writer = csv.writer(validation_file)
+                    validation_writer.writerow(VALIDATION_HEADERS)
+                for index, field, message in invalid:
+                    by_field[field] += 1
+                    invalid_rows.add(batch_offset + index)
+                    validation_writer.writerow(
+                        [frame.at[index, pk] for pk in LOGICAL_PK_FIELDS]
+                        + [
+                            field,
+                            column_names.get(field, field),
+                            frame.at[index, field],
+                            message,
+                        ]
+                    )
+            yield [dict(zip(columns, row)) for row in rows]
+
+    try:
+        with perf.span("batch.partition", area=task["label"]) as partition_span:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(query, params)
+                columns = [col[0] for col in cursor.description]
+                batches = fetch_batches(cursor, columns)
+                if task["extract_format"]:
+                    extract_path = os.path.join(
+                        task["output_dir"],
+                        "extract",
+                        f"{task['label']}.{task['extract_format']}",
+                    )
+                    export_rows(
+                        batches,
+                        task["export_fields"],
+                        [column_names.get(f, f) for f in task["export_fields"]],
+                        extract_path,
+                        task["extract_format"],
+                    )
+                    summary["files"]["extract"] = extract_path
+                else:
+                    for _ in batches:
+                        pass
+            finally:
+                cursor.close()
+            partition_span.set(rows=summary["rows"], invalid=sum(by_field.values()))
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if validation_file is not None:
+            validation_file.close()
+            summary["files"]["validation"] = validation_path
+
+    summary["invalid_values"] = sum(by_field.values())
+    summary["invalid_rows"] = len(invalid_rows)
+    summary["by_field"] = dict(by_field)
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def run_partition(task):
+    """ทำงานหนึ่งพื้นที่ใน worker ด้วย connection ที่ worker เปิดไว้ตอนเริ่ม"""
+    return process_area(
+        _worker.get("connection"),
+        task,
+        _worker["fields"],
+        _worker["column_names"],
+        _worker["rules"],
+    )
+
+
+def merge_summaries(summaries, wall_seconds, workers):
+    """รวมสรุปรายพื้นที่จาก worker เป็นสรุปทั้งงาน"""
+    by_field = collections.Counter()
+    for summary in summaries:
+        by_field.update(summary["by_field"])
+    failed = [summary for summary in summaries if summary["error"]]
+    return {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "partitions": len(summaries),
+        "failed_partitions": len(failed),
+        "rows": sum(summary["rows"] for summary in summaries),
+        "invalid_values": sum(by_field.values()),
+        "invalid_rows": sum(summary["invalid_rows"] for summary in summaries),
+        "by_field": dict(by_field.most_common()),
+        "wall_seconds": round(wall_seconds, 3),
+        "worker_seconds": round(sum(summary["seconds"] for summary in summaries), 3),
+        "areas": sorted(summaries, key=lambda summary: summary["area"]),
+    }
+
+
+def write_summary(merged, output_dir):
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(merged, f, ensure_ascii=False, indent=2)
+    with open(
+        os.path.join(output_dir, "summary.csv"), "w", encoding="utf-8-sig", newline=""
+    ) as f:
+        writer = csv.writer(f)
+        writer.writerow(SUMMARY_CSV_HEADERS)
+        for summary in merged["areas"]:
+            writer.writerow(
+                [
+                    summary["area"],
+                    summary["rows"],
+                    summary["invalid_values"],
+                    summary["invalid_rows"],
+                    summary["seconds"],
+                    summary["error"] or "",
+                ]
+            )
+
+
+def job_fields():
+    """(ฟิลด์ทั้งหมดของ r_alldata, ฟิลด์ที่ส่งออกโดยมี PK นำหน้า, ชื่อคอลัมน์ของแต่ละฟิลด์)"""
+    all_db_fields_r_alldata = get_r_alldata_fields()
+    if not all_db_fields_r_alldata:
+        raise RuntimeError("Cannot read r_alldata columns from the database.")
+    column_mapper = ColumnMapper.get_instance()
+    shown_fields = column_mapper.get_fields_to_show() or all_db_fields_r_alldata
+    export_fields = [pk for pk in LOGICAL_PK_FIELDS if pk not in shown_fields]
+    export_fields += list(shown_fields)
+    column_names = {
+        field: column_mapper.get_column_name(field)
+        for field in all_db_fields_r_alldata
+    }
+    return all_db_fields_r_alldata, export_fields, column_names
+
+
+def build_tasks(
+    partitions,
+    output_dir,
+    export_fields,
+    extract_format="csv",
+    validate=True,
+    batch_size=DEFAULT_BATCH_SIZE,
+):
+    for subdir in ("extract", "validation"):
+        os.makedirs(os.path.join(output_dir, subdir), exist_ok=True)
+    return [
+        {
+            "label": area_label(codes),
+            "codes": codes,
+            "output_dir": output_dir,
+            "extract_format": extract_format,
+            "export_fields": export_fields,
+            "validate": validate,
+            "batch_size": batch_size,
+        }
+        for codes in partitions
+    ]
+
+
+def run_batch(
+    partitions,
+    output_dir,
+    workers=None,
+    extract_format="csv",
+    validate=True,
+    batch_size=DEFAULT_BATCH_SIZE,
+    progress=None,
+):
+    """
+    รันทุกพื้นที่ใน partitions บน process pool แล้วคืนสรุปรวม (เขียน summary.* ลง output_dir ด้วย)
+    extract_format None = ตรวจอย่างเดียวไม่ส่งออก   progress(จำนวนที่เสร็จ, ทั้งหมด, สรุปพื้นที่)
+    """
+    all_db_fields_r_alldata, export_fields, column_names = job_fields()
+    tasks = build_tasks(
+        partitions, output_dir, export_fields, extract_format, validate, batch_size
+    )
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    summaries = []
+    with perf.span("batch", partitions=len(tasks), workers=workers):
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                _storage_spec(db.get_storage()),
+                all_db_fields_r_alldata,
+                column_names,
+            ),
+        ) as executor:
+            futures = [executor.submit(run_partition, task) for task in tasks]
+            for future in as_completed(futures):
+                summary = future.result()
+                summaries.append(summary)
+                if progress is not None:
+                    progress(len(summaries), len(tasks), summary)
+
+    merged = merge_summaries(summaries, time.perf_counter() - started, workers)
+    write_summary(merged, output_dir)
+    return merged
+
+
+def format_summary(merged, column_mapper=None):
+    column_mapper = column_mapper or ColumnMapper.get_instance()
+    lines = [
+        f"{merged['partitions']:,} areas, {merged['rows']:,} rows"
+        f" in {merged['wall_seconds']:,.1f} s ({merged['workers']} workers,"
+        f" {merged['worker_seconds']:,.1f} s of work)",
+        f"invalid values: {merged['invalid_values']:,}"
+        f" in {merged['invalid_rows']:,} rows",
+    ]
+    for field, count in merged["by_field"].items():
+        lines.append(f"  {count:>10,}  {column_mapper.get_column_name(field)}")
+    if merged["failed_partitions"]:
+        lines.append(f"failed areas: {merged['failed_partitions']:,}")
+        for summary in merged["areas"]:
+            if summary["error"]:
+                lines.append(f"  {summary['area']}: {summary['error']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export and validate r_alldata_edit area by area on a process pool"
+    )
+    parser.add_argument(
+        "--region", type=int, action="append", help="RegCode (ระบุได้หลายครั้ง)"
+    )
+    parser.add_argument(
+        "--province", type=int, action="append", help="ProvCode (ระบุได้หลายครั้ง)"
+    )
+    parser.add_argument("--level", choices=sorted(LEVELS), default=DEFAULT_LEVEL)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="จำนวน process (ค่าเริ่มต้น: จำนวน CPU)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(EXPORT_FORMATS) + ["none"],
+        default="csv",
+        help="ชนิดไฟล์ส่งออก (none = ตรวจอย่างเดียว)",
+    )
+    parser.add_argument("--no-validate", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--output-dir", help="โฟลเดอร์ผลลัพธ์ (ค่าเริ่มต้น: batch/<เวลา> ในโฟลเดอร์ข้อมูลโปรแกรม)"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        partitions = plan_partitions(args.level, args.region, args.province)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if not partitions:
+        print("Error: no area matches the given codes", file=sys.stderr)
+        return 2
+
+    output_dir = args.output_dir or get_app_data_dir(
+        "batch", datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    )
+
+    def report_progress(done, total, summary):
+        status = summary["error"] or f"{summary['invalid_values']:,} invalid"
+        print(
+            f"[{done}/{total}] {summary['area']}: {summary['rows']:,} rows, {status}",
+            file=sys.stderr,
+        )
+
+    try:
+        merged = run_batch(
+            partitions,
+            output_dir,
+            workers=args.workers,
+            extract_format=None if args.format == "none" else args.format,
+            validate=not args.no_validate,
+            batch_size=args.batch_size,
+            progress=report_progress,
+        )
+    except (RuntimeError, db.get_storage().Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    print(format_summary(merged))
+    print(f"output: {output_dir}")
+    return 1 if merged["failed_partitions"] else 0
+
+
+if __name__ == "__main__":
+    # จำเป็นเมื่อรันจากไฟล์ .exe ที่ build ด้วย PyInstaller บน Windows
+    from multiprocessing import freeze_support
+
+    freeze_support()
+    sys.exit(main())
@@ -1,15 +1,20 @@
-import pandas as pd
 import os
+import threading
 import re
 from frontend.utils.resource_path import resource_path
+from .asset_cache import read_excel_cached
 
 class ColumnMapper:
     _instance = None
 
+    # ป้องกันการสร้างซ้อนกันระหว่าง warm-up thread กับ GUI thread
+    _lock = threading.Lock()
+
     @classmethod
     def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = ColumnMapper()
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = ColumnMapper()
         return cls._instance
 
     def __init__(self):
@@ -27,7 +32,7 @@ class ColumnMapper:
             excel_path = resource_path(os.path.join("assets", "column_name.xlsx"))
 
             # โหลดข้อมูลจากไฟล์ Excel
-            column_df = pd.read_excel(excel_path)
+            column_df = read_excel_cached(excel_path)
 
             # เก็บรายชื่อฟิลด์ที่ต้องแสดง
             self.fields_to_show = column_df["Field_name"].tolist()
@@ -1,3 +1,5 @@
+import os
+
 # Database configuration
 DB_CONFIG = {
     'host': '172.20.3.22',
@@ -7,6 +9,13 @@ DB_CONFIG = {
     'database': 'pop68T'
 }
 
+# ฐานข้อมูลที่ใช้งาน: 'sqlserver' (ฐานข้อมูลจริงตาม DB_CONFIG) หรือ
+# 'sqlite' (ฐานข้อมูลจำลองบนเครื่อง สำหรับพัฒนาแบบ offline และ benchmark)
+DB_BACKEND = os.environ.get('POP_EDIT_DB_BACKEND', 'sqlserver')
+
+# ไฟล์ฐานข้อมูลจำลอง ถ้าไม่กำหนดจะใช้ ~/.pop_edit_data/standin/pop68T.sqlite3
+SQLITE_DB_PATH = os.environ.get('POP_EDIT_SQLITE_PATH') or None
+
 
 # import os
 # import json
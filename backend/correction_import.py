@@ -0,0 +1,446 @@
+"""
+นำเข้าไฟล์แก้ไขข้อมูล (Excel / CSV) ที่หน่วยงานภาคสนามส่งมา โดยอ้างอิงแถวด้วย LOGICAL_PK_FIELDS
+
+ขั้นตอน:
+1. load_corrections     อ่านไฟล์ทีละชุด (openpyxl read-only / pandas chunksize) เป็น DataFrame
+                        หัวคอลัมน์ใช้ได้ทั้งชื่อฟิลด์ในฐานข้อมูลและชื่อจาก column_name.xlsx
+                        (ไฟล์ที่ได้จาก "ส่งออกไฟล์" จึงแก้แล้วนำเข้ากลับได้ทันที)
+2. validate_corrections ตรวจทุกค่าด้วย FIELD_VALIDATION_RULES ทีละคอลัมน์แบบ vectorized
+3. build_diff           ดึงค่าปัจจุบันจาก r_alldata_edit ตาม PK เป็นชุดๆ แล้วเทียบทีละช่อง
+4. apply_corrections    ใส่รายการที่ผู้ใช้ยืนยันลงตารางชั่วคราว แล้ว UPDATE ... FROM คำสั่งเดียว
+                        พร้อมประทับ fullname / time_edit เฉพาะแถวที่ไม่มีใครแก้หลังขั้นที่ 3
+                        (row_version ตรงกับตอนเทียบ) แถวที่ไม่ตรงคืนเป็น conflicts
+
+ช่องว่างในไฟล์หมายถึง "ไม่เปลี่ยนค่า" (ล้างค่าให้เป็นค่าว่างผ่านการนำเข้าไม่ได้)
+"""
+import datetime
+import os
+import time
+
+from . import audit_log, perf, slow_query_log
+from .alldata_operations import (
+    LOGICAL_PK_FIELDS,
+    NON_EDITABLE_FIELDS,
+    ROW_VERSION_FIELD,
+    get_r_alldata_fields,
+    row_version_fields,
+    row_version_sql,
+)
+from .column_mapper import ColumnMapper
+from .db import get_connection, get_storage
+from .validation_rules import compile_validation_rules, find_invalid_values
+
+IMPORT_FORMATS = {
+    "xlsx": "Excel (*.xlsx)",
+    "csv": "CSV (*.csv)",
+}
+
+TABLE = "r_alldata_edit"
+STAGING_TABLE = "r_alldata_corrections"
+KEYS_TABLE = "r_alldata_correction_keys"
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# จำนวนแถวที่อ่านจาก cursor ต่อครั้งตอนดึงค่าปัจจุบันมาเทียบ
+FETCH_BATCH_SIZE = 2000
+
+# ข้อมูลแถวแรกของไฟล์อยู่ที่แถว 2 (แถว 1 เป็นหัวคอลัมน์) ใช้อ้างอิงในข้อความแจ้งเตือน
+FIRST_DATA_ROW = 2
+
+
+def format_from_path(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in IMPORT_FORMATS:
+        raise ValueError(f"ไม่รองรับไฟล์ชนิด .{extension}")
+    return extension
+
+
+def _cell_text(value):
+    """ค่าในเซลล์ Excel -> ข้อความ (ตัวเลขจำนวนเต็มที่ Excel เก็บเป็น float ไม่มี .0 ต่อท้าย)"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(" ")
+    return str(value).strip()
+
+
+def _iter_xlsx_chunks(path, chunk_size):
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = [_cell_text(value) for value in next(rows, ())]
+        chunk = []
+        for row in rows:
+            # แถวใน read-only mode อาจสั้นกว่าหัวตารางถ้าช่องท้ายๆ ว่าง
+            row = tuple(row[: len(headers)]) + (None,) * (len(headers) - len(row))
+            chunk.append([_cell_text(value) for value in row])
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=headers)
+                chunk = []
+        if chunk or not headers:
+            yield pd.DataFrame(chunk, columns=headers)
+    finally:
+        workbook.close()
+
+
+def _iter_csv_chunks(path, chunk_size):
+    import pandas as pd
+
+    # อ่านทุกคอลัมน์เป็นข้อความ เพื่อไม่ให้รหัสที่มีเลข 0 นำหน้าหายไป
+    yield from pd.read_csv(
+        path,
+        dtype=str,
+        keep_default_na=False,
+        encoding="utf-8-sig",
+        chunksize=chunk_size,
+    )
+
+
+def iter_correction_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """อ่านไฟล์ทีละ chunk_size แถว คืน DataFrame ที่ทุกค่าเป็นข้อความ (ช่องว่าง = "")"""
+    if format_from_path(path) == "xlsx":
+        chunks = _iter_xlsx_chunks(path, chunk_size)
+    else:
+        chunks = _iter_csv_chunks(path, chunk_size)
+    for chunk in chunks:
+        yield chunk.fillna("").astype(str).apply(lambda column: column.str.strip())
+
+
+def editable_fields(all_db_fields_r_alldata):
+    return [
+        field
+        for field in all_db_fields_r_alldata
+        if field not in LOGICAL_PK_FIELDS and field not in NON_EDITABLE_FIELDS
+    ]
+
+
+def _normalize_header(header):
+    """ไม่สนช่องว่างซ้ำ/ขึ้นบรรทัดใหม่ในหัวคอลัมน์ (ชื่อใน column_name.xlsx บางชื่อมีช่องว่างเกิน)"""
+    return " ".join(str(header).split())
+
+
+def _header_to_field(all_db_fields_r_alldata, column_mapper):
+    """หัวคอลัมน์ที่ยอมรับ -> ชื่อฟิลด์ (ชื่อฟิลด์เอง และชื่อแสดงผลจาก ColumnMapper)"""
+    fields = LOGICAL_PK_FIELDS + editable_fields(all_db_fields_r_alldata)
+    mapping = {
+        _normalize_header(column_mapper.get_column_name(field)): field
+        for field in fields
+    }
+    mapping.update({field: field for field in fields})
+    return mapping
+
+
+def load_corrections(
+    path, all_db_fields_r_alldata, column_mapper=None, chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """
+    อ่านไฟล์แก้ไขทั้งไฟล์ คืน (frame, ignored_headers)
+    frame มีคอลัมน์เป็นชื่อฟิลด์ (PK ก่อน) และ index คือเลขแถวในไฟล์
+    ignored_headers คือหัวคอลัมน์ที่ไม่รู้จักหรือแก้ไขไม่ได้ (เช่น ชื่อ-นามสกุล)
+    """
+    import pandas as pd
+
+    column_mapper = column_mapper or ColumnMapper.get_instance()
+    header_to_field = _header_to_field(all_db_fields_r_alldata, column_mapper)
+
+    with perf.span("import.read", format=format_from_path(path)) as read_span:
+        frames = []
+        ignored_headers = []
+        columns = None
+        next_row = FIRST_DATA_ROW
+        for chunk in iter_correction_chunks(path, chunk_size):
+            if columns is None:
+                columns = {}
+                for header in chunk.columns:
+                    field = header_to_field.get(_normalize_header(header))
+                    if field is None or field in columns.values():
+                        if header:
+                            ignored_headers.append(header)
+                    else:
+                        columns[header] = field
+                missing = [pk for pk in LOGICAL_PK_FIELDS if pk not in columns.values()]
+                if missing:
+                    raise ValueError(
+                        "ไฟล์ไม่มีคอลัมน์ Primary Key: "
+                        + ", ".join(column_mapper.get_column_name(pk) for pk in missing)
+                    )
+            chunk = chunk[list(columns)].rename(columns=columns)
+            chunk.index = range(next_row, next_row + len(chunk))
+            next_row += len(chunk)
+            # ข้ามแถวว่างทั้งแถว (มักเป็นแถวท้ายไฟล์ Excel)
+            frames.append(chunk[(chunk != "").any(axis=1)])
+
+        frame = pd.concat(frames) if frames else pd.DataFrame(columns=LOGICAL_PK_FIELDS)
+        value_fields = [col for col in frame.columns if col not in LOGICAL_PK_FIELDS]
+        frame = frame[LOGICAL_PK_FIELDS + value_fields]
+        read_span.set(rows=len(frame), fields=len(value_fields))
+    return frame, ignored_headers
+
+
+def validate_corrections(frame, rules=None, column_mapper=None):
+    """
+    ตรวจค่าทั้งหมดในไฟล์ คืน list ของข้อความผิดพลาด (รูปแบบเดียวกับการตรวจในตาราง)
+    ตรวจทั้งคอลัมน์ในครั้งเดียวด้วย pandas แทนการวนทีละช่อง รวมถึง PK ที่ว่างหรือซ้ำ
+    """
+    column_mapper = column_mapper or ColumnMapper.get_instance()
+    errors = []
+
+    with perf.span("import.validate", rows=len(frame)) as validate_span:
+        pk_frame = frame[LOGICAL_PK_FIELDS]
+        blank_pk = (pk_frame == "").any(axis=1)
+        for row in frame.index[blank_pk]:
+            errors.append((row, "", f"แถว {row}: ต้องมีค่า Primary Key ครบทั้ง 4 คอลัมน์"))
+        duplicated = pk_frame.duplicated(keep="first") & ~blank_pk
+        for row in frame.index[duplicated]:
+            errors.append((row, "", f"แถว {row}: Primary Key ซ้ำกับแถวก่อนหน้าในไฟล์"))
+
+        # ช่องว่าง = ไม่เปลี่ยนค่า จึงไม่ต้องตรวจ
+        value_fields = [col for col in frame.columns if col not in LOGICAL_PK_FIELDS]
+        for row, field, message in find_invalid_values(
+            frame[value_fields], compile_validation_rules(rules), check_blank=False
+        ):
+            display_name = column_mapper.get_column_name(field)
+            errors.append((row, field, f"แถว {row}, คอลัมน์ '{display_name}': {message}"))
+
+        errors.sort(key=lambda error: error[0])
+        validate_span.set(errors=len(errors))
+    perf.count("validate.failures", len(errors))
+    return [message for _, _, message in errors]
+
+
+def _key_text(value):
+    """ค่าจากฐานข้อมูล -> ข้อความสำหรับเทียบกับค่าในไฟล์ (CHAR ของ SQL Server มีช่องว่างต่อท้าย)"""
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _create_staging_table(storage, cursor, name, columns, rows):
+    """สร้างตารางชั่วคราว (PK เป็น primary key) แล้วใส่ rows ทั้งหมด"""
+    cursor.execute(storage.create_temp_table_sql(name, columns, LOGICAL_PK_FIELDS))
+    if hasattr(cursor, "fast_executemany"):
+        cursor.fast_executemany = True  # pyodbc: ส่งทุกแถวในรอบเดียว
+    table = storage.temp_table_name(name)
+    cursor.executemany(
+        f"INSERT INTO {table} ({', '.join(f'[{col}]' for col in columns)})"
+        f" VALUES ({', '.join('?' for _ in columns)})",
+        rows,
+    )
+
+
+def fetch_current_rows(keys, fields, batch_size=FETCH_BATCH_SIZE):
+    """
+    ค่าปัจจุบันของ fields จาก r_alldata_edit สำหรับ PK ใน keys (tuple ของข้อความ)
+    ใส่ PK ลงตารางชั่วคราวแล้ว JOIN ครั้งเดียว (สแกนตารางหลักไม่เกินหนึ่งรอบแม้ยังไม่มี index)
+    แล้วอ่านผลทีละ batch_size แถว คืน dict: PK tuple -> dict ของค่าปัจจุบัน
+    พร้อม ROW_VERSION_FIELD (ลายนิ้วมือแบบข้อความ) สำหรับตรวจตอน apply_corrections
+    """
+    all_db_fields = get_r_alldata_fields()
+    if not all_db_fields:
+        raise RuntimeError("Cannot connect to the database.")
+    storage = get_storage()
+    keys_table = storage.temp_table_name(KEYS_TABLE)
+    select_sql = ", ".join(f"t.[{field}]" for field in LOGICAL_PK_FIELDS + list(fields))
+    select_sql += f", {row_version_sql(all_db_fields, 't', as_text=True)}"
+    join_sql = " AND ".join(f"t.[{pk}] = k.[{pk}]" for pk in LOGICAL_PK_FIELDS)
+    value_fields = list(fields) + [ROW_VERSION_FIELD]
+    current = {}
+
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Cannot connect to the database.")
+    try:
+        with perf.span("import.fetch", keys=len(keys)) as fetch_span:
+            cursor = conn.cursor()
+            try:
+                _create_staging_table(
+                    storage, cursor, KEYS_TABLE, LOGICAL_PK_FIELDS, keys
+                )
+                cursor.execute(
+                    f"SELECT {select_sql} FROM {TABLE} t JOIN {keys_table} k ON {join_sql}"
+                )
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        pk_values = row[: len(LOGICAL_PK_FIELDS)]
+                        current[tuple(_key_text(value) for value in pk_values)] = dict(
+                            zip(value_fields, row[len(LOGICAL_PK_FIELDS) :])
+                        )
+                cursor.execute(f"DROP TABLE {keys_table}")
+            finally:
+                cursor.close()
+            fetch_span.set(rows=len(current))
+    finally:
+        conn.close()
+    return current
+
+
+def build_diff(frame, batch_size=FETCH_BATCH_SIZE):
+    """
+    เทียบไฟล์กับข้อมูลปัจจุบัน คืน (changes, missing)
+    changes  list ของ dict: row, pk, field, old, new (เฉพาะช่องที่ค่าต่างจากเดิม)
+             และ row_version ของแถวตอนเทียบ
+    missing  list ของ (row, pk) ที่ไม่พบในตาราง
+    """
+    value_fields = [col for col in frame.columns if col not in LOGICAL_PK_FIELDS]
+    keys = [tuple(key) for key in frame[LOGICAL_PK_FIELDS].itertuples(index=False)]
+    current = fetch_current_rows(list(dict.fromkeys(keys)), value_fields, batch_size)
+
+    changes = []
+    missing = []
+    for row, key, values in zip(
+        frame.index, keys, frame[value_fields].itertuples(index=False)
+    ):
+        current_values = current.get(key)
+        if current_values is None:
+            missing.append((row, key))
+            continue
+        for field, new_value in zip(value_fields, values):
+            # เทียบแบบเดียวกับค่าในไฟล์ (_cell_text) เช่น float 5.0 ในฐานข้อมูลเท่ากับ "5"
+            old_value = audit_log.audit_text(current_values[field]) or ""
+            if new_value != "" and new_value != old_value:
+                changes.append(
+                    {
+                        "row": row,
+                        "pk": key,
+                        "field": field,
+                        "old": old_value,
+                        "new": new_value,
+                        "row_version": current_values[ROW_VERSION_FIELD],
+                    }
+                )
+    return changes, missing
+
+
+def apply_corrections(changes, editor_fullname, edit_timestamp=None):
+    """
+    บันทึกรายการใน changes (จาก build_diff) ด้วย UPDATE ... FROM ตารางชั่วคราวคำสั่งเดียว
+    แถวที่ถูกแก้จะได้ fullname = editor_fullname และ time_edit = edit_timestamp
+    แถวที่ row_version ไม่ตรงกับตอน build_diff แล้ว (มีคนอื่นบันทึกหลังเทียบ) หรือถูกลบไป
+    จะไม่ถูกเขียนทับ และคืนเป็น conflicts (list ของ PK tuple) ให้ผู้ใช้เทียบไฟล์ใหม่
+    ค่าเดิม/ค่าใหม่ของรายการที่บันทึกถูกเขียนลงตาราง audit ใน transaction เดียวกัน
+    คืน (จำนวนแถวที่อัปเดต, conflicts, ข้อความผิดพลาดหรือ None)
+    """
+    if not changes:
+        return 0, [], "No corrections to apply."
+
+    edit_timestamp = edit_timestamp or datetime.datetime.now()
+    fields = list(dict.fromkeys(change["field"] for change in changes))
+    values_by_pk = {}
+    versions = {}
+    for change in changes:
+        values_by_pk.setdefault(change["pk"], {})[change["field"]] = change["new"]
+        versions[change["pk"]] = change.get("row_version")
+    staging_rows = [
+        list(pk) + [versions[pk]] + [values.get(field) for field in fields]
+        for pk, values in values_by_pk.items()
+    ]
+
+    all_db_fields = get_r_alldata_fields()
+    if not all_db_fields:
+        return 0, [], "Database connection failed for updating."
+    storage = get_storage()
+    staging = storage.temp_table_name(STAGING_TABLE)
+    staging_columns = LOGICAL_PK_FIELDS + [ROW_VERSION_FIELD] + fields
+    update_sql = storage.update_from_sql(
+        TABLE,
+        staging,
+        LOGICAL_PK_FIELDS,
+        fields,
+        ["fullname", "time_edit"],
+        row_version_fields(all_db_fields),
+        ROW_VERSION_FIELD,
+    )
+    join_sql = " AND ".join(f"t.[{pk}] = s.[{pk}]" for pk in LOGICAL_PK_FIELDS)
+    conflict_sql = (
+        f"SELECT {', '.join(f's.[{pk}]' for pk in LOGICAL_PK_FIELDS)}"
+        f" FROM {staging} s LEFT JOIN {TABLE} t ON {join_sql}"
+        f" WHERE s.[{ROW_VERSION_FIELD}] IS NOT NULL"
+        f" AND (t.[{LOGICAL_PK_FIELDS[0]}] IS NULL"
+        f" OR {row_version_sql(all_db_fields, 't', as_text=True)}"
+        f" <> s.[{ROW_VERSION_FIELD}])"
+    )
+
+    conn = None
+    apply_span = perf.span("import.apply", rows=len(staging_rows), fields=len(fields))
+    try:
+        with apply_span:
+            audit_log.ensure_audit_table()
+            conn = get_connection()
+            if not conn:
+                return 0, [], "Database connection failed for updating."
+
+            # ไม่ใช้ `with` เพื่อ commit ครั้งเดียวหลัง UPDATE สำเร็จ
+            cursor = conn.cursor()
+            try:
+                _create_staging_table(
+                    storage, cursor, STAGING_TABLE, staging_columns, staging_rows
+                )
+                # แถวที่ UPDATE จะข้าม (เงื่อนไขเดียวกับใน update_sql) อ่านก่อนใน transaction เดียวกัน
+                cursor.execute(conflict_sql)
+                conflicts = [tuple(row) for row in cursor.fetchall()]
+                t0 = time.perf_counter()
+                cursor.execute(update_sql, [editor_fullname, edit_timestamp])
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+                updated_rows_count = cursor.rowcount
+                cursor.execute(f"DROP TABLE {staging}")
+                if updated_rows_count > 0:
+                    conflict_keys = set(conflicts)
+                    audit_rows = []
+                    for change in changes:
+                        if change["pk"] in conflict_keys:
+                            continue
+                        audit_rows += audit_log.audit_rows(
+                            change["pk"],
+                            [
+                                (
+                                    change["field"],
+                                    audit_log.audit_text(change["old"]),
+                                    audit_log.audit_text(change["new"]),
+                                )
+                            ],
+                            editor_fullname,
+                            edit_timestamp,
+                        )
+                    audit_log.write_audit_rows(cursor, audit_rows)
+            finally:
+                cursor.close()
+            apply_span.set(updated=updated_rows_count, conflicts=len(conflicts))
+            if conflicts:
+                perf.count("import.conflicts", len(conflicts))
+
+            if slow_query_log.is_slow(elapsed_ms):
+                # พารามิเตอร์มีแค่ชื่อผู้แก้ไขและเวลา ไม่ต้องเก็บลง log
+                slow_query_log.record_slow_query(
+                    "import",
+                    update_sql,
+                    [editor_fullname, edit_timestamp],
+                    updated_rows_count,
+                    elapsed_ms,
+                    log_params=[],
+                    staged_rows=len(staging_rows),
+                )
+
+            if updated_rows_count > 0:
+                conn.commit()
+                perf.count("import.rows_updated", updated_rows_count)
+                return updated_rows_count, conflicts, None
+            conn.rollback()
+            if conflicts:
+                return 0, conflicts, None
+            return 0, [], "No rows were actually updated."
+
+    except get_storage().Error as e:
+        if conn:
+            conn.rollback()
+        return 0, [], f"Database error during import: {e}"
+    finally:
+        if conn:
+            conn.close()
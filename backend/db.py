@@ -20,45 +20,32 @@
 
 
 
-import pyodbc
-from .config import DB_CONFIG
+from . import perf
+from .config import DB_BACKEND, DB_CONFIG, SQLITE_DB_PATH
+from .storage import create_storage
+
+_storage = None
+
+
+def get_storage():
+    """คืน storage backend ที่ใช้งานอยู่ (เลือกตาม DB_BACKEND ใน config)"""
+    global _storage
+    if _storage is None:
+        _storage = create_storage(DB_BACKEND, DB_CONFIG, SQLITE_DB_PATH)
+    return _storage
+
+
+def set_storage(storage):
+    """เปลี่ยน storage backend ขณะทำงาน (เช่น benchmark ที่ใช้ฐานข้อมูลจำลอง)"""
+    global _storage
+    _storage = storage
 
-# รายการไดรเวอร์ที่อาจมีในระบบต่างๆ
-POSSIBLE_DRIVERS = [
-    "ODBC Driver 18 for SQL Server", 
-    "ODBC Driver 17 for SQL Server",
-    "ODBC Driver 13 for SQL Server",
-    "SQL Server Native Client 11.0",
-    "SQL Server"
-]
 
 def get_connection():
-    """เชื่อมต่อกับฐานข้อมูลโดยลองหลายไดรเวอร์"""
-    host = DB_CONFIG['host']
-    port = DB_CONFIG['port']
-    database = DB_CONFIG['database']
-    username = DB_CONFIG['username']
-    password = DB_CONFIG['password']
-    
-    # ลองใช้ไดรเวอร์ทีละตัวจนกว่าจะเชื่อมต่อได้
-    for driver in POSSIBLE_DRIVERS:
-        try:
-            conn_str = (
-                f"DRIVER={{{driver}}};"
-                f"SERVER={host},{port};"
-                f"DATABASE={database};"
-                f"UID={username};"
-                f"PWD={password};"
-                f"Connection Timeout=5;"
-            )
-            # print(f"Trying to connect with driver: {driver}")
-            conn = pyodbc.connect(conn_str)
-            # print(f"Successfully connected with driver: {driver}")
-            return conn
-        except pyodbc.Error as e:
-            # print(f"Failed to connect with driver {driver}: {e}")
-            continue
-    
-    # ถ้าไม่สามารถเชื่อมต่อได้ด้วยไดรเวอร์ใดๆ
-    # print("All connection attempts failed")
-    return None
+    """เชื่อมต่อกับฐานข้อมูลตาม storage backend ที่เลือกไว้ คืน None ถ้าเชื่อมต่อไม่ได้"""
+    storage = get_storage()
+    with perf.span("db.connect", backend=storage.name) as connect_span:
+        conn = storage.connect()
+        connect_span.set(ok=conn is not None)
+    perf.count("db.connect.ok" if conn is not None else "db.connect.failed")
+    return conn
@@ -0,0 +1,183 @@
+"""
+บันทึกการแก้ไขที่ยังไม่ได้บันทึกลงไฟล์บนเครื่อง (write-ahead journal) เพื่อกู้คืนหลังโปรแกรมปิดผิดปกติ
+
+หนึ่งไฟล์ JSON lines ต่อผู้ใช้ ใน <app data>/journal:
+    {"type": "area", "names": [...], "codes": {...}, "started": "..."}     บรรทัดแรกของ segment
+    {"type": "edit", "pk": [...], "field": "...", "value": "...", "row_version": "..."}
+value เป็น null เมื่อช่องถูกแก้กลับเป็นค่าเดิม (ยกเลิกรายการก่อนหน้าของช่องเดียวกัน)
+
+ทุกรายการถูกเขียนต่อท้ายและ flush ทันที (รอดเมื่อโปรแกรม crash) ส่วน fsync (รอดเมื่อเครื่องดับ)
+ทำเป็นชุดโดยผู้เรียก sync เป็นระยะ จึงไม่เพิ่มเวลาต่อการแก้หนึ่งช่อง
+เมื่อบันทึกสำเร็จ / ยกเลิกการแก้ไข / ค้นหาพื้นที่ใหม่ segment เดิมจะถูกตัดทิ้ง (truncate)
+ส่วน segment ที่ค้างจาก session ก่อน (ยังไม่ได้กู้คืนหรือปฏิเสธ) จะไม่ถูกลบหรือเขียนทับ:
+ผู้เรียกต้องกู้คืน (start แบบ replace_unrecovered) หรือ dismiss เอง ไม่เช่นนั้น start
+จะย้ายไปเก็บเป็น <hash>.unrecovered.jsonl
+บรรทัดสุดท้ายที่เขียนไม่ครบ (crash ระหว่างเขียน) จะถูกข้ามตอนอ่าน
+"""
+import datetime
+import hashlib
+import json
+import os
+
+from . import perf
+from .app_paths import get_app_data_dir
+
+JOURNAL_DIR = "journal"
+
+# ผู้เรียก fsync เป็นชุดทุกกี่มิลลิวินาทีหลังการแก้ไขล่าสุด (เครื่องดับจะเสียไม่เกินช่วงนี้)
+SYNC_INTERVAL_MS = 1000
+
+
+def journal_path(user_key, directory=None):
+    """ไฟล์ journal ของผู้ใช้ (ชื่อไฟล์เป็น hash ของ username จึงไม่มีอักขระต้องห้าม)"""
+    digest = hashlib.sha1(str(user_key).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directory or get_app_data_dir(JOURNAL_DIR), f"{digest}.jsonl")
+
+
+def journal_value(value):
+    """ค่าที่เขียนเป็น JSON ได้ (row_version ของ SQL Server เป็น bytes) ใช้เทียบกับค่าที่อ่านจาก journal"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).hex()
+    return str(value)
+
+
+class EditJournal:
+    """journal ของผู้ใช้หนึ่งคน ใช้จาก GUI thread เท่านั้น"""
+
+    def __init__(self, user_key, directory=None):
+        self.path = journal_path(user_key, directory)
+        self._file = None
+        self._header = None
+        self._header_written = False
+        self._dirty = False
+
+    def has_unrecovered(self):
+        """มี segment ที่ค้างจาก session ก่อน (ไม่ได้เขียนโดย object นี้) หรือไม่"""
+        return not self._header_written and os.path.exists(self.path)
+
+    def start(self, area_names, codes, replace_unrecovered=False):
+        """
+        เริ่ม segment ใหม่ของพื้นที่ที่ค้นหา (ตัด segment เดิมของเราเอง) บรรทัดแรกเขียนเมื่อมีการแก้ไขครั้งแรก
+        segment ที่ค้างจาก session ก่อนถูกย้ายไปเก็บด้วย set_aside (คืน path ใหม่ ไม่เช่นนั้นคืน None)
+        ยกเว้น replace_unrecovered (กำลังกู้คืน) ซึ่งเก็บไว้จนกว่าการแก้ไขแรกของ segment ใหม่จะเขียนทับ
+        """
+        set_aside_path = None
+        if self.has_unrecovered():
+            self.close()
+            if not replace_unrecovered:
+                set_aside_path = self.set_aside()
+        else:
+            self.truncate()
+        self._header_written = False
+        self._header = {
+            "type": "area",
+            "names": list(area_names),
+            "codes": dict(codes),
+            "started": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        return set_aside_path
+
+    def record(self, pk_values, field, value, row_version=None):
+        """ต่อท้ายการแก้หนึ่งช่อง (value None = กลับเป็นค่าเดิม) แล้ว flush ไปยัง OS"""
+        if self._header is None:
+            return
+        entry = {
+            "type": "edit",
+            "pk": [journal_value(pk) for pk in pk_values],
+            "field": field,
+            "value": value,
+            "row_version": journal_value(row_version),
+        }
+        if self._file is None:
+            # segment ใหม่: เขียนทับไฟล์เดิม (ถ้ามี) ด้วยบรรทัด area ไม่เช่นนั้นต่อท้าย segment เดิม
+            mode = "a" if self._header_written else "w"
+            self._file = open(self.path, mode, encoding="utf-8", newline="\n")
+            if not self._header_written:
+                self._write(self._header)
+                self._header_written = True
+        self._write(entry)
+        self._file.flush()
+        self._dirty = True
+        perf.count("journal.records")
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+        self._file.write("\n")
+
+    def sync(self):
+        """fsync รายการที่เขียนตั้งแต่ครั้งก่อน (เรียกเป็นระยะ ไม่ใช่ทุกรายการ)"""
+        if self._file is None or not self._dirty:
+            return
+        with perf.span("journal.sync"):
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._dirty = False
+
+    def truncate(self):
+        """
+        ตัด segment ปัจจุบันทิ้ง (การแก้ไขถูกบันทึกหรือยกเลิกแล้ว) พื้นที่เดิมยังใช้ต่อได้
+        segment ที่ค้างจาก session ก่อนไม่ถูกลบ (ใช้ dismiss)
+        """
+        self.close()
+        if self._header_written:
+            self._header_written = False
+            self._remove()
+
+    def dismiss(self):
+        """ผู้ใช้เลือกไม่กู้คืน: ลบ segment ที่ค้างจาก session ก่อน"""
+        self.close()
+        self._header_written = False
+        self._remove()
+
+    def set_aside(self):
+        """ย้าย segment ที่ค้างไปเป็น <hash>.unrecovered.jsonl (ไม่ทับไฟล์เดิม) คืน path ใหม่"""
+        base = self.path[: -len(".jsonl")]
+        target = f"{base}.unrecovered.jsonl"
+        if os.path.exists(target):
+            target = f"{base}.unrecovered-{datetime.datetime.now():%Y%m%d-%H%M%S}.jsonl"
+        os.replace(self.path, target)
+        return target
+
+    def _remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """ปิดไฟล์โดยไม่ลบ (เช่น ออกจากระบบ) ไฟล์ที่เหลือจะถูกเสนอให้กู้คืนตอนเข้าใช้ครั้งถัดไป"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def load(self):
+        """
+        อ่าน segment ที่ค้างอยู่ คืน (header, edits) หรือ (None, []) ถ้าไม่มี
+        edits เป็นรายการล่าสุดของแต่ละช่อง (ตัดช่องที่แก้กลับเป็นค่าเดิมแล้ว) ตามลำดับที่แก้
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None, []
+
+        header = None
+        latest = {}
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # บรรทัดที่เขียนไม่ครบตอน crash
+                continue
+            if entry.get("type") == "area":
+                header = entry
+                latest.clear()
+            elif entry.get("type") == "edit" and header is not None:
+                key = (tuple(entry["pk"]), entry["field"])
+                latest.pop(key, None)
+                if entry["value"] is not None:
+                    latest[key] = entry
+        return header, list(latest.values())
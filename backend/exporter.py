@@ -0,0 +1,193 @@
+"""
+ส่งออกผลการค้นหาเป็นไฟล์ xlsx / csv / parquet แบบทยอยเขียนทีละชุด (ใช้หน่วยความจำคงที่)
+
+แหล่งข้อมูลเป็น iterable ของชุดแถว (list ของ dict ตามชื่อฟิลด์) จึงใช้ได้ทั้ง
+- แถวที่แสดงอยู่ในหน้าจอ (iter_row_batches)
+- cursor ของฐานข้อมูลโดยตรงผ่าน stream_search_r_alldata (export_search_results)
+  ซึ่งไม่ต้องโหลดผลลัพธ์ทั้งจังหวัดไว้ในหน่วยความจำ
+
+xlsx ใช้ openpyxl แบบ write-only ส่วน parquet ต้องติดตั้ง pyarrow เพิ่ม
+เขียนลงไฟล์ชั่วคราวก่อนแล้วค่อยเปลี่ยนชื่อ ถ้ายกเลิกหรือผิดพลาดจะไม่เหลือไฟล์ครึ่งๆ กลางๆ
+"""
+import csv
+import datetime
+import os
+
+from . import perf
+from .alldata_operations import stream_search_r_alldata
+
+EXPORT_FORMATS = {
+    "xlsx": "Excel (*.xlsx)",
+    "csv": "CSV (*.csv)",
+    "parquet": "Parquet (*.parquet)",
+}
+
+DEFAULT_BATCH_SIZE = 2000
+
+# จำนวนแถวข้อมูลสูงสุดต่อ sheet ของ Excel (ไม่รวมหัวตาราง)
+XLSX_MAX_ROWS_PER_SHEET = 1_048_575
+XLSX_SHEET_TITLE = "r_alldata_edit"
+
+
+class ExportCancelled(Exception):
+    """ผู้ใช้ยกเลิกการส่งออกระหว่างทาง"""
+
+
+def format_from_path(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: .{extension}")
+    return extension
+
+
+def iter_row_batches(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """แบ่ง list ของแถว (dict) ที่อยู่ในหน่วยความจำแล้วเป็นชุดๆ"""
+    for start in range(0, len(rows), batch_size):
+        yield rows[start : start + batch_size]
+
+
+def _cell_value(value):
+    return "" if value is None else value
+
+
+class _CsvWriter:
+    def __init__(self, path, headers):
+        # utf-8-sig ให้ Excel เปิดภาษาไทยได้ถูกต้อง
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(headers)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path, headers):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.headers = headers
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._sheet_rows = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        index = len(self._workbook.worksheets)
+        title = XLSX_SHEET_TITLE if index == 0 else f"{XLSX_SHEET_TITLE}_{index + 1}"
+        self._sheet = self._workbook.create_sheet(title)
+        self._sheet.append(self.headers)
+        self._sheet_rows = 0
+
+    def write(self, rows):
+        for row in rows:
+            if self._sheet_rows >= XLSX_MAX_ROWS_PER_SHEET:
+                self._new_sheet()
+            self._sheet.append(row)
+            self._sheet_rows += 1
+
+    def close(self):
+        self._workbook.save(self.path)
+
+
+class _ParquetWriter:
+    def __init__(self, path, headers):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("การส่งออกเป็น Parquet ต้องติดตั้ง pyarrow") from None
+
+        self._pa = pa
+        self.headers = headers
+        # ทุกคอลัมน์เป็นข้อความ เหมือนที่แสดงในตาราง (รหัสบางฟิลด์มีเลข 0 นำหน้า)
+        self._schema = pa.schema([(header, pa.string()) for header in headers])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        columns = [
+            [None if value == "" else str(value) for value in column]
+            for column in zip(*rows)
+        ] or [[] for _ in self.headers]
+        self._writer.write_table(
+            self._pa.Table.from_arrays(columns, schema=self._schema)
+        )
+
+    def close(self):
+        self._writer.close()
+
+
+_WRITERS = {"csv": _CsvWriter, "xlsx": _XlsxWriter, "parquet": _ParquetWriter}
+
+
+def export_rows(batches, fields, headers, path, file_format=None, progress=None):
+    """
+    เขียนแถวจาก batches (iterable ของ list ของ dict) ลงไฟล์ path
+    fields   ฟิลด์ที่ส่งออกตามลำดับ   headers  หัวคอลัมน์ (เช่นชื่อจาก ColumnMapper)
+    progress ฟังก์ชัน progress(จำนวนแถวที่เขียนแล้ว) ถ้าคืน False จะยกเลิก (ExportCancelled)
+    คืนจำนวนแถวที่เขียน
+    """
+    file_format = file_format or format_from_path(path)
+    temp_path = f"{path}.part"
+    written = 0
+    with perf.span("export", format=file_format) as export_span:
+        writer = _WRITERS[file_format](temp_path, list(headers))
+        try:
+            for batch in batches:
+                writer.write(
+                    [[_cell_value(row.get(field)) for field in fields] for row in batch]
+                )
+                written += len(batch)
+                if progress is not None and progress(written) is False:
+                    raise ExportCancelled()
+            writer.close()
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                writer.close()
+            except Exception:
+                pass
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        export_span.set(rows=written)
+    perf.count("export.rows", written)
+    return written
+
+
+def _dict_batches(search_batches):
+    for db_column_names, rows in search_batches:
+        yield [dict(zip(db_column_names, row)) for row in rows]
+
+
+def export_search_results(
+    codes,
+    all_db_fields_r_alldata,
+    path,
+    fields,
+    headers,
+    file_format=None,
+    row_filter=None,
+    progress=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+):
+    """
+    ค้นหาตาม codes แล้วส่งออกโดยอ่านจาก cursor ทีละ batch_size แถว
+    row_filter ฟังก์ชัน row_filter(dict) -> bool สำหรับคัดเฉพาะบางแถว (เช่นฟิลเตอร์ของตาราง)
+    """
+    batches = _dict_batches(
+        stream_search_r_alldata(codes, all_db_fields_r_alldata, batch_size)
+    )
+    if row_filter is not None:
+        batches = ([row for row in batch if row_filter(row)] for batch in batches)
+    return export_rows(batches, fields, headers, path, file_format, progress)
+
+
+def default_export_name(codes, file_format):
+    """ชื่อไฟล์เริ่มต้น เช่น r_alldata_10_20250101_0930.xlsx"""
+    area = "_".join(str(code) for code in codes.values() if code is not None)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+    return f"r_alldata_{area or 'all'}_{timestamp}.{file_format}"
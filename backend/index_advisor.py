@@ -0,0 +1,270 @@
+"""
+ตรวจ index ของ r_alldata_edit เทียบกับรูปแบบการเข้าถึงของโปรแกรม และสร้าง DDL ที่แนะนำ
+
+รูปแบบการเข้าถึงของโปรแกรมมีแค่สามแบบและตายตัว:
+- ค้นหา: เงื่อนไขเท่ากับบนรหัสพื้นที่แบบไล่ลำดับ (ภาค / +จังหวัด / +อำเภอ / +ตำบล)
+  แล้ว ORDER BY ชื่อพื้นที่ทั้งสี่ระดับ (ดู EditDataScreen.get_selected_codes)
+- บันทึก: UPDATE ทีละแถวด้วย LOGICAL_PK_FIELDS ทั้งสี่ฟิลด์
+- change feed: time_edit > เวลาที่เห็นล่าสุด (ดู fetch_changed_r_alldata) ทุกช่วงเวลาสั้นๆ
+
+ใช้งาน (อ่าน index จากฐานข้อมูลที่ตั้งค่าไว้ใน config แล้วพิมพ์รายงานและ DDL):
+    python -m backend.index_advisor --output r_alldata_edit_indexes.sql
+
+ผลของ DDL ที่แนะนำบนฐานข้อมูลจำลอง (ก่อน/หลัง) วัดได้ด้วย
+    python -m benchmarks.index_check
+"""
+import argparse
+import sys
+
+from .alldata_operations import LOGICAL_PK_FIELDS, get_r_alldata_fields
+from .db import get_connection, get_storage
+
+TABLE = "r_alldata_edit"
+
+AREA_CODE_FIELDS = ["RegCode", "ProvCode", "DistCode", "SubDistCode"]
+AREA_NAME_FIELDS = ["RegName", "ProvName", "DistName", "SubDistName"]
+
+# แต่ละรูปแบบ: lookups คือชุดคอลัมน์ที่มีเงื่อนไขเท่ากับ (ต้องเป็นคอลัมน์แรกๆ ของ index)
+# order คือลำดับผลลัพธ์ที่ต้องการ (ใช้ index แทนการ sort ได้ถ้าต่อท้าย lookup ใน key)
+ACCESS_PATTERNS = [
+    {
+        "name": "search",
+        "lookups": [AREA_CODE_FIELDS[:level] for level in range(1, 5)],
+        "order": AREA_NAME_FIELDS,
+    },
+    {
+        "name": "save",
+        "lookups": [LOGICAL_PK_FIELDS],
+        "order": [],
+    },
+    {
+        "name": "changes",
+        "lookups": [["time_edit"]],
+        "order": [],
+    },
+]
+
+AREA_INDEX_NAME = f"IX_{TABLE}_area"
+PK_INDEX_NAME = f"UX_{TABLE}_pk"
+TIME_EDIT_INDEX_NAME = f"IX_{TABLE}_time_edit"
+
+
+def _serves_lookup(index, lookup):
+    """index ใช้ seek ได้ถ้าคอลัมน์แรกๆ ของ key คือคอลัมน์ใน lookup ทั้งหมด (ลำดับใดก็ได้)"""
+    key_prefix = index["columns"][: len(lookup)]
+    return len(key_prefix) == len(lookup) and set(key_prefix) == set(lookup)
+
+
+def _serves_order(index, lookup, order):
+    if not order:
+        return True
+    return index["columns"][len(lookup) : len(lookup) + len(order)] == list(order)
+
+
+def analyze(indexes, patterns=ACCESS_PATTERNS):
+    """
+    เทียบ index ที่มีกับรูปแบบการเข้าถึง คืน list ของ dict ต่อ lookup:
+    pattern, columns, index (ชื่อ index ที่ใช้ seek ได้ หรือ None = สแกนทั้งตาราง),
+    sorted (ได้ลำดับตาม ORDER BY จาก index โดยไม่ต้อง sort)
+    """
+    findings = []
+    for pattern in patterns:
+        for lookup in pattern["lookups"]:
+            candidates = [index for index in indexes if _serves_lookup(index, lookup)]
+            ordered = [
+                index
+                for index in candidates
+                if _serves_order(index, lookup, pattern["order"])
+            ]
+            best = (ordered or candidates or [None])[0]
+            findings.append(
+                {
+                    "pattern": pattern["name"],
+                    "columns": list(lookup),
+                    "index": best["name"] if best else None,
+                    "sorted": bool(ordered),
+                }
+            )
+    return findings
+
+
+def recommend(indexes, storage_name, select_fields=None):
+    """
+    index ที่ควรเพิ่ม คืน list ของ dict: name, columns, include, unique, clustered, reason
+    - ค้นหา: key = รหัสพื้นที่ + ชื่อพื้นที่ (ระดับตำบลได้ลำดับจาก index โดยไม่ต้อง sort)
+      บน SQL Server ถ้าตารางยังเป็น heap ให้เป็น clustered index (covering โดยปริยาย)
+      ถ้ามี clustered index อยู่แล้ว ให้ INCLUDE คอลัมน์ที่ SELECT ทั้งหมดเพื่อไม่ต้อง key lookup
+    - บันทึก: unique index บน LOGICAL_PK_FIELDS
+    - change feed: index บน time_edit (seek เฉพาะแถวที่เพิ่งถูกแก้ แทนการสแกนทั้งพื้นที่)
+    """
+    findings = analyze(indexes)
+    recommendations = []
+
+    search_unserved = [
+        f for f in findings if f["pattern"] == "search" and f["index"] is None
+    ]
+    if search_unserved:
+        has_clustered = any(index["clustered"] for index in indexes)
+        clustered = storage_name == "sqlserver" and not has_clustered
+        key = AREA_CODE_FIELDS + AREA_NAME_FIELDS
+        include = []
+        if storage_name == "sqlserver" and not clustered and select_fields:
+            # key ของ clustered index อยู่ในทุก nonclustered index อยู่แล้ว
+            clustered_key = [
+                col for index in indexes if index["clustered"] for col in index["columns"]
+            ]
+            include = [
+                field
+                for field in list(select_fields) + ["fullname", "time_edit"]
+                if field not in key and field not in clustered_key
+            ]
+        recommendations.append(
+            {
+                "name": AREA_INDEX_NAME,
+                "columns": key,
+                "include": include,
+                "unique": False,
+                "clustered": clustered,
+                "reason": "search scans the table for: "
+                + "; ".join(" + ".join(f["columns"]) for f in search_unserved),
+            }
+        )
+
+    save_unserved = [
+        f for f in findings if f["pattern"] == "save" and f["index"] is None
+    ]
+    if save_unserved:
+        recommendations.append(
+            {
+                "name": PK_INDEX_NAME,
+                "columns": list(LOGICAL_PK_FIELDS),
+                "include": [],
+                "unique": True,
+                "clustered": False,
+                "reason": "every saved row scans the table to find "
+                + " + ".join(LOGICAL_PK_FIELDS),
+            }
+        )
+
+    changes_unserved = [
+        f for f in findings if f["pattern"] == "changes" and f["index"] is None
+    ]
+    if changes_unserved:
+        recommendations.append(
+            {
+                "name": TIME_EDIT_INDEX_NAME,
+                "columns": ["time_edit"],
+                "include": [],
+                "unique": False,
+                "clustered": False,
+                "reason": "every change-feed poll scans the area for time_edit > last seen",
+            }
+        )
+    return recommendations
+
+
+def ddl_statements(storage, recommendations, table=TABLE):
+    return [
+        storage.create_index_sql(
+            table,
+            rec["name"],
+            rec["columns"],
+            unique=rec["unique"],
+            clustered=rec["clustered"],
+            include=rec["include"],
+        )
+        for rec in recommendations
+    ]
+
+
+def inspect_database(storage=None, table=TABLE):
+    """อ่าน index จากฐานข้อมูลปัจจุบัน คืน (indexes, findings, recommendations, ddl)"""
+    storage = storage or get_storage()
+    conn = get_connection()
+    if conn is None:
+        raise RuntimeError("Cannot connect to the database.")
+    try:
+        indexes = storage.list_indexes(conn, table)
+    finally:
+        conn.close()
+    select_fields = get_r_alldata_fields()
+    recommendations = recommend(indexes, storage.name, select_fields)
+    return (
+        indexes,
+        analyze(indexes),
+        recommendations,
+        ddl_statements(storage, recommendations, table),
+    )
+
+
+def format_report(indexes, findings, recommendations, ddl, storage_name):
+    lines = [f"-- index advisor for {TABLE} ({storage_name})", "--"]
+    lines.append("-- existing indexes:")
+    for index in indexes or []:
+        flags = ", ".join(
+            flag for flag in ("clustered", "unique") if index[flag]
+        )
+        lines.append(
+            f"--   {index['name']}: ({', '.join(index['columns'])})"
+            + (f" INCLUDE {len(index['include'])} columns" if index["include"] else "")
+            + (f" [{flags}]" if flags else "")
+        )
+    if not indexes:
+        lines.append("--   (none)")
+    lines.append("--")
+    lines.append("-- access patterns:")
+    for finding in findings:
+        status = finding["index"] or "TABLE SCAN"
+        if not finding["sorted"] and finding["pattern"] == "search":
+            status += " + sort"
+        columns = " + ".join(finding["columns"])
+        lines.append(f"--   {finding['pattern']:<7} {columns:<45} -> {status}")
+    lines.append("--")
+    if not recommendations:
+        lines.append("-- existing indexes already serve every access pattern")
+        return "\n".join(lines) + "\n"
+
+    lines.append("-- recommended:")
+    for rec, statement in zip(recommendations, ddl):
+        lines.append(f"-- {rec['name']}: {rec['reason']}")
+        if rec["include"]:
+            lines.append(
+                "-- (covering: includes every selected column, roughly doubles the"
+                " table's storage; drop the INCLUDE to trade size for key lookups)"
+            )
+        if rec["unique"]:
+            lines.append(
+                "-- (fails if duplicate keys exist; check first with SELECT "
+                + ", ".join(rec["columns"])
+                + f", COUNT(*) FROM {TABLE} GROUP BY "
+                + ", ".join(rec["columns"])
+                + " HAVING COUNT(*) > 1)"
+            )
+        lines.append(statement + ";")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=f"Inspect {TABLE} indexes and print recommended DDL"
+    )
+    parser.add_argument("--output", help="write the report/DDL to this .sql file")
+    args = parser.parse_args(argv)
+
+    storage = get_storage()
+    try:
+        indexes, findings, recommendations, ddl = inspect_database(storage)
+    except (RuntimeError, storage.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    report = format_report(indexes, findings, recommendations, ddl, storage.name)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report, end="")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,43 @@
-import pandas as pd
 import os
+import threading
 from frontend.utils.resource_path import resource_path
+from .area_search import AreaSearchIndex
+from .asset_cache import read_excel_cached
+
+# ลำดับชั้นของพื้นที่: (คอลัมน์รหัส, คอลัมน์ชื่อ)
+LOCATION_LEVELS = [
+    ("RegCode", "RegName"),
+    ("ProvCode", "ProvName"),
+    ("DistCode", "DistName"),
+    ("SubDistCode", "SubDistName"),
+]
+
+
+class LocationNode:
+    """โหนดหนึ่งใน hierarchy ภาค -> จังหวัด -> อำเภอ -> ตำบล"""
+
+    __slots__ = ("name", "code", "children", "child_names")
+
+    def __init__(self, name=None, code=None):
+        self.name = name
+        self.code = code
+        self.children = {}  # ชื่อ -> LocationNode
+        self.child_names = []  # ชื่อลูกที่เรียงไว้แล้ว สำหรับใส่ combo box
+
 
 class LocationData:
     _instance = None
     _data = None
+    _root = None
     
+    # ป้องกันการสร้างซ้อนกันระหว่าง warm-up thread กับ GUI thread
+    _lock = threading.Lock()
+
     @classmethod
     def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = LocationData()
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = LocationData()
         return cls._instance
     
     def __init__(self):
@@ -17,6 +45,8 @@ class LocationData:
             raise Exception("This class is a singleton!")
         else:
             LocationData._instance = self
+            self._merged_child_names = {}
+            self._search_index = None
             self.load_data()
     
     def load_data(self):
@@ -24,79 +54,183 @@ class LocationData:
             excel_path = resource_path(os.path.join("assets", "reg_prov_dist_subdist.xlsx"))
             
             # Load the Excel file
-            LocationData._data = pd.read_excel(excel_path, sheet_name="Area_code")
+            LocationData._data = read_excel_cached(excel_path, sheet_name="Area_code")
+            LocationData._root = self._build_index(LocationData._data)
+            self._merged_child_names = {}
+            self._search_index = None
             return True
         except Exception as e:
             # print(f"Error loading location data: {str(e)}")
             return False
-    
+
+    @staticmethod
+    def _build_index(data):
+        """
+        สร้าง index ซ้อนกัน ภาค -> จังหวัด -> อำเภอ -> ตำบล ครั้งเดียวตอนโหลด
+        รหัสของแต่ละชื่อใช้แถวแรกที่พบในไฟล์ (เหมือนการกรองแล้วใช้ iloc[0] แบบเดิม)
+        """
+        root = LocationNode()
+        columns = [column for level in LOCATION_LEVELS for column in level]
+        for row in data[columns].itertuples(index=False):
+            node = root
+            for level_idx in range(len(LOCATION_LEVELS)):
+                code, name = row[level_idx * 2], row[level_idx * 2 + 1]
+                child = node.children.get(name)
+                if child is None:
+                    child = LocationNode(name, int(code))
+                    node.children[name] = child
+                node = child
+
+        def sort_children(node):
+            node.child_names = sorted(node.children)
+            for child in node.children.values():
+                sort_children(child)
+
+        sort_children(root)
+        return root
+
     def get_data(self):
         return LocationData._data
-    
-    def get_regions(self):
-        if LocationData._data is None:
+
+    def has_data(self):
+        return LocationData._root is not None and bool(LocationData._root.children)
+
+    def get_node(self, *names):
+        """คืนโหนดตามเส้นทางชื่อ เช่น get_node(ภาค, จังหวัด) หรือ None ถ้าไม่พบ"""
+        node = LocationData._root
+        for name in names:
+            if node is None:
+                return None
+            node = node.children.get(name)
+        return node
+
+    def _matching_nodes(self, *names):
+        """คืนทุกโหนดในระดับ len(names) ที่ตรงกับชื่อที่ระบุ (ชื่อว่าง = ไม่กรองระดับนั้น)"""
+        nodes = [LocationData._root]
+        for name in names:
+            next_nodes = []
+            for node in nodes:
+                if name:
+                    child = node.children.get(name)
+                    if child is not None:
+                        next_nodes.append(child)
+                else:
+                    next_nodes.extend(node.children.values())
+            nodes = next_nodes
+        return nodes
+
+    def _child_names(self, *names):
+        if LocationData._root is None:
             return []
-        return sorted(LocationData._data["RegName"].unique())
+
+        if all(names):
+            node = self.get_node(*names)
+            return list(node.child_names) if node is not None else []
+
+        # กรณีไม่ได้ระบุบางระดับ ต้องรวมชื่อจากหลายโหนด จำผลไว้เพราะใช้ซ้ำได้
+        if names not in self._merged_child_names:
+            self._merged_child_names[names] = sorted(
+                {
+                    child_name
+                    for node in self._matching_nodes(*names)
+                    for child_name in node.children
+                }
+            )
+        return list(self._merged_child_names[names])
+
+    def get_search_index(self):
+        """ดัชนีค้นหาพื้นที่แบบพิมพ์บางส่วน สร้างครั้งแรกที่เรียกใช้ (ปกติตอน warm-up)"""
+        with LocationData._lock:
+            if self._search_index is None and LocationData._root is not None:
+                self._search_index = AreaSearchIndex(LocationData._root)
+        return self._search_index
+
+    def search_areas(self, query, limit=20):
+        """ค้นหาพื้นที่ทุกระดับจากชื่อบางส่วนหรือรหัส คืนรายการ AreaEntry ที่เรียงแล้ว"""
+        search_index = self.get_search_index()
+        if search_index is None:
+            return []
+        return search_index.search(query, limit)
+
+    def iter_areas(self, depth):
+        """
+        ไล่ทุกพื้นที่ในระดับ depth (1 = ภาค ... 4 = ตำบล) ตามลำดับชื่อ
+        คืน (ชื่อตามลำดับชั้น, รหัสทั้ง 4 ระดับแบบเดียวกับ get_codes)
+        """
+        def walk(node, names, codes):
+            if len(names) == depth:
+                yield tuple(names), dict(codes)
+                return
+            code_field = LOCATION_LEVELS[len(names)][0]
+            for child_name in node.child_names:
+                child = node.children[child_name]
+                codes[code_field] = child.code
+                yield from walk(child, names + [child_name], codes)
+            codes[code_field] = None
+
+        if LocationData._root is None:
+            return
+        yield from walk(
+            LocationData._root, [], {code_field: None for code_field, _ in LOCATION_LEVELS}
+        )
+
+    def get_regions(self):
+        return self._child_names()
     
     def get_provinces(self, region_name=None):
-        if LocationData._data is None:
-            return []
-            
-        if region_name:
-            filtered = LocationData._data[LocationData._data["RegName"] == region_name]
-            return sorted(filtered["ProvName"].unique())
-        else:
-            return sorted(LocationData._data["ProvName"].unique())
+        return self._child_names(region_name)
     
     def get_districts(self, region_name=None, province_name=None):
-        if LocationData._data is None:
-            return []
-            
-        filtered = LocationData._data
-        if region_name:
-            filtered = filtered[filtered["RegName"] == region_name]
-        if province_name:
-            filtered = filtered[filtered["ProvName"] == province_name]
-            
-        return sorted(filtered["DistName"].unique())
+        return self._child_names(region_name, province_name)
     
     def get_subdistricts(self, region_name=None, province_name=None, district_name=None):
-        if LocationData._data is None:
-            return []
-            
-        filtered = LocationData._data
-        if region_name:
-            filtered = filtered[filtered["RegName"] == region_name]
-        if province_name:
-            filtered = filtered[filtered["ProvName"] == province_name]
-        if district_name:
-            filtered = filtered[filtered["DistName"] == district_name]
-            
-        return sorted(filtered["SubDistName"].unique())
+        return self._child_names(region_name, province_name, district_name)
+
+    def get_codes(
+        self,
+        region_name=None,
+        province_name=None,
+        district_name=None,
+        subdistrict_name=None,
+    ):
+        """
+        แปลงชื่อพื้นที่ที่เลือกเป็นรหัสทั้ง 4 ระดับ โดยไล่จากภาคลงไป
+        ระดับที่ไม่ได้เลือกหรือหาไม่พบ (และระดับที่ลึกกว่านั้น) จะเป็น None
+        """
+        codes = {code_field: None for code_field, _ in LOCATION_LEVELS}
+        node = LocationData._root
+        names = [region_name, province_name, district_name, subdistrict_name]
+        for (code_field, _), name in zip(LOCATION_LEVELS, names):
+            if node is None or not name:
+                break
+            node = node.children.get(name)
+            if node is not None:
+                codes[code_field] = node.code
+        return codes
     
     def get_code(self, name_type, name, region_name=None, province_name=None, district_name=None):
-        if LocationData._data is None:
+        if LocationData._root is None:
             return None
-            
-        filtered = LocationData._data
-        if region_name and name_type != "RegCode":
-            filtered = filtered[filtered["RegName"] == region_name]
-        if province_name and name_type != "ProvCode":
-            filtered = filtered[filtered["ProvName"] == province_name]
-        if district_name and name_type != "DistCode":
-            filtered = filtered[filtered["DistName"] == district_name]
-            
-        name_to_code = {
-            "RegCode": ("RegName", name),
-            "ProvCode": ("ProvName", name),
-            "DistCode": ("DistName", name),
-            "SubDistCode": ("SubDistName", name)
-        }
-        
-        if name_type in name_to_code:
-            name_field, value = name_to_code[name_type]
-            result = filtered[filtered[name_field] == value]
-            if not result.empty:
-                return result[name_type].iloc[0]
+
+        level_names = [field for field, _ in LOCATION_LEVELS]
+        if name_type not in level_names:
+            return None
+        level = level_names.index(name_type)
+
+        parent_names = [region_name, province_name, district_name][:level]
+        deeper_names = [region_name, province_name, district_name][level + 1:]
+
+        for node in self._matching_nodes(*parent_names, name):
+            # ชื่อระดับที่ลึกกว่าที่ส่งมาด้วยใช้เป็นเงื่อนไขกรองเพิ่ม (เหมือนพฤติกรรมเดิม)
+            candidates = [node]
+            for deeper_name in deeper_names:
+                candidates = [
+                    child
+                    for candidate in candidates
+                    for child_name, child in candidate.children.items()
+                    if not deeper_name or child_name == deeper_name
+                ]
+            if candidates:
+                return node.code
                 
         return None
@@ -0,0 +1,373 @@
+"""
+เขียนตัวชี้วัดการใช้งานเป็นไฟล์ .prom (Prometheus text format) ให้ node-exporter
+textfile collector บนเครื่องผู้ใช้อ่าน โปรแกรมไม่ได้เปิด port หรือ service ใดๆ
+
+เปิดด้วย environment variable:
+    POP_EDIT_METRICS_FILE=C:\\node_exporter\\textfile\\pop_edit.prom
+    POP_EDIT_METRICS_INTERVAL=15   (วินาที ค่าเริ่มต้น 15)
+
+ข้อมูลที่เขียน:
+- ตัวนับสะสมจาก backend.perf.count (ค้นหา แถวที่ดึง บันทึก แถวที่อัปเดต ตรวจสอบไม่ผ่าน
+  การเชื่อมต่อฐานข้อมูลสำเร็จ/ล้มเหลว cache hit/miss UI ค้าง)
+- histogram ของเวลาแต่ละขั้นตอน (จาก span ของ backend.perf)
+- p50/p95 ของเวลาจากรอบล่าสุดของแต่ละขั้นตอน
+
+ไฟล์ถูกเขียนลงไฟล์ชั่วคราวในโฟลเดอร์เดียวกันแล้ว rename ทับ จึงไม่มีการอ่านไฟล์ที่เขียนไม่ครบ
+"""
+import collections
+import math
+import os
+import threading
+
+from . import perf
+
+METRICS_FILE_ENV = "POP_EDIT_METRICS_FILE"
+METRICS_INTERVAL_ENV = "POP_EDIT_METRICS_INTERVAL"
+DEFAULT_INTERVAL_SECONDS = 15
+
+METRIC_PREFIX = "pop_edit"
+
+# ขอบบนของ bucket (วินาที) ครอบคลุมตั้งแต่ query เร็วๆ ถึงการแสดงผลหลักแสนแถว
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# จำนวนรอบล่าสุดต่อขั้นตอนที่ใช้คำนวณ p50/p95
+QUANTILE_WINDOW = 500
+QUANTILES = (0.5, 0.95)
+
+# span ที่ส่งออกเป็น histogram (span อื่น เช่น display.rows ดูได้จาก perf log)
+EXPORTED_SPANS = (
+    "ui.search",
+    "search",
+    "search.execute",
+    "search.fetch",
+    "display",
+    "filter",
+    "validate",
+    "save",
+    "save.execute",
+    "save.commit",
+    "db.connect",
+    "import.apply",
+    "change_feed",
+    "audit.insert",
+    "audit.history",
+    "diff.summary",
+    "diff.page",
+    "diff.revert",
+    "journal.sync",
+)
+
+# ตัวนับใน backend.perf -> (ชื่อ metric, labels, คำอธิบาย)
+COUNTER_METRICS = {
+    "search.requests": ("searches_total", {}, "Searches sent to the database."),
+    "search.rows": ("rows_fetched_total", {}, "Rows fetched by searches."),
+    "save.batches": ("save_batches_total", {}, "Committed save batches."),
+    "save.rows_updated": ("rows_updated_total", {}, "Rows updated by saves."),
+    "change_feed.rows": (
+        "change_feed_rows_total",
+        {},
+        "Rows edited by others pulled by the change feed.",
+    ),
+    "audit.rows": (
+        "audit_rows_total",
+        {},
+        "Field-level audit entries written with saves and imports.",
+    ),
+    "diff.reverted_fields": (
+        "reverted_fields_total",
+        {},
+        "Fields reverted to the original census value.",
+    ),
+    "journal.records": (
+        "journal_records_total",
+        {},
+        "Cell edits appended to the local edit journal.",
+    ),
+    "journal.errors": (
+        "journal_errors_total",
+        {},
+        "Local edit journal write or sync failures (crash recovery unavailable).",
+    ),
+    "save.conflicts": (
+        "save_conflicts_total",
+        {},
+        "Edited rows not saved because another editor changed them first.",
+    ),
+    "validate.failures": (
+        "validation_failures_total",
+        {},
+        "Edited values rejected by validation.",
+    ),
+    "db.connect.ok": (
+        "db_connections_total",
+        {"result": "ok"},
+        "Database connections opened (one per operation, no pool).",
+    ),
+    "db.connect.failed": (
+        "db_connections_total",
+        {"result": "failed"},
+        "Database connections opened (one per operation, no pool).",
+    ),
+    "asset_cache.hit": (
+        "cache_requests_total",
+        {"cache": "asset", "result": "hit"},
+        "Cache lookups.",
+    ),
+    "asset_cache.miss": (
+        "cache_requests_total",
+        {"cache": "asset", "result": "miss"},
+        "Cache lookups.",
+    ),
+    "r_alldata_fields.hit": (
+        "cache_requests_total",
+        {"cache": "r_alldata_fields", "result": "hit"},
+        "Cache lookups.",
+    ),
+    "r_alldata_fields.miss": (
+        "cache_requests_total",
+        {"cache": "r_alldata_fields", "result": "miss"},
+        "Cache lookups.",
+    ),
+    "validation_data.hit": (
+        "cache_requests_total",
+        {"cache": "validation_data", "result": "hit"},
+        "Cache lookups.",
+    ),
+    "validation_data.miss": (
+        "cache_requests_total",
+        {"cache": "validation_data", "result": "miss"},
+        "Cache lookups.",
+    ),
+    "db.slow_query": (
+        "slow_queries_total",
+        {},
+        "Queries slower than POP_EDIT_SLOW_QUERY_MS.",
+    ),
+    "import.rows_updated": (
+        "import_rows_updated_total",
+        {},
+        "Rows updated by correction imports.",
+    ),
+    "import.conflicts": (
+        "import_conflicts_total",
+        {},
+        "Imported rows not applied because another editor changed them after the preview.",
+    ),
+    "ui.stall": ("ui_stalls_total", {}, "GUI event-loop stalls."),
+}
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        escaped = (
+            str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        )
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _quantile(sorted_values, q):
+    """quantile แบบ nearest-rank"""
+    index = min(len(sorted_values), max(1, math.ceil(q * len(sorted_values))))
+    return sorted_values[index - 1]
+
+
+class _Histogram:
+    __slots__ = ("bucket_counts", "count", "sum", "errors", "recent")
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.recent = collections.deque(maxlen=QUANTILE_WINDOW)
+
+    def observe(self, seconds):
+        for index, upper in enumerate(DURATION_BUCKETS):
+            if seconds <= upper:
+                self.bucket_counts[index] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+
+class PrometheusMetricsSink:
+    """sink ของ backend.perf ที่สะสมเวลาของ span เป็น histogram และแปลงเป็น Prometheus text"""
+
+    def __init__(self, spans=EXPORTED_SPANS):
+        self.spans = frozenset(spans)
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def record(self, span):
+        if span.name not in self.spans or span.duration_ms is None:
+            return
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = _Histogram()
+            histogram.observe(span.duration_ms / 1000)
+            if span.error:
+                histogram.errors += 1
+
+    def render(self):
+        """ข้อความทั้งไฟล์ในรูปแบบ Prometheus text exposition format"""
+        lines = []
+        counters = perf.get_counters()
+
+        families = {}
+        for counter_name, (metric, labels, help_text) in COUNTER_METRICS.items():
+            family = families.setdefault(metric, (help_text, []))
+            family[1].append((labels, counters.get(counter_name, 0)))
+        for metric, (help_text, samples) in families.items():
+            name = f"{METRIC_PREFIX}_{metric}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        with self._lock:
+            snapshot = {
+                name: (
+                    list(h.bucket_counts),
+                    h.count,
+                    h.sum,
+                    h.errors,
+                    sorted(h.recent),
+                )
+                for name, h in self._histograms.items()
+            }
+
+        name = f"{METRIC_PREFIX}_operation_duration_seconds"
+        lines.append(f"# HELP {name} Duration of each instrumented operation.")
+        lines.append(f"# TYPE {name} histogram")
+        for operation in sorted(snapshot):
+            bucket_counts, count, total, _, _ = snapshot[operation]
+            cumulative = 0
+            for upper, bucket_count in zip(DURATION_BUCKETS, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    {"operation": operation, "le": _format_value(float(upper))}
+                )
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            labels = _format_labels({"operation": operation, "le": "+Inf"})
+            lines.append(f"{name}_bucket{labels} {count}")
+            labels = _format_labels({"operation": operation})
+            lines.append(f"{name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{name}_count{labels} {count}")
+
+        name = f"{METRIC_PREFIX}_operation_errors_total"
+        lines.append(f"# HELP {name} Instrumented operations that raised an exception.")
+        lines.append(f"# TYPE {name} counter")
+        for operation in sorted(snapshot):
+            labels = _format_labels({"operation": operation})
+            lines.append(f"{name}{labels} {snapshot[operation][3]}")
+
+        name = f"{METRIC_PREFIX}_operation_duration_recent_seconds"
+        lines.append(
+            f"# HELP {name} Quantiles over the last {QUANTILE_WINDOW} runs"
+            " of each operation."
+        )
+        lines.append(f"# TYPE {name} gauge")
+        for operation in sorted(snapshot):
+            recent = snapshot[operation][4]
+            if not recent:
+                continue
+            for q in QUANTILES:
+                labels = _format_labels({"operation": operation, "quantile": str(q)})
+                value = round(_quantile(recent, q), 6)
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+        rss_mb = perf.current_rss_mb()
+        if rss_mb is not None:
+            name = f"{METRIC_PREFIX}_resident_memory_bytes"
+            lines.append(f"# HELP {name} Resident memory of the application process.")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {int(rss_mb * 1024 * 1024)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(path, text):
+    """เขียนไฟล์แบบ atomic (ไฟล์ชั่วคราวในโฟลเดอร์เดียวกัน แล้ว os.replace)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # node-exporter อ่านเฉพาะไฟล์ *.prom จึงไม่อ่านไฟล์ชั่วคราวนี้
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def get_metrics_path():
+    return os.environ.get(METRICS_FILE_ENV) or None
+
+
+def get_interval_seconds():
+    try:
+        interval = float(os.environ.get(METRICS_INTERVAL_ENV, DEFAULT_INTERVAL_SECONDS))
+        return max(1.0, interval)
+    except ValueError:
+        return DEFAULT_INTERVAL_SECONDS
+
+
+class MetricsExporter:
+    """thread ที่เขียนไฟล์ .prom ทุก interval_seconds และเขียนครั้งสุดท้ายตอน stop()"""
+
+    def __init__(self, path, interval_seconds=DEFAULT_INTERVAL_SECONDS, sink=None):
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.sink = sink or PrometheusMetricsSink()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        perf.add_sink(self.sink)
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="MetricsExporter", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.write()
+        perf.remove_sink(self.sink)
+
+    def write(self):
+        try:
+            write_textfile(self.path, self.sink.render())
+            return True
+        except OSError:
+            # การส่งออก metrics ต้องไม่ทำให้งานจริงล้ม
+            return False
+
+    def _run(self):
+        self.write()
+        while not self._stop_event.wait(self.interval_seconds):
+            self.write()
+
+
+def start_from_env():
+    """เริ่ม MetricsExporter ถ้าตั้ง POP_EDIT_METRICS_FILE ไว้ คืน None ถ้าไม่ได้เปิด"""
+    path = get_metrics_path()
+    if not path:
+        return None
+    exporter = MetricsExporter(path, get_interval_seconds())
+    exporter.start()
+    return exporter
@@ -0,0 +1,273 @@
+"""
+เทียบข้อมูลที่แก้ไขแล้ว (r_alldata_edit) กับข้อมูลสำมะโนเดิม (r_alldata) ฝั่งฐานข้อมูล
+
+ทั้งสองตารางใช้ LOGICAL_PK_FIELDS เดียวกัน การเทียบทำใน SQL ด้วย JOIN บน PK
+จึงส่งกลับมาเฉพาะแถวที่มีค่าต่างกัน ไม่ต้องดึงทั้งพื้นที่จากสองตารางมาเทียบในโปรแกรม
+
+1. diff_summary     นับจำนวนแถวที่ต่างกันต่อคอลัมน์ของพื้นที่ (aggregate คำสั่งเดียว)
+2. fetch_diff_page  แถวที่ต่างกันทีละหน้า เรียงตาม PK แบบ keyset (PK > PK สุดท้ายของหน้าก่อน)
+                    เลือกเฉพาะคอลัมน์ที่ diff_summary พบว่าต่างกัน
+3. revert_to_original  คืนค่าเดิมให้ช่องที่เลือกด้วย UPDATE ... FROM ตารางชั่วคราวคำสั่งเดียว
+                    พร้อมประทับ fullname / time_edit และเขียน audit ใน transaction เดียวกัน
+
+การ JOIN ต้องหาแถวใน r_alldata ด้วย PK ถ้า r_alldata ยังไม่มี index บน PK ควรสร้าง
+(แบบเดียวกับ UX_r_alldata_edit_pk ที่ index advisor แนะนำให้ r_alldata_edit)
+"""
+import datetime
+
+from . import audit_log, perf
+from .alldata_operations import (
+    LOGICAL_PK_FIELDS,
+    NON_EDITABLE_FIELDS,
+    area_conditions,
+)
+from .db import get_connection, get_storage
+
+ORIGINAL_TABLE = "r_alldata"
+EDIT_TABLE = "r_alldata_edit"
+REVERT_TABLE = "r_alldata_revert"
+
+DEFAULT_PAGE_SIZE = 200
+
+# ค่าในตารางชั่วคราวที่แปลว่า "คืนค่าเดิมช่องนี้" (ช่องอื่นเป็น NULL)
+_REVERT_MARK = "1"
+
+
+def compared_fields(all_db_fields_r_alldata):
+    """คอลัมน์ที่นำมาเทียบ: ทุกคอลัมน์ของ r_alldata ยกเว้น PK"""
+    return [
+        field for field in all_db_fields_r_alldata if field not in LOGICAL_PK_FIELDS
+    ]
+
+
+def _differs_sql(storage, field):
+    return storage.distinct_sql(f"e.[{field}]", f"o.[{field}]")
+
+
+def _diff_from_sql(storage, codes, fields):
+    """FROM ... WHERE ของแถวในพื้นที่ที่ค่าใน fields ต่างจากข้อมูลเดิมอย่างน้อยหนึ่งช่อง"""
+    conditions, params = area_conditions(codes, alias="e")
+    if not conditions:
+        raise ValueError("No search criteria provided.")
+    if not fields:
+        raise ValueError("No fields to compare.")
+    join = " AND ".join(f"o.[{pk}] = e.[{pk}]" for pk in LOGICAL_PK_FIELDS)
+    differs = " OR ".join(_differs_sql(storage, field) for field in fields)
+    conditions.append(f"({differs})")
+    return (
+        f"FROM {EDIT_TABLE} e JOIN {ORIGINAL_TABLE} o ON {join}"
+        f" WHERE {' AND '.join(conditions)}",
+        params,
+    )
+
+
+def _after_pk_sql(after_pk):
+    """เงื่อนไข keyset (e.PK) > after_pk แบบหลายคอลัมน์ คืน (sql, params)"""
+    clauses = []
+    params = []
+    for idx, pk in enumerate(LOGICAL_PK_FIELDS):
+        equal = [f"e.[{prev}] = ?" for prev in LOGICAL_PK_FIELDS[:idx]]
+        clauses.append("(" + " AND ".join(equal + [f"e.[{pk}] > ?"]) + ")")
+        params += list(after_pk[:idx]) + [after_pk[idx]]
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def _run(sql, params):
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Cannot connect to the database.")
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            db_column_names = [col[0] for col in cursor.description]
+    finally:
+        conn.close()
+    return rows, db_column_names
+
+
+def diff_summary(codes, fields):
+    """
+    จำนวนแถวในพื้นที่ที่ต่างจากข้อมูลเดิม และจำนวนแถวที่ต่างกันของแต่ละคอลัมน์
+    คืน (rows, counts) โดย counts เป็น dict: field -> จำนวนแถว (เฉพาะคอลัมน์ที่มีอย่างน้อยหนึ่งแถว)
+    """
+    storage = get_storage()
+    from_sql, params = _diff_from_sql(storage, codes, fields)
+    sums = [
+        f"SUM(CASE WHEN {_differs_sql(storage, field)} THEN 1 ELSE 0 END)"
+        for field in fields
+    ]
+    with perf.span("diff.summary", fields=len(fields)) as summary_span:
+        rows, _ = _run(f"SELECT COUNT(*), {', '.join(sums)} {from_sql}", params)
+        total = rows[0][0] or 0
+        summary_span.set(rows=total)
+    counts = {field: int(count) for field, count in zip(fields, rows[0][1:]) if count}
+    return total, counts
+
+
+def fetch_diff_page(codes, fields, after_pk=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    แถวที่ต่างจากข้อมูลเดิมไม่เกิน limit แถว เรียงตาม PK ต่อจาก after_pk
+    คืน (entries, next_after_pk) entries เป็น list ของ dict:
+    pk, fullname, time_edit, fields (dict: field -> (ค่าเดิม, ค่าที่แก้แล้ว) เฉพาะช่องที่ต่างกัน)
+    next_after_pk เป็น None เมื่อไม่มีหน้าถัดไป
+    """
+    storage = get_storage()
+    from_sql, params = _diff_from_sql(storage, codes, fields)
+    if after_pk is not None:
+        after_sql, after_params = _after_pk_sql(after_pk)
+        from_sql += f" AND {after_sql}"
+        params += after_params
+    from_sql += " ORDER BY " + ", ".join(f"e.[{pk}]" for pk in LOGICAL_PK_FIELDS)
+
+    columns = [f"e.[{pk}]" for pk in LOGICAL_PK_FIELDS]
+    columns += ["e.[fullname]", "e.[time_edit]"]
+    for field in fields:
+        columns += [f"o.[{field}]", f"e.[{field}]"]
+    with perf.span("diff.page", fields=len(fields)) as page_span:
+        rows, _ = _run(
+            storage.paged_select_sql(", ".join(columns), from_sql, limit + 1), params
+        )
+        page_span.set(rows=len(rows))
+
+    first_field = len(LOGICAL_PK_FIELDS) + 2
+    entries = []
+    for row in rows[:limit]:
+        differing = {}
+        for idx, field in enumerate(fields):
+            original = row[first_field + 2 * idx]
+            edited = row[first_field + 2 * idx + 1]
+            # ตัดช่องที่ต่างกันแค่ชนิดหรือช่องว่างท้ายค่า (เทียบแบบเดียวกับตอนแก้ในตาราง)
+            if audit_log.audit_text(original) != audit_log.audit_text(edited):
+                differing[field] = (original, edited)
+        if differing:
+            entries.append(
+                {
+                    "pk": tuple(row[: len(LOGICAL_PK_FIELDS)]),
+                    "fullname": row[len(LOGICAL_PK_FIELDS)],
+                    "time_edit": row[len(LOGICAL_PK_FIELDS) + 1],
+                    "fields": differing,
+                }
+            )
+    next_after_pk = (
+        tuple(rows[limit - 1][: len(LOGICAL_PK_FIELDS)]) if len(rows) > limit else None
+    )
+    return entries, next_after_pk
+
+
+def revert_to_original(selection, editor_fullname, edit_timestamp=None):
+    """
+    คืนค่าจาก r_alldata ให้ช่องที่เลือก selection: list ของ (pk tuple, field)
+    ด้วย UPDATE ... FROM ตารางชั่วคราวคำสั่งเดียว แถวที่ถูกคืนค่าได้ fullname / time_edit ใหม่
+    ค่าก่อน/หลังคืนค่าถูกอ่านใน transaction เดียวกันและเขียนลงตาราง audit
+    คืน (จำนวนแถวที่อัปเดต, ข้อความผิดพลาดหรือ None)
+    """
+    if not selection:
+        return 0, "No fields selected to revert."
+    fields = list(dict.fromkeys(field for _, field in selection))
+    blocked = [
+        field
+        for field in fields
+        if field in LOGICAL_PK_FIELDS or field in NON_EDITABLE_FIELDS
+    ]
+    if blocked:
+        return 0, f"Fields cannot be reverted: {', '.join(blocked)}"
+
+    edit_timestamp = edit_timestamp or datetime.datetime.now()
+    fields_by_pk = {}
+    for pk, field in selection:
+        fields_by_pk.setdefault(tuple(str(value) for value in pk), set()).add(field)
+    staging_rows = [
+        list(pk) + [_REVERT_MARK if field in selected else None for field in fields]
+        for pk, selected in fields_by_pk.items()
+    ]
+
+    storage = get_storage()
+    staging = storage.temp_table_name(REVERT_TABLE)
+    staging_columns = LOGICAL_PK_FIELDS + fields
+    update_sql = storage.revert_from_sql(
+        EDIT_TABLE,
+        ORIGINAL_TABLE,
+        staging,
+        LOGICAL_PK_FIELDS,
+        fields,
+        ["fullname", "time_edit"],
+    )
+    select_sql = (
+        "SELECT "
+        + ", ".join(
+            [f"s.[{pk}]" for pk in LOGICAL_PK_FIELDS]
+            + [f"s.[{field}], e.[{field}], o.[{field}]" for field in fields]
+        )
+        + f" FROM {staging} s"
+        + f" JOIN {EDIT_TABLE} e ON "
+        + " AND ".join(f"e.[{pk}] = s.[{pk}]" for pk in LOGICAL_PK_FIELDS)
+        + f" JOIN {ORIGINAL_TABLE} o ON "
+        + " AND ".join(f"o.[{pk}] = s.[{pk}]" for pk in LOGICAL_PK_FIELDS)
+    )
+
+    conn = None
+    revert_span = perf.span("diff.revert", rows=len(staging_rows), fields=len(fields))
+    try:
+        with revert_span:
+            audit_log.ensure_audit_table()
+            conn = get_connection()
+            if not conn:
+                return 0, "Database connection failed for updating."
+
+            # ไม่ใช้ `with` เพื่อ commit ครั้งเดียวหลัง UPDATE สำเร็จ
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    storage.create_temp_table_sql(
+                        REVERT_TABLE, staging_columns, LOGICAL_PK_FIELDS
+                    )
+                )
+                if hasattr(cursor, "fast_executemany"):
+                    cursor.fast_executemany = True
+                cursor.executemany(
+                    f"INSERT INTO {staging}"
+                    f" ({', '.join(f'[{col}]' for col in staging_columns)})"
+                    f" VALUES ({', '.join('?' for _ in staging_columns)})",
+                    staging_rows,
+                )
+
+                audit_rows = []
+                cursor.execute(select_sql)
+                for row in cursor.fetchall():
+                    pk_values = row[: len(LOGICAL_PK_FIELDS)]
+                    changes = []
+                    for idx, field in enumerate(fields):
+                        start = len(LOGICAL_PK_FIELDS) + 3 * idx
+                        mark, edited, original = row[start : start + 3]
+                        edited_text = audit_log.audit_text(edited)
+                        original_text = audit_log.audit_text(original)
+                        if mark is not None and edited_text != original_text:
+                            changes.append((field, edited_text, original_text))
+                    audit_rows += audit_log.audit_rows(
+                        pk_values, changes, editor_fullname, edit_timestamp
+                    )
+
+                cursor.execute(update_sql, [editor_fullname, edit_timestamp])
+                updated_rows_count = cursor.rowcount
+                cursor.execute(f"DROP TABLE {staging}")
+                if updated_rows_count > 0:
+                    audit_log.write_audit_rows(cursor, audit_rows)
+            finally:
+                cursor.close()
+            revert_span.set(updated=updated_rows_count)
+
+            if updated_rows_count > 0:
+                conn.commit()
+                perf.count("diff.reverted_fields", len(audit_rows))
+                return updated_rows_count, None
+            conn.rollback()
+            return 0, "No rows were actually updated."
+
+    except get_storage().Error as e:
+        if conn:
+            conn.rollback()
+        return 0, f"Database error during revert: {e}"
+    finally:
+        if conn:
+            conn.close()
@@ -0,0 +1,352 @@
+"""
+จับเวลางานหลัก (span) สำหรับวิเคราะห์ว่าเวลาหมดไปกับขั้นตอนไหน
+
+ใช้งาน:
+    with perf.span("search.execute", rows=0) as s:
+        ...
+        s.set(rows=len(results))
+
+    @perf.timed("validate")
+    def validate_edited_data(self):
+        ...
+        perf.annotate(errors=len(validation_errors))
+
+span ที่ซ้อนกันจะบันทึกชื่อ span แม่ไว้ใน "parent" ผลลัพธ์ถูกส่งให้ sink ทุกตัวที่ลงทะเบียนไว้
+(เช่น RotatingJsonLinesSink ที่เขียนไฟล์ perf.jsonl) ถ้าไม่มี sink เลย span() จะคืน
+object ว่างตัวเดียวกันทุกครั้ง จึงแทบไม่มีต้นทุนตอนปิดใช้งาน
+
+เปิดเขียน log ด้วย environment variable POP_EDIT_PERF_LOG=1
+
+นอกจากนี้มีตัวนับ (count/get_counters) สำหรับอัตรา cache hit ซึ่งเปิดอยู่เสมอ
+และ MemoryRecorder ที่เก็บ span ล่าสุดไว้ในหน่วยความจำให้หน้าจอแสดงผลได้
+"""
+import collections
+import functools
+import os
+import threading
+import time
+
+from .app_paths import get_app_data_dir
+
+PERF_LOG_ENV = "POP_EDIT_PERF_LOG"
+PERF_LOG_FILE = "perf.jsonl"
+PERF_LOG_MAX_BYTES = 5 * 1024 * 1024
+PERF_LOG_BACKUP_COUNT = 3
+
+_sinks = []
+_sinks_lock = threading.Lock()
+_local = threading.local()
+_stacks_by_thread = {}  # thread id -> span ที่กำลังทำงาน (ให้ thread อื่นอ่านได้ เช่น watchdog)
+
+_counters = collections.Counter()
+_memory_recorder = None
+_memory_recorder_users = 0
+
+
+class _NullSpan:
+    """span ที่ไม่ทำอะไรเลย ใช้ตอนไม่มี sink"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """ช่วงเวลาของงานหนึ่งงาน พร้อมข้อมูลประกอบ เช่น จำนวนแถว"""
+
+    __slots__ = ("name", "attrs", "parent", "started_at", "duration_ms", "error", "_t0")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.started_at = None
+        self.duration_ms = None
+        self.error = None
+        self._t0 = None
+
+    def set(self, **attrs):
+        """เพิ่ม/แก้ข้อมูลประกอบของ span ระหว่างทำงาน"""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+            _stacks_by_thread[threading.get_ident()] = stack
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        stack = _local.stack
+        if stack and stack[-1] is self:
+            stack.pop()
+        if not stack:
+            # thread ที่ไม่มี span ค้างแล้วเอาออก (change feed เริ่ม QThread ใหม่ทุกรอบ)
+            _local.stack = None
+            _stacks_by_thread.pop(threading.get_ident(), None)
+        _emit(self)
+        return False
+
+    def to_dict(self):
+        record = {
+            "ts": round(self.started_at, 3),
+            "span": self.name,
+            "ms": self.duration_ms,
+            "thread": threading.current_thread().name,
+        }
+        if self.parent:
+            record["parent"] = self.parent
+        if self.error:
+            record["error"] = self.error
+        record.update(self.attrs)
+        return record
+
+
+def _emit(span):
+    for sink in list(_sinks):
+        try:
+            sink.record(span)
+        except Exception:
+            # การวัดผลต้องไม่ทำให้งานจริงล้ม
+            pass
+
+
+def is_enabled():
+    return bool(_sinks)
+
+
+def span(name, **attrs):
+    """context manager สำหรับจับเวลา คืน span ว่างถ้าไม่มี sink"""
+    if not _sinks:
+        return _NULL_SPAN
+    return Span(name, attrs)
+
+
+def timed(name=None):
+    """decorator จับเวลาทั้งฟังก์ชันเป็น span ชื่อ name (ค่าเริ่มต้นคือชื่อฟังก์ชัน)"""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _sinks:
+                return func(*args, **kwargs)
+            with Span(span_name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def annotate(**attrs):
+    """เพิ่มข้อมูลประกอบให้ span ที่ทำงานอยู่ชั้นในสุดของ thread นี้ (เช่น จาก @timed)"""
+    if not _sinks:
+        return
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1].attrs.update(attrs)
+
+
+def active_spans(thread_id):
+    """ชื่อ span ที่กำลังทำงานอยู่ใน thread ที่ระบุ จากชั้นนอกสุดไปชั้นในสุด"""
+    stack = _stacks_by_thread.get(thread_id)
+    return [span.name for span in list(stack)] if stack else []
+
+
+def add_sink(sink):
+    """ลงทะเบียน sink (object ที่มี method record(span))"""
+    with _sinks_lock:
+        if sink not in _sinks:
+            _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+class RotatingJsonLinesSink:
+    """เขียน span (หรือ dict ใดๆ ผ่าน write) ละหนึ่งบรรทัด JSON ลงไฟล์ที่หมุนเวียนเมื่อขนาดเกินกำหนด"""
+
+    def __init__(
+        self,
+        path=None,
+        max_bytes=PERF_LOG_MAX_BYTES,
+        backup_count=PERF_LOG_BACKUP_COUNT,
+    ):
+        import logging
+        from logging.handlers import RotatingFileHandler
+
+        self.path = path or os.path.join(get_app_data_dir("logs"), PERF_LOG_FILE)
+        self._handler = RotatingFileHandler(
+            self.path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._make_record = functools.partial(
+            logging.LogRecord, "pop_edit.perf", logging.INFO, __file__, 0
+        )
+
+    def record(self, span):
+        self.write(span.to_dict())
+
+    def write(self, record):
+        """เขียน dict หนึ่งรายการเป็น JSON หนึ่งบรรทัด"""
+        import json
+
+        message = json.dumps(record, ensure_ascii=False, default=str)
+        self._handler.handle(self._make_record(message, None, None))
+
+    def close(self):
+        self._handler.close()
+
+
+class MemoryRecorder:
+    """
+    เก็บ span ล่าสุดไว้ในหน่วยความจำ
+    - get_last(name)  : span ล่าสุดของชื่อนั้น
+    - get_tree(name)  : span ล่าสุดที่เป็นชั้นนอกสุดชื่อนั้น พร้อม span ลูกทั้งหมดที่อยู่ข้างใน
+    """
+
+    def __init__(self, max_recent=200):
+        self._lock = threading.Lock()
+        self._last = {}
+        self._trees = {}
+        self._pending = {}  # thread id -> span ลูกที่รอ span ชั้นนอกสุดจบ
+        self.recent = collections.deque(maxlen=max_recent)
+
+    def record(self, span):
+        record = span.to_dict()
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._last[span.name] = record
+            self.recent.append(record)
+            if span.parent is None:
+                children = self._pending.pop(thread_id, [])
+                self._trees[span.name] = {"root": record, "children": children}
+            else:
+                self._pending.setdefault(thread_id, []).append(record)
+
+    def get_last(self, name):
+        with self._lock:
+            return self._last.get(name)
+
+    def get_tree(self, name):
+        with self._lock:
+            return self._trees.get(name)
+
+
+def get_memory_recorder():
+    """
+    MemoryRecorder ตัวเดียวของโปรเซส ลงทะเบียนเป็น sink จนกว่าผู้เรียกทุกรายจะเรียก
+    release_memory_recorder (ข้อมูลที่บันทึกไว้แล้วยังอยู่เมื่อลงทะเบียนใหม่)
+    """
+    global _memory_recorder, _memory_recorder_users
+    with _sinks_lock:
+        if _memory_recorder is None:
+            _memory_recorder = MemoryRecorder()
+        if _memory_recorder not in _sinks:
+            _sinks.append(_memory_recorder)
+        _memory_recorder_users += 1
+    return _memory_recorder
+
+
+def release_memory_recorder():
+    """เลิกใช้ MemoryRecorder ที่ได้จาก get_memory_recorder (ถอด sink เมื่อไม่มีผู้ใช้เหลือ)"""
+    global _memory_recorder_users
+    with _sinks_lock:
+        if _memory_recorder_users == 0:
+            return
+        _memory_recorder_users -= 1
+        if _memory_recorder_users == 0 and _memory_recorder in _sinks:
+            _sinks.remove(_memory_recorder)
+
+
+def count(name, n=1):
+    """เพิ่มตัวนับ (เช่น asset_cache.hit / asset_cache.miss)"""
+    _counters[name] += n
+
+
+def get_counters():
+    return dict(_counters)
+
+
+def hit_rate(prefix):
+    """อัตรา hit ของตัวนับ <prefix>.hit และ <prefix>.miss คืน None ถ้ายังไม่เคยนับ"""
+    hits = _counters.get(f"{prefix}.hit", 0)
+    total = hits + _counters.get(f"{prefix}.miss", 0)
+    return hits / total if total else None
+
+
+def current_rss_mb():
+    """หน่วยความจำที่โปรเซสใช้อยู่ (RSS) เป็น MB คืน None ถ้าอ่านไม่ได้"""
+    try:
+        if os.name == "nt":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_process_memory_info.argtypes = [
+                wintypes.HANDLE,
+                ctypes.POINTER(PROCESS_MEMORY_COUNTERS),
+                wintypes.DWORD,
+            ]
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if not get_process_memory_info(handle, ctypes.byref(counters), counters.cb):
+                return None
+            return counters.WorkingSetSize / (1024 * 1024)
+
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError, IndexError):
+        return None
+
+
+def enable_file_log(path=None):
+    """เปิดการเขียน perf log ลงไฟล์ คืน sink ที่สร้าง"""
+    return add_sink(RotatingJsonLinesSink(path))
+
+
+if os.environ.get(PERF_LOG_ENV, "") not in ("", "0"):
+    enable_file_log()
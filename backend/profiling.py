@@ -0,0 +1,182 @@
+"""
+โหมด profiling สำหรับเก็บข้อมูลจากการใช้งานจริง (ปิดอยู่โดยค่าเริ่มต้น)
+
+เปิดด้วย environment variable POP_EDIT_PROFILE=1 หรือ python main.py --profile
+งานของผู้ใช้แต่ละครั้ง (login/ค้นหา/กรอง/บันทึก) จะถูกครอบด้วย cProfile และ tracemalloc
+ผลลัพธ์อยู่ใน ~/.pop_edit_data/profiles/<เวลาเริ่ม session>/
+    001_search.prof       เปิดดูด้วย python -m pstats หรือ snakeviz
+    001_search.alloc.txt  เวลา หน่วยความจำสูงสุด และบรรทัดที่จองหน่วยความจำมากที่สุด
+
+ใช้งาน:
+    with profiling.profile_action("search"):
+        ...
+
+    @profiling.profiled("save")
+    def execute_save_edits(self):
+        ...
+
+ถ้างานซ้อนกัน (เช่น บันทึกก่อนค้นหาใหม่) จะเก็บเฉพาะงานชั้นนอกสุด
+เพราะ cProfile เปิดได้ครั้งละตัวเดียว
+"""
+import contextlib
+import datetime
+import functools
+import itertools
+import os
+import re
+import threading
+import time
+
+from .app_paths import get_app_data_dir
+
+PROFILE_ENV = "POP_EDIT_PROFILE"
+PROFILE_DIR_NAME = "profiles"
+
+# จำนวนบรรทัดที่จองหน่วยความจำมากที่สุดที่เขียนลงไฟล์สรุป
+TOP_ALLOCATIONS = 25
+# จำนวนฟังก์ชันที่ใช้เวลาสะสมมากที่สุดที่แนบท้ายไฟล์สรุป
+TOP_FUNCTIONS = 20
+# จำนวนเฟรมที่ tracemalloc เก็บต่อการจองหนึ่งครั้ง
+TRACEMALLOC_FRAMES = 1
+
+_output_dir = None
+_sequence = itertools.count(1)
+_lock = threading.Lock()
+_active = False
+
+
+def is_enabled():
+    return _output_dir is not None
+
+
+def get_output_dir():
+    return _output_dir
+
+
+def enable(output_dir=None):
+    """เปิดโหมด profiling คืนโฟลเดอร์ที่ใช้เก็บผลของ session นี้"""
+    global _output_dir
+    if output_dir is None:
+        session_name = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = get_app_data_dir(PROFILE_DIR_NAME, session_name)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+    _output_dir = output_dir
+    return _output_dir
+
+
+def disable():
+    global _output_dir
+    _output_dir = None
+
+
+def _safe_name(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+
+
+def _write_summary(path, name, elapsed_ms, peak_kb, snapshot, profiler):
+    import io
+    import pstats
+
+    lines = [
+        f"action: {name}",
+        f"time: {datetime.datetime.now().isoformat(timespec='seconds')}",
+        f"elapsed_ms: {elapsed_ms:,.1f}",
+        f"tracemalloc_peak_kb: {peak_kb:,.1f}",
+        "",
+        f"Top {TOP_ALLOCATIONS} allocations (by line, still allocated at the end)",
+    ]
+    stats = snapshot.statistics("lineno")
+    for index, stat in enumerate(stats[:TOP_ALLOCATIONS], 1):
+        frame = stat.traceback[0]
+        lines.append(
+            f"{index:>3}. {stat.size / 1024:>10,.1f} KB {stat.count:>8,} blocks"
+            f"  {frame.filename}:{frame.lineno}"
+        )
+    other = stats[TOP_ALLOCATIONS:]
+    if other:
+        other_kb = sum(s.size for s in other) / 1024
+        lines.append(f"     {other_kb:>10,.1f} KB in {len(other):,} other lines")
+
+    lines.extend(["", f"Top {TOP_FUNCTIONS} functions (cumulative time)"])
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(
+        TOP_FUNCTIONS
+    )
+    lines.append(buffer.getvalue().strip())
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+@contextlib.contextmanager
+def profile_action(name):
+    """ครอบงานหนึ่งครั้งด้วย cProfile และ tracemalloc (ไม่ทำอะไรถ้าไม่ได้เปิดโหมด profiling)"""
+    global _active
+    if _output_dir is None:
+        yield
+        return
+    with _lock:
+        nested = _active
+        _active = True
+    if nested:
+        yield
+        return
+
+    import cProfile
+    import tracemalloc
+
+    output_dir = _output_dir
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    t0 = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        try:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__),
+                )
+            )
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+            if started_tracing:
+                tracemalloc.stop()
+            prefix = os.path.join(
+                output_dir, f"{next(_sequence):03d}_{_safe_name(name)}"
+            )
+            profiler.dump_stats(f"{prefix}.prof")
+            _write_summary(
+                f"{prefix}.alloc.txt", name, elapsed_ms, peak_kb, snapshot, profiler
+            )
+        except OSError:
+            # การเก็บ profile ต้องไม่ทำให้งานจริงล้ม
+            pass
+        finally:
+            with _lock:
+                _active = False
+
+
+def profiled(name):
+    """decorator แบบเดียวกับ profile_action สำหรับเมธอดที่ไม่ได้ต่อกับ signal โดยตรง"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_action(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+if os.environ.get(PROFILE_ENV, "") not in ("", "0"):
+    enable()
@@ -0,0 +1,118 @@
+"""
+บันทึกคำสั่ง SQL ที่ใช้เวลานานเกินเกณฑ์ลง logs/slow_queries.jsonl
+
+แต่ละรายการมี SQL, พารามิเตอร์, จำนวนแถว และเวลาที่ใช้ สำหรับให้ DBA ดูว่าเงื่อนไขพื้นที่ใด
+ไม่มี index รองรับ หรือ ORDER BY ตามชื่อพื้นที่ทำให้ต้อง sort เอง
+
+ตั้งค่าด้วย environment variable:
+    POP_EDIT_SLOW_QUERY_MS=1000        เกณฑ์เวลา (ms) ตั้งเป็น 0 เพื่อปิด
+    POP_EDIT_SLOW_QUERY_PLAN=plan      เก็บ estimated plan (SQL Server: SHOWPLAN_XML,
+                                       SQLite: EXPLAIN QUERY PLAN) ด้วย
+    POP_EDIT_SLOW_QUERY_PLAN=statistics  เก็บ plan และรัน SELECT ซ้ำพร้อม
+                                       SET STATISTICS IO, TIME (เฉพาะ SQL Server)
+"""
+import os
+import re
+import time
+
+from . import perf
+from .app_paths import get_app_data_dir
+from .db import get_storage
+
+SLOW_QUERY_MS_ENV = "POP_EDIT_SLOW_QUERY_MS"
+SLOW_QUERY_PLAN_ENV = "POP_EDIT_SLOW_QUERY_PLAN"
+DEFAULT_SLOW_QUERY_MS = 1000
+
+SLOW_QUERY_LOG_FILE = "slow_queries.jsonl"
+
+PLAN_MODES = ("plan", "statistics")
+
+_log_sink = None
+
+
+def get_threshold_ms():
+    try:
+        return float(os.environ.get(SLOW_QUERY_MS_ENV, DEFAULT_SLOW_QUERY_MS))
+    except ValueError:
+        return DEFAULT_SLOW_QUERY_MS
+
+
+def get_plan_mode():
+    """"plan", "statistics" หรือ None (ไม่เก็บ plan)"""
+    mode = os.environ.get(SLOW_QUERY_PLAN_ENV, "").strip().lower()
+    if mode in ("1", "true", "yes"):
+        return "plan"
+    return mode if mode in PLAN_MODES else None
+
+
+def is_slow(elapsed_ms):
+    threshold_ms = get_threshold_ms()
+    return threshold_ms > 0 and elapsed_ms >= threshold_ms
+
+
+def _normalize_sql(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def _capture_plan(connection, sql, params, mode):
+    storage = get_storage()
+    captured = {}
+    try:
+        captured["plan"] = storage.explain(connection, sql, params)
+        if mode == "statistics" and sql.lstrip().upper().startswith("SELECT"):
+            statistics = storage.query_statistics(connection, sql, params)
+            if statistics is not None:
+                captured["statistics"] = statistics
+    except Exception as e:
+        # เก็บ plan ไม่ได้ (เช่น สิทธิ์ SHOWPLAN) ยังบันทึกส่วนอื่นตามปกติ
+        captured["plan_error"] = f"{type(e).__name__}: {e}"
+    return captured
+
+
+def _write(record):
+    global _log_sink
+    if _log_sink is None:
+        _log_sink = perf.RotatingJsonLinesSink(
+            os.path.join(get_app_data_dir("logs"), SLOW_QUERY_LOG_FILE)
+        )
+    _log_sink.write(record)
+
+
+def record_slow_query(
+    operation,
+    sql,
+    params,
+    rows,
+    elapsed_ms,
+    connection=None,
+    log_params=None,
+    **extra,
+):
+    """
+    บันทึกคำสั่งที่ช้าหนึ่งรายการ
+    - params      : พารามิเตอร์ที่ใช้รันจริง (ใช้ตอนขอ plan)
+    - log_params  : พารามิเตอร์ที่เขียนลง log (ค่าเริ่มต้นคือ params) ใช้ตัดข้อมูลส่วนบุคคลออก
+    - connection  : ถ้าระบุและเปิดโหมด plan จะขอ plan ผ่าน connection นี้
+    """
+    perf.count("db.slow_query")
+    record = {
+        "ts": round(time.time(), 3),
+        "operation": operation,
+        "ms": round(elapsed_ms, 3),
+        "rows": rows,
+        "threshold_ms": get_threshold_ms(),
+        "backend": get_storage().name,
+        "sql": _normalize_sql(sql),
+        "params": list(params if log_params is None else log_params),
+    }
+    record.update(extra)
+
+    mode = get_plan_mode()
+    if mode and connection is not None:
+        record.update(_capture_plan(connection, sql, params, mode))
+
+    try:
+        _write(record)
+    except OSError:
+        pass
+    return record
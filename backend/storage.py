@@ -0,0 +1,582 @@
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+
+from .app_paths import get_app_data_dir
+
+# รายชื่อคอลัมน์ของ r_alldata ที่ฐานข้อมูลจำลอง (SQLite) สร้างให้
+# ตรงกับคอลัมน์ที่โปรแกรมใช้งาน: Primary Key, รหัส/ชื่อพื้นที่ และฟิลด์ใน column_name.xlsx
+STANDIN_PK_FIELDS = ["EA_Code_15", "Building_No", "Household_No", "Population_No"]
+STANDIN_AREA_FIELDS = [
+    "RegCode",
+    "RegName",
+    "ProvCode",
+    "ProvName",
+    "DistCode",
+    "DistName",
+    "SubDistCode",
+    "SubDistName",
+]
+STANDIN_SURVEY_FIELDS = [
+    "BuildingType", "BuildingTypeOther", "Residing", "HouseholdEnumeration",
+    "HouseholdEnumerationOther", "HouseholdType", "NumberOfHousehold", "Language",
+    "LanguageOther", "HouseholdNumber", "ConstructionMaterial",
+    "ConstructionMaterialOther", "TenureResidence", "TenureResidenceOther",
+    "TenureLand", "TenureLandOther", "TotalRoom", "RoomVacant", "RoomResidence",
+    "TotalPopulation", "TotalMale", "TotalFemale", "NumberOfHousueholdMember",
+    "HouseholdMemberNumber", "Title", "TitleOther", "FirstName", "LastName",
+    "Relationship", "Sex", "MonthOfBirth", "YearOfBirth", "Age_01", "Religion",
+    "ReligionOther", "NationalityNumeric", "MaritalStatus", "EducationalAttainment",
+    "EmploymentStatus", "NameInHouseholdRegister", "NameInHouseholdRegisterOther",
+    "DurationOfResidence", "MigrationCharecteristics", "MovedFromProvince",
+    "MovedFromAbroad", "MigrationReason", "MigrationReasonOther", "Gender",
+]
+STANDIN_R_ALLDATA_FIELDS = (
+    STANDIN_PK_FIELDS + STANDIN_AREA_FIELDS + STANDIN_SURVEY_FIELDS
+)
+# รหัสพื้นที่เก็บเป็นตัวเลข เพื่อให้เทียบกับพารามิเตอร์ int ได้เหมือน SQL Server
+_STANDIN_INTEGER_FIELDS = {"RegCode", "ProvCode", "DistCode", "SubDistCode"}
+
+
+class SqlServerStorage:
+    """เชื่อมต่อ SQL Server จริงผ่าน pyodbc (ค่าเริ่มต้นของโปรแกรม)"""
+
+    name = "sqlserver"
+
+    # รายการไดรเวอร์ที่อาจมีในระบบต่างๆ
+    POSSIBLE_DRIVERS = [
+        "ODBC Driver 18 for SQL Server",
+        "ODBC Driver 17 for SQL Server",
+        "ODBC Driver 13 for SQL Server",
+        "SQL Server Native Client 11.0",
+        "SQL Server",
+    ]
+
+    def __init__(self, db_config):
+        self.db_config = db_config
+
+    @property
+    def Error(self):
+        import pyodbc
+
+        return pyodbc.Error
+
+    def connect(self):
+        """เชื่อมต่อกับฐานข้อมูลโดยลองหลายไดรเวอร์"""
+        import pyodbc
+
+        host = self.db_config["host"]
+        port = self.db_config["port"]
+        database = self.db_config["database"]
+        username = self.db_config["username"]
+        password = self.db_config["password"]
+
+        # ลองใช้ไดรเวอร์ทีละตัวจนกว่าจะเชื่อมต่อได้
+        for driver in self.POSSIBLE_DRIVERS:
+            try:
+                conn_str = (
+                    f"DRIVER={{{driver}}};"
+                    f"SERVER={host},{port};"
+                    f"DATABASE={database};"
+                    f"UID={username};"
+                    f"PWD={password};"
+                    f"Connection Timeout=5;"
+                )
+                return pyodbc.connect(conn_str)
+            except pyodbc.Error:
+                continue
+
+        # ถ้าไม่สามารถเชื่อมต่อได้ด้วยไดรเวอร์ใดๆ
+        return None
+
+    def empty_select_sql(self, table):
+        """SQL ที่คืนเฉพาะโครงสร้างคอลัมน์ของตาราง (ไม่มีแถวข้อมูล)"""
+        return f"SELECT TOP 0 * FROM {table}"
+
+    def explain(self, connection, sql, params=()):
+        """estimated execution plan (XML) ของคำสั่ง โดยไม่รันคำสั่งจริง"""
+        # ไม่ใช้ `with` เพราะ cursor.__exit__ จะ commit transaction ที่ค้างอยู่ของ connection
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SET SHOWPLAN_XML ON")
+            try:
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
+            finally:
+                cursor.execute("SET SHOWPLAN_XML OFF")
+        finally:
+            cursor.close()
+        return {"format": "showplan_xml", "plan": row[0] if row else None}
+
+    def list_indexes(self, connection, table):
+        """
+        index ที่มีอยู่ของตาราง คืน list ของ dict:
+        name, columns (key ตามลำดับ), include, unique, clustered
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                """
+                SELECT i.name, i.type_desc, i.is_unique, c.name, ic.is_included_column
+                FROM sys.indexes i
+                JOIN sys.index_columns ic
+                    ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+                JOIN sys.columns c
+                    ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+                WHERE i.object_id = OBJECT_ID(?) AND i.type > 0
+                ORDER BY i.index_id, ic.is_included_column, ic.key_ordinal
+                """,
+                (table,),
+            )
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        indexes = {}
+        for name, type_desc, is_unique, column, is_included in rows:
+            index = indexes.setdefault(
+                name,
+                {
+                    "name": name,
+                    "columns": [],
+                    "include": [],
+                    "unique": bool(is_unique),
+                    "clustered": type_desc == "CLUSTERED",
+                },
+            )
+            index["include" if is_included else "columns"].append(column)
+        return list(indexes.values())
+
+    def create_index_sql(
+        self, table, name, columns, unique=False, clustered=False, include=()
+    ):
+        sql = (
+            f"CREATE {'UNIQUE ' if unique else ''}"
+            f"{'CLUSTERED' if clustered else 'NONCLUSTERED'} INDEX [{name}]"
+            f" ON [dbo].[{table}] ({', '.join(f'[{col}]' for col in columns)})"
+        )
+        if include:
+            sql += f" INCLUDE ({', '.join(f'[{col}]' for col in include)})"
+        return sql
+
+    def temp_table_name(self, name):
+        return f"#{name}"
+
+    def create_temp_table_sql(self, name, columns, primary_key=()):
+        """ตารางชั่วคราว (#name) อยู่เฉพาะใน session นี้ ทุกคอลัมน์เป็น NVARCHAR"""
+        definitions = [
+            f"[{col}] NVARCHAR({'255' if col in primary_key else '4000'})"
+            for col in columns
+        ]
+        if primary_key:
+            definitions.append(
+                f"PRIMARY KEY ({', '.join(f'[{col}]' for col in primary_key)})"
+            )
+        return f"CREATE TABLE {self.temp_table_name(name)} ({', '.join(definitions)})"
+
+    def update_from_sql(
+        self,
+        table,
+        source,
+        key_columns,
+        columns,
+        stamp_columns=(),
+        version_columns=(),
+        version_column="row_version",
+    ):
+        """
+        UPDATE ... FROM แบบ set-based: แก้ทุกแถวของ table ที่ key ตรงกับ source ในคำสั่งเดียว
+        ค่า NULL ใน source แปลว่าไม่เปลี่ยนคอลัมน์นั้น ส่วน stamp_columns รับค่าเป็นพารามิเตอร์
+        ถ้ามี version_columns แก้เฉพาะแถวที่ลายนิ้วมือ (row_version_sql แบบข้อความ) ยังตรงกับ
+        s.[version_column] (แถวที่ version_column เป็น NULL ไม่ตรวจ)
+        """
+        set_clauses = [f"[{col}] = COALESCE(s.[{col}], t.[{col}])" for col in columns]
+        set_clauses += [f"[{col}] = ?" for col in stamp_columns]
+        join = " AND ".join(f"t.[{col}] = s.[{col}]" for col in key_columns)
+        if version_columns:
+            join += (
+                f" AND (s.[{version_column}] IS NULL OR"
+                f" {self.row_version_sql(version_columns, 't', as_text=True)}"
+                f" = s.[{version_column}])"
+            )
+        return (
+            f"UPDATE t SET {', '.join(set_clauses)}"
+            f" FROM [dbo].[{table}] t JOIN {source} s ON {join}"
+        )
+
+    def revert_from_sql(
+        self, table, original_table, source, key_columns, columns, stamp_columns=()
+    ):
+        """
+        UPDATE แบบ set-based คืนค่าจาก original_table ให้ table ในคำสั่งเดียว
+        เฉพาะแถวที่ key อยู่ใน source และเฉพาะคอลัมน์ที่ source มีค่า (ไม่ใช่ NULL)
+        ต่างจาก update_from_sql ตรงที่ค่าเดิมเป็น NULL ได้ (คืนค่าว่างได้)
+        """
+        set_clauses = [
+            f"[{col}] = CASE WHEN s.[{col}] IS NULL THEN t.[{col}] ELSE o.[{col}] END"
+            for col in columns
+        ]
+        set_clauses += [f"[{col}] = ?" for col in stamp_columns]
+        join = " AND ".join(f"t.[{col}] = s.[{col}]" for col in key_columns)
+        original_join = " AND ".join(f"o.[{col}] = t.[{col}]" for col in key_columns)
+        return (
+            f"UPDATE t SET {', '.join(set_clauses)}"
+            f" FROM [dbo].[{table}] t JOIN {source} s ON {join}"
+            f" JOIN [dbo].[{original_table}] o ON {original_join}"
+        )
+
+    def distinct_sql(self, left, right):
+        """เงื่อนไข "ค่าต่างกัน" ที่นับ NULL กับค่าอื่นว่าต่างกัน (IS DISTINCT FROM มีเฉพาะ SQL Server 2022)"""
+        return (
+            f"({left} <> {right} OR ({left} IS NULL AND {right} IS NOT NULL)"
+            f" OR ({left} IS NOT NULL AND {right} IS NULL))"
+        )
+
+    def create_audit_table_sql(self, table, key_columns):
+        """
+        คำสั่งสร้างตาราง audit (append-only) พร้อม index สำหรับอ่านย้อนหลังแบบ keyset
+        ตามแถว (key_columns, audit_id) และตามผู้แก้ไข (editor, audit_id) ถ้ายังไม่มี
+        คำสั่งแรกสร้างตาราง ที่เหลือเป็น index (ตรวจด้วย INDEXPROPERTY ของตารางนี้
+        จึงไม่ชนกับ index ชื่อเดียวกันของตารางอื่น และไม่ต้องมีสิทธิ์ VIEW DEFINITION)
+        """
+        keys = ", ".join(f"[{col}] NVARCHAR(255) NOT NULL" for col in key_columns)
+        key_list = ", ".join(f"[{col}]" for col in key_columns)
+        return [
+            f"IF OBJECT_ID(N'dbo.{table}', N'U') IS NULL"
+            f" CREATE TABLE [dbo].[{table}] ("
+            "[audit_id] BIGINT IDENTITY(1,1) NOT NULL PRIMARY KEY, "
+            f"{keys}, [field_name] NVARCHAR(128) NOT NULL, "
+            "[old_value] NVARCHAR(4000) NULL, [new_value] NVARCHAR(4000) NULL, "
+            "[editor] NVARCHAR(255) NULL, [time_edit] DATETIME2 NOT NULL)",
+            f"IF INDEXPROPERTY(OBJECT_ID(N'dbo.{table}'), N'IX_{table}_row', 'IndexID') IS NULL"
+            f" CREATE INDEX [IX_{table}_row] ON [dbo].[{table}] ({key_list}, [audit_id])",
+            f"IF INDEXPROPERTY(OBJECT_ID(N'dbo.{table}'), N'IX_{table}_editor', 'IndexID') IS NULL"
+            f" CREATE INDEX [IX_{table}_editor] ON [dbo].[{table}] ([editor], [audit_id])",
+        ]
+
+    def paged_select_sql(self, select_sql, from_sql, limit):
+        """SELECT ... ที่คืนไม่เกิน limit แถว (from_sql รวม WHERE / ORDER BY)"""
+        return f"SELECT TOP ({int(limit)}) {select_sql} {from_sql}"
+
+    def row_version_sql(self, columns, alias=None, as_text=False):
+        """
+        ลายนิ้วมือของแถว (SHA2_256 ของทุกคอลัมน์ใน columns) ใช้ได้ทั้งใน SELECT และ WHERE ของ UPDATE
+        ค่าที่ยาวเกิน 8000 byte ต้องใช้ SQL Server 2016 ขึ้นไป
+        as_text คืนเป็นเลขฐานสิบหก (เก็บในตารางชั่วคราวที่ทุกคอลัมน์เป็น NVARCHAR ได้)
+        """
+        prefix = f"{alias}." if alias else ""
+        parts = [
+            f"ISNULL(CONVERT(NVARCHAR(MAX), {prefix}[{col}], 126), NCHAR(0))"
+            for col in columns
+        ]
+        version = f"HASHBYTES('SHA2_256', {' + NCHAR(31) + '.join(parts)})"
+        return f"CONVERT(NVARCHAR(64), {version}, 2)" if as_text else version
+
+    def query_statistics(self, connection, sql, params=()):
+        """
+        รัน SELECT อีกครั้งพร้อม SET STATISTICS IO, TIME ON แล้วคืนข้อความที่ server ส่งกลับมา
+        (จำนวน logical/physical reads ต่อตาราง และ CPU/elapsed time)
+        """
+        messages = []
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SET STATISTICS IO, TIME ON")
+            try:
+                cursor.execute(sql, params)
+                while True:
+                    if cursor.description is not None:
+                        cursor.fetchall()
+                    messages.extend(message for _, message in cursor.messages or [])
+                    if not cursor.nextset():
+                        break
+            finally:
+                cursor.execute("SET STATISTICS IO, TIME OFF")
+        finally:
+            cursor.close()
+        return {"format": "statistics_io_time", "messages": messages}
+
+
+class _SqliteRow(tuple):
+    """แถวผลลัพธ์ที่อ่านได้ทั้งแบบ index และแบบ attribute เหมือน pyodbc.Row"""
+
+    def __new__(cls, values, column_index):
+        row = super().__new__(cls, values)
+        row._column_index = column_index
+        return row
+
+    def __getattr__(self, name):
+        try:
+            return self[self._column_index[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+class _SqliteCursor:
+    """
+    ห่อ sqlite3.Cursor ให้ใช้ใน `with conn.cursor() as cursor:` ได้เหมือน pyodbc
+    (ออกจาก with โดยไม่มี exception จะ commit ให้ เหมือน pyodbc.Cursor)
+    """
+
+    def __init__(self, connection, cursor):
+        self._connection = connection
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql, params)
+        if self._cursor.description is not None:
+            # สร้าง map ชื่อคอลัมน์ครั้งเดียวต่อคำสั่ง แล้วใช้ร่วมกันทุกแถว
+            column_index = {
+                col[0]: idx for idx, col in enumerate(self._cursor.description)
+            }
+            self._cursor.row_factory = lambda cursor, values: _SqliteRow(
+                values, column_index
+            )
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(sql, seq_of_params)
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self._connection.commit()
+        self._cursor.close()
+        return False
+
+
+class _SqliteConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self):
+        return _SqliteCursor(self._connection, self._connection.cursor())
+
+
+def _adapt_datetime(value):
+    return value.isoformat(" ")
+
+
+def _convert_timestamp(value):
+    return datetime.datetime.fromisoformat(value.decode("utf-8"))
+
+
+def _row_version(*values):
+    return hashlib.sha256(repr(values).encode("utf-8")).hexdigest()
+
+
+sqlite3.register_adapter(datetime.datetime, _adapt_datetime)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+
+
+class SqliteStorage:
+    """
+    ฐานข้อมูลจำลองบนเครื่องด้วย SQLite สำหรับพัฒนาแบบ offline และการวัดประสิทธิภาพ
+    สร้างตาราง r_alldata, r_alldata_edit และ edit_user ให้อัตโนมัติเมื่อเชื่อมต่อครั้งแรก
+    (ไม่สร้าง index ใดๆ ให้ตาราง r_alldata* เพื่อให้ใกล้เคียงกับฐานข้อมูลจริงที่ยังไม่ได้ปรับแต่ง)
+    """
+
+    name = "sqlite"
+    Error = sqlite3.Error
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(
+            get_app_data_dir("standin"), "pop68T.sqlite3"
+        )
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def connect(self):
+        try:
+            connection = sqlite3.connect(
+                self.db_path,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,
+            )
+        except sqlite3.Error:
+            return None
+        connection.create_function("row_version", -1, _row_version, deterministic=True)
+        with self._schema_lock:
+            if not self._schema_ready:
+                self.create_schema(connection)
+                self._schema_ready = True
+        return _SqliteConnection(connection)
+
+    def empty_select_sql(self, table):
+        return f"SELECT * FROM {table} LIMIT 0"
+
+    def explain(self, connection, sql, params=()):
+        """ผลของ EXPLAIN QUERY PLAN (บอกว่าใช้ index ใดหรือสแกนทั้งตาราง และต้อง sort เองหรือไม่)"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        return {"format": "sqlite_query_plan", "plan": [row[3] for row in rows]}
+
+    def query_statistics(self, connection, sql, params=()):
+        """SQLite ไม่มีสถิติ I/O ต่อคำสั่งแบบ SQL Server"""
+        return None
+
+    def list_indexes(self, connection, table):
+        """index ที่มีอยู่ของตาราง (รูปแบบเดียวกับ SqlServerStorage.list_indexes)"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA index_list([{table}])")
+            index_rows = cursor.fetchall()
+            indexes = []
+            for _, name, unique, *_ in index_rows:
+                cursor.execute(f"PRAGMA index_info([{name}])")
+                columns = [row[2] for row in sorted(cursor.fetchall())]
+                indexes.append(
+                    {
+                        "name": name,
+                        "columns": columns,
+                        "include": [],
+                        "unique": bool(unique),
+                        "clustered": False,
+                    }
+                )
+        finally:
+            cursor.close()
+        return indexes
+
+    def create_index_sql(
+        self, table, name, columns, unique=False, clustered=False, include=()
+    ):
+        """SQLite ไม่มี clustered index และ INCLUDE จึงสร้างเฉพาะ key"""
+        return (
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS [{name}]"
+            f" ON [{table}] ({', '.join(f'[{col}]' for col in columns)})"
+        )
+
+    def temp_table_name(self, name):
+        return f"temp.[{name}]"
+
+    def create_temp_table_sql(self, name, columns, primary_key=()):
+        definitions = [f"[{col}] TEXT" for col in columns]
+        if primary_key:
+            definitions.append(
+                f"PRIMARY KEY ({', '.join(f'[{col}]' for col in primary_key)})"
+            )
+        return f"CREATE TEMP TABLE [{name}] ({', '.join(definitions)})"
+
+    def update_from_sql(
+        self,
+        table,
+        source,
+        key_columns,
+        columns,
+        stamp_columns=(),
+        version_columns=(),
+        version_column="row_version",
+    ):
+        """เหมือน SqlServerStorage.update_from_sql (UPDATE ... FROM ต้องใช้ SQLite 3.33 ขึ้นไป)"""
+        set_clauses = [
+            f"[{col}] = COALESCE(s.[{col}], [{table}].[{col}])" for col in columns
+        ]
+        set_clauses += [f"[{col}] = ?" for col in stamp_columns]
+        join = " AND ".join(f"[{table}].[{col}] = s.[{col}]" for col in key_columns)
+        if version_columns:
+            join += (
+                f" AND (s.[{version_column}] IS NULL OR"
+                f" {self.row_version_sql(version_columns, f'[{table}]')}"
+                f" = s.[{version_column}])"
+            )
+        return (
+            f"UPDATE [{table}] SET {', '.join(set_clauses)}"
+            f" FROM {source} AS s WHERE {join}"
+        )
+
+    def revert_from_sql(
+        self, table, original_table, source, key_columns, columns, stamp_columns=()
+    ):
+        """เหมือน SqlServerStorage.revert_from_sql"""
+        set_clauses = [
+            f"[{col}] = CASE WHEN s.[{col}] IS NULL THEN [{table}].[{col}]"
+            f" ELSE o.[{col}] END"
+            for col in columns
+        ]
+        set_clauses += [f"[{col}] = ?" for col in stamp_columns]
+        original_join = " AND ".join(f"o.[{col}] = s.[{col}]" for col in key_columns)
+        join = " AND ".join(f"[{table}].[{col}] = s.[{col}]" for col in key_columns)
+        return (
+            f"UPDATE [{table}] SET {', '.join(set_clauses)}"
+            f" FROM {source} AS s JOIN [{original_table}] AS o ON {original_join}"
+            f" WHERE {join}"
+        )
+
+    def distinct_sql(self, left, right):
+        return f"({left} IS NOT {right})"
+
+    def create_audit_table_sql(self, table, key_columns):
+        keys = ", ".join(f"[{col}] TEXT NOT NULL" for col in key_columns)
+        key_list = ", ".join(f"[{col}]" for col in key_columns)
+        return [
+            f"CREATE TABLE IF NOT EXISTS [{table}] ("
+            "[audit_id] INTEGER PRIMARY KEY AUTOINCREMENT, "
+            f"{keys}, [field_name] TEXT NOT NULL, [old_value] TEXT, [new_value] TEXT, "
+            "[editor] TEXT, [time_edit] TIMESTAMP NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS [IX_{table}_row] ON [{table}] ({key_list}, [audit_id])",
+            f"CREATE INDEX IF NOT EXISTS [IX_{table}_editor] ON [{table}] ([editor], [audit_id])",
+        ]
+
+    def paged_select_sql(self, select_sql, from_sql, limit):
+        return f"SELECT {select_sql} {from_sql} LIMIT {int(limit)}"
+
+    def row_version_sql(self, columns, alias=None, as_text=False):
+        """
+        เหมือน SqlServerStorage.row_version_sql แต่คำนวณด้วยฟังก์ชัน row_version ที่ลงทะเบียนใน connect
+        (ส่งค่าทุกคอลัมน์เป็น argument ตาราง r_alldata_edit จำลองมีไม่เกินจำนวน argument สูงสุด 127)
+        ฟังก์ชันคืนเลขฐานสิบหกอยู่แล้ว as_text จึงไม่เปลี่ยนผล
+        """
+        prefix = f"{alias}." if alias else ""
+        return f"row_version({', '.join(f'{prefix}[{col}]' for col in columns)})"
+
+    @staticmethod
+    def _column_definitions(fields):
+        return ", ".join(
+            f"[{field}] {'INTEGER' if field in _STANDIN_INTEGER_FIELDS else 'TEXT'}"
+            for field in fields
+        )
+
+    def create_schema(self, connection):
+        """สร้างตารางทั้งหมดถ้ายังไม่มี พร้อมผู้ใช้ admin (รหัสผ่าน admin) สำหรับเครื่องพัฒนา"""
+        columns_sql = self._column_definitions(STANDIN_R_ALLDATA_FIELDS)
+        connection.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS r_alldata ({columns_sql});
+            CREATE TABLE IF NOT EXISTS r_alldata_edit (
+                {columns_sql}, [fullname] TEXT, [time_edit] TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS edit_user (
+                [username] TEXT PRIMARY KEY, [password] TEXT, [fullname] TEXT
+            );
+            INSERT OR IGNORE INTO edit_user (username, password, fullname)
+            VALUES ('admin', 'admin', 'Administrator');
+            """
+        )
+        connection.commit()
+
+
+def create_storage(backend_name, db_config=None, sqlite_path=None):
+    """สร้าง storage ตามชื่อที่ตั้งไว้ใน config ("sqlserver" หรือ "sqlite")"""
+    if backend_name == SqlServerStorage.name:
+        return SqlServerStorage(db_config)
+    if backend_name == SqliteStorage.name:
+        return SqliteStorage(sqlite_path)
+    raise ValueError(f"Unknown database backend: {backend_name}")
@@ -1,4 +1,3 @@
-import bcrypt
 from .db import get_connection
 
 
@@ -25,6 +24,8 @@ class User:
             return None
 
         # Regular users with hashed passwords
+        import bcrypt
+
         query = "SELECT username, password, fullname FROM edit_user WHERE username = ?"
         cursor.execute(query, (username,))
         user = cursor.fetchone()
@@ -54,6 +55,8 @@ class User:
             return False, "Username already exists"
 
         # Hash password before storing
+        import bcrypt
+
         hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
 
         try:
@@ -88,6 +91,8 @@ class User:
                 )
             else:
                 # สำหรับผู้ใช้ปกติ ใช้การเข้ารหัสด้วย bcrypt
+                import bcrypt
+
                 hashed_password = bcrypt.hashpw(
                     new_password.encode("utf-8"), bcrypt.gensalt()
                 )
@@ -123,6 +128,8 @@ class User:
                 return False, "ไม่พบผู้ใช้งานในระบบ"
 
             # เข้ารหัสชื่อผู้ใช้เพื่อใช้เป็นรหัสผ่านใหม่
+            import bcrypt
+
             hashed_password = bcrypt.hashpw(username.encode("utf-8"), bcrypt.gensalt())
 
             # อัปเดตรหัสผ่านของผู้ใช้
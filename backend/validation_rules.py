@@ -0,0 +1,578 @@
+import os
+import threading
+
+from frontend.utils.resource_path import resource_path
+from . import perf
+from .asset_cache import read_excel_cached
+
+_validation_data_cache = None
+_validation_data_lock = threading.Lock()
+_excel_rules_applied = False
+
+# กำหนดกฎการตรวจสอบสำหรับแต่ละฟิลด์
+FIELD_VALIDATION_RULES = {
+    "BuildingType": {
+        "type": "range",
+        "allowed_values": [f"{i:02d}" for i in range(1, 20)],  # 01-19
+        "allow_blank": False,
+        "description": "ต้องเป็น 01-19",
+    },
+    "BuildingTypeOther": {
+        "type": "text",
+        "max_length": 50,
+        "allow_blank": True,
+        "description": "ข้อความได้สูงสุด 50 ตัวอักษร",
+    },
+    "Residing": {
+        "type": "options",
+        "allowed_values": ["1", "2"],
+        "allow_blank": False,
+        "description": "ต้องเป็น 1 หรือ 2",
+    },
+    "HouseholdEnumeration": {
+        "type": "custom",
+        "allowed_values": ["11", "12", "13", "20", "21", "22", "23"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 11-13 หรือ 20-23",
+    },
+    "HouseholdEnumerationOther": {
+        "type": "text",
+        "max_length": 255,
+        "allow_blank": True,
+        "description": "ข้อความได้สูงสุด 255 ตัวอักษร",
+    },
+    "HouseholdType": {
+        "type": "range",
+        "allowed_values": ["1", "2", "3"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-3",
+    },
+    "NumberOfHousehold": {
+        "type": "int_range",
+        "min_value": 1,
+        "max_value": 99,
+        "allow_blank": True,
+        "description": "ต้องเป็นตัวเลข 1-99",
+    },
+    "TotalRoom": {
+        "type": "padded_number",
+        "length": 4,
+        "min_value": 1,
+        "max_value": 9999,
+        "allow_blank": True,
+        "description": "ต้องเป็น 0001-9999",
+    },
+    "RoomVacant": {
+        "type": "padded_number",
+        "length": 4,
+        "min_value": 1,
+        "max_value": 9999,
+        "allow_blank": True,
+        "description": "ต้องเป็น 0001-9999",
+    },
+    "RoomResidence": {
+        "type": "padded_number",
+        "length": 4,
+        "min_value": 1,
+        "max_value": 9999,
+        "allow_blank": True,
+        "description": "ต้องเป็น 0001-9999",
+    },
+    "Language": {
+        "type": "custom",
+        "allowed_values": ["1", "2", "3", "9"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-3 หรือ 9",
+    },
+    # "LanguageOther": {
+    #     "type": "custom",
+    #     "allowed_values": [f"{i:02d}" for i in range(2, 81)] + ["99"],
+    #     "allow_blank": True,
+    #     "description": "ต้องเป็น 02-80 หรือ 99",
+    # },
+    "HouseholdNumber": {
+        "type": "padded_number",
+        "length": 4,
+        "min_value": 1,
+        "max_value": 9999,
+        "allow_blank": True,
+        "description": "ต้องเป็น 0001-9999",
+    },
+    "ConstructionMaterial": {
+        "type": "range",
+        "allowed_values": ["1", "2", "3", "4", "5", "6"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-6",
+    },
+    "ConstructionMaterialOther": {
+        "type": "text",
+        "max_length": 50,
+        "allow_blank": True,
+        "description": "ข้อความได้สูงสุด 50 ตัวอักษร",
+    },
+    "TenureResidence": {
+        "type": "range",
+        "allowed_values": ["1", "2", "3", "4", "5", "6", "7"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-7",
+    },
+    "TenureResidenceOther": {
+        "type": "text",
+        "max_length": 30,
+        "allow_blank": True,
+        "description": "ข้อความได้สูงสุด 30 ตัวอักษร",
+    },
+    "TenureLand": {
+        "type": "range",
+        "allowed_values": ["1", "2", "3", "4", "5"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-5",
+    },
+    "TenureLandOther": {
+        "type": "text",
+        "max_length": 255,
+        "allow_blank": True,
+        "description": "ข้อความได้สูงสุด 255 ตัวอักษร",
+    },
+    "NumberOfHousueholdMember": {
+        "type": "int_range",
+        "min_value": 1,
+        "max_value": 9999,
+        "allow_blank": True,
+        "description": "ต้องเป็นตัวเลข 1-9999",
+    },
+    "HouseholdMemberNumber": {
+        "type": "padded_number",
+        "length": 5,
+        "min_value": 1,
+        "max_value": 99998,
+        "allow_blank": True,
+        "description": "ต้องเป็น 00001-99998",
+    },
+    "Title": {
+        "type": "custom",
+        "allowed_values": ["01", "02", "03", "04", "05", "09"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 01-05 หรือ 09",
+    },
+    "TitleOther": {
+        "type": "text",
+        "max_length": 50,
+        "allow_blank": True,
+        "description": "ข้อความได้สูงสุด 50 ตัวอักษร",
+    },
+    "Relationship": {
+        "type": "range",
+        "allowed_values": [f"{i:02d}" for i in range(0, 17)],  # 00-16
+        "allow_blank": True,
+        "description": "ต้องเป็น 00-16",
+    },
+    "Sex": {
+        "type": "options",
+        "allowed_values": ["1", "2"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1 หรือ 2",
+    },
+    "MonthOfBirth": {
+        "type": "custom",
+        "allowed_values": [f"{i:02d}" for i in range(1, 13)] + ["99"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 01-12 หรือ 99",
+    },
+    "YearOfBirth": {
+        "type": "custom",
+        "allowed_values": [str(i) for i in range(2419, 2569)] + ["9999"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 2419-2568 หรือ 9999",
+    },
+    "Age_01": {
+        "type": "padded_number",
+        "length": 3,
+        "min_value": 0,
+        "max_value": 150,
+        "allow_blank": True,
+        "description": "ต้องเป็น 000-150",
+    },
+    "Religion": {
+        "type": "range",
+        "allowed_values": ["1", "2", "3", "4", "5", "6", "7", "8", "9"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-9",
+    },
+    "ReligionOther": {
+        "type": "text",
+        "max_length": 50,
+        "allow_blank": True,
+        "description": "ข้อความได้สูงสุด 50 ตัวอักษร",
+    },
+    # "NationalityNumeric": {
+    #     "type": "custom",
+    #     "allowed_values": [f"{i:03d}" for i in range(4, 910)]
+    #     + ["997", "998", "999"],
+    #     "allow_blank": True,
+    #     "description": "ต้องเป็น 004-909 หรือ 997-999",
+    # },
+    "MaritalStatus": {
+        "type": "custom",
+        "allowed_values": ["1", "2", "3", "4", "5", "6", "7", "9"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-7 หรือ 9",
+    },
+    "EducationalAttainment": {
+        "type": "custom",
+        "allowed_values": [f"{i:02d}" for i in range(1, 13)] + ["98", "99"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 01-12 หรือ 98-99",
+    },
+    "EmploymentStatus": {
+        "type": "range",
+        "allowed_values": ["1", "2", "3", "4", "5", "6", "7", "8", "9"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-9",
+    },
+    "NameInHouseholdRegister": {
+        "type": "custom",
+        "allowed_values": ["1", "2", "3", "4", "5", "9"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-5 หรือ 9",
+    },
+    "NameInHouseholdRegisterOther": {
+        "type": "text",
+        "max_length": 2,
+        "allow_blank": True,
+        "description": "ข้อความได้สูงสุด 2 ตัวอักษร",
+    },
+    "DurationOfResidence": {
+        "type": "custom",
+        "allowed_values": ["0", "1", "2", "3", "4", "5", "6", "9"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 0-6 หรือ 9",
+    },
+    "MigrationCharecteristics": {
+        "type": "custom",
+        "allowed_values": ["1", "2", "3", "9"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-3 หรือ 9",
+    },
+    "MovedFromProvince": {
+        "type": "custom",
+        "allowed_values": (
+            ["10"]
+            + [str(i) for i in range(11, 20)]
+            + [str(i) for i in range(70, 78)]
+            + [str(i) for i in range(80, 87)]
+            + [str(i) for i in range(90, 97)]
+            + [str(i) for i in range(20, 28)]
+            + [str(i) for i in range(30, 50)]
+            + [str(i) for i in range(50, 59)]
+            + [str(i) for i in range(60, 68)]
+            + ["99"]
+        ),
+        "allow_blank": True,
+        "description": "ต้องเป็นรหัสจังหวัดที่กำหนด",
+    },
+    # "MovedFromAbroad": {
+    #     "type": "padded_number",
+    #     "length": 3,
+    #     "min_value": 0,
+    #     "max_value": 999,
+    #     "allow_blank": True,
+    #     "description": "ต้องเป็น 000-999",
+    # },
+    "MigrationReason": {
+        "type": "custom",
+        "allowed_values": ["1", "2", "3", "4", "5", "6", "7", "8", "9"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-8 หรือ 9",
+    },
+    "MigrationReasonOther": {
+        "type": "text",
+        "max_length": 255,
+        "allow_blank": True,
+        "description": "ข้อความได้สูงสุด 255 ตัวอักษร",
+    },
+    "Gender": {
+        "type": "range",
+        "allowed_values": ["1", "2", "3", "4", "5"],
+        "allow_blank": True,
+        "description": "ต้องเป็น 1-5",
+    },
+    "TotalPopulation": {
+        "type": "padded_number",
+        "length": 4,
+        "min_value": 1,
+        "max_value": 9999,
+        "allow_blank": True,
+        "description": "ต้องเป็น 0001-9999",
+    },
+    "TotalMale": {
+        "type": "padded_number",
+        "length": 4,
+        "min_value": 0,
+        "max_value": 9999,
+        "allow_blank": True,
+        "description": "ต้องเป็น 0000-9999",
+    },
+    "TotalFemale": {
+        "type": "padded_number",
+        "length": 4,
+        "min_value": 0,
+        "max_value": 9999,
+        "allow_blank": True,
+        "description": "ต้องเป็น 0000-9999",
+    },
+}
+
+
+def load_validation_data_from_excel():
+    """โหลดข้อมูลการตรวจสอบจากไฟล์ Excel"""
+    validation_data = {}
+
+    # กำหนดค่าเริ่มต้นในกรณีที่โหลดไฟล์ไม่ได้
+    default_values = {
+        "LanguageOther": [f"{i:02d}" for i in range(2, 81)] + ["99"],  # ค่าเดิม
+        "NationalityNumeric": [f"{i:03d}" for i in range(4, 910)]
+        + ["000", "910", "920", "930", "940", "990", "997", "998", "999"],
+        "MovedFromAbroad": [f"{i:03d}" for i in range(0, 1000)],  # 000-999
+    }
+
+    try:
+        # โหลดข้อมูล LanguageOther
+        language_other_path = resource_path("assets/language_other.xlsx")
+        if os.path.exists(language_other_path):
+            language_df = read_excel_cached(language_other_path)
+            if "LanguageOther_Code" in language_df.columns:
+                language_codes = (
+                    language_df["LanguageOther_Code"].dropna().astype(str).tolist()
+                )
+                language_codes = [
+                    code.strip() for code in language_codes if code.strip()
+                ]
+                if language_codes:  # ถ้ามีข้อมูล
+                    validation_data["LanguageOther"] = language_codes
+                else:
+                    validation_data["LanguageOther"] = default_values[
+                        "LanguageOther"
+                    ]
+            else:
+                validation_data["LanguageOther"] = default_values["LanguageOther"]
+        else:
+            validation_data["LanguageOther"] = default_values["LanguageOther"]
+    except Exception as e:
+        validation_data["LanguageOther"] = default_values["LanguageOther"]
+
+    try:
+        # โหลดข้อมูล NationalityNumeric
+        nationality_path = resource_path("assets/nationality.xlsx")
+        if os.path.exists(nationality_path):
+            nationality_df = read_excel_cached(nationality_path)
+            if "Nationality_Code_Numeric-3" in nationality_df.columns:
+                nationality_codes = (
+                    nationality_df["Nationality_Code_Numeric-3"]
+                    .dropna()
+                    .astype(str)
+                    .tolist()
+                )
+                nationality_codes = [
+                    code.strip() for code in nationality_codes if code.strip()
+                ]
+                # เพิ่มรหัสพิเศษ
+                additional_codes = [
+                    "000",
+                    "910",
+                    "920",
+                    "930",
+                    "940",
+                    "990",
+                    "997",
+                    "998",
+                    "999",
+                ]
+                nationality_codes.extend(additional_codes)
+                nationality_codes = list(set(nationality_codes))  # ลบค่าซ้ำ
+                if nationality_codes:
+                    validation_data["NationalityNumeric"] = nationality_codes
+                else:
+                    validation_data["NationalityNumeric"] = default_values[
+                        "NationalityNumeric"
+                    ]
+            else:
+                validation_data["NationalityNumeric"] = default_values[
+                    "NationalityNumeric"
+                ]
+        else:
+            validation_data["NationalityNumeric"] = default_values[
+                "NationalityNumeric"
+            ]
+    except Exception as e:
+        validation_data["NationalityNumeric"] = default_values["NationalityNumeric"]
+
+    try:
+        # โหลดข้อมูล MovedFromAbroad
+        country_path = resource_path("assets/country.xlsx")
+        if os.path.exists(country_path):
+            country_df = read_excel_cached(country_path)
+            if "Countries_Code_Num-3" in country_df.columns:
+                country_codes = (
+                    country_df["Countries_Code_Num-3"].dropna().astype(str).tolist()
+                )
+                country_codes = [
+                    code.strip() for code in country_codes if code.strip()
+                ]
+                if country_codes:
+                    validation_data["MovedFromAbroad"] = country_codes
+                else:
+                    validation_data["MovedFromAbroad"] = default_values[
+                        "MovedFromAbroad"
+                    ]
+            else:
+                validation_data["MovedFromAbroad"] = default_values[
+                    "MovedFromAbroad"
+                ]
+        else:
+            validation_data["MovedFromAbroad"] = default_values["MovedFromAbroad"]
+    except Exception as e:
+        validation_data["MovedFromAbroad"] = default_values["MovedFromAbroad"]
+
+    return validation_data
+
+
+def get_validation_data_from_excel():
+    """คืนข้อมูลการตรวจสอบจากไฟล์ Excel โดยโหลดจริงเพียงครั้งเดียวต่อโปรเซส"""
+    global _validation_data_cache
+    with _validation_data_lock:
+        if _validation_data_cache is None:
+            perf.count("validation_data.miss")
+            _validation_data_cache = load_validation_data_from_excel()
+        else:
+            perf.count("validation_data.hit")
+        return _validation_data_cache
+
+
+def update_validation_rules(validation_data_from_excel):
+    """อัปเดตกฎการตรวจสอบด้วยข้อมูลจากไฟล์ Excel"""
+
+    # อัปเดต LanguageOther
+    if "LanguageOther" in validation_data_from_excel:
+        FIELD_VALIDATION_RULES["LanguageOther"] = {
+            "type": "custom",
+            "allowed_values": validation_data_from_excel["LanguageOther"],
+            "allow_blank": True,
+            "description": "ต้องเป็นรหัสภาษาอื่นที่กำหนด",
+        }
+
+    # อัปเดต NationalityNumeric
+    if "NationalityNumeric" in validation_data_from_excel:
+        FIELD_VALIDATION_RULES["NationalityNumeric"] = {
+            "type": "custom",
+            "allowed_values": validation_data_from_excel["NationalityNumeric"],
+            "allow_blank": True,
+            "description": "ต้องเป็นรหัสสัญชาติที่กำหนด",
+        }
+
+    # อัปเดต MovedFromAbroad
+    if "MovedFromAbroad" in validation_data_from_excel:
+        # สำหรับ MovedFromAbroad ยังคงใช้ padded_number แต่เพิ่มการตรวจสอบค่าที่อนุญาต
+        FIELD_VALIDATION_RULES["MovedFromAbroad"] = {
+            "type": "excel_padded_number",  # ประเภทใหม่
+            "length": 3,
+            "allowed_values": validation_data_from_excel["MovedFromAbroad"],
+            "allow_blank": True,
+            "description": "ต้องเป็นรหัสประเทศที่กำหนด",
+        }
+
+
+def get_field_validation_rules():
+    """คืนกฎการตรวจสอบทั้งหมด รวมกฎที่มาจากไฟล์ Excel (โหลดและรวมให้ครั้งเดียว)"""
+    global _excel_rules_applied
+    if not _excel_rules_applied:
+        update_validation_rules(get_validation_data_from_excel())
+        _excel_rules_applied = True
+    return FIELD_VALIDATION_RULES
+
+
+def compile_validation_rules(rules=None):
+    """เตรียมกฎครั้งเดียวสำหรับการตรวจแบบ vectorized (allowed_values เป็น set สำหรับ isin)"""
+    compiled = {}
+    for field, rule in (rules or get_field_validation_rules()).items():
+        compiled_rule = dict(rule)
+        if "allowed_values" in rule:
+            compiled_rule["allowed_values"] = frozenset(rule["allowed_values"])
+        compiled[field] = compiled_rule
+    return compiled
+
+
+def _rule_checks(values, rule):
+    """
+    รายการ (mask, ข้อความ) ตามลำดับเดียวกับ EditDataScreen.validate_field_value
+    mask เป็น True ที่ค่าผิด (แต่ละค่าจะถูกแจ้งเฉพาะข้อแรกที่ผิด)
+    """
+    import pandas as pd
+
+    validation_type = rule.get("type", "text")
+    description = rule.get("description", "ค่าไม่ถูกต้อง")
+    lengths = values.str.len()
+
+    if validation_type == "text":
+        max_length = rule.get("max_length")
+        if not max_length:
+            return []
+        return [(lengths > max_length, f"ความยาวเกิน {max_length} ตัวอักษร")]
+
+    if validation_type in ("options", "range", "custom"):
+        return [(~values.isin(rule.get("allowed_values", ())), description)]
+
+    if validation_type == "int_range":
+        numbers = pd.to_numeric(values, errors="coerce")
+        min_value = rule.get("min_value", 0)
+        max_value = rule.get("max_value", float("inf"))
+        return [
+            (numbers.isna() | (numbers % 1 != 0), "ต้องเป็นตัวเลข"),
+            ((numbers < min_value) | (numbers > max_value), description),
+        ]
+
+    if validation_type in ("padded_number", "excel_padded_number"):
+        length = rule.get("length", 4 if validation_type == "padded_number" else 3)
+        checks = [
+            (lengths != length, f"ต้องมีความยาว {length} หลัก"),
+            (~values.str.isdigit(), "ต้องเป็นตัวเลขเท่านั้น"),
+        ]
+        if validation_type == "excel_padded_number":
+            checks.append((~values.isin(rule.get("allowed_values", ())), description))
+        else:
+            numbers = pd.to_numeric(values, errors="coerce")
+            checks.append(
+                (
+                    (numbers < rule.get("min_value", 0))
+                    | (numbers > rule.get("max_value", 9999)),
+                    description,
+                )
+            )
+        return checks
+
+    return []
+
+
+def find_invalid_values(frame, compiled_rules, check_blank=True):
+    """
+    ตรวจทุกคอลัมน์ของ frame (DataFrame ของข้อความ, ช่องว่าง = "") ที่มีกฎ ทีละคอลัมน์แบบ vectorized
+    check_blank=False ใช้เมื่อช่องว่างแปลว่า "ไม่เปลี่ยนค่า" (เช่นไฟล์แก้ไข)
+    คืน list ของ (index ของแถว, ฟิลด์, ข้อความ) เรียงตามคอลัมน์
+    """
+    invalid = []
+    for field in frame.columns:
+        rule = compiled_rules.get(field)
+        if rule is None:
+            continue
+        values = frame[field]
+        blank = values == ""
+        if check_blank and not rule.get("allow_blank", True):
+            for index in frame.index[blank]:
+                invalid.append((index, field, "ไม่สามารถเป็นค่าว่างได้"))
+        pending = ~blank
+        for mask, message in _rule_checks(values, rule):
+            failed = pending & mask.fillna(False).astype(bool)
+            for index in frame.index[failed]:
+                invalid.append((index, field, message))
+            pending &= ~failed
+    return invalid
@@ -0,0 +1,194 @@
+"""
+วัดประสิทธิภาพงานฝั่ง backend โดยไม่ใช้ PyQt (สำหรับ server / CI ที่ไม่มีหน้าจอ)
+
+ใช้ฐานข้อมูลจำลองแบบเดียวกับ benchmarks.run_benchmarks แล้วจับเวลา
+search_r_alldata, การส่งออก csv แบบ stream, การตรวจค่าทั้งผลค้นหาแบบ vectorized,
+save_edited_r_alldata_rows และ apply_corrections (UPDATE ... FROM ตารางชั่วคราว)
+
+ตัวอย่าง:
+    python -m benchmarks.headless
+    python -m benchmarks.headless --sizes 10000 100000 --repeat 3 --output headless.json
+    python cli.py benchmark --sizes 10000
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+
+import pandas as pd
+
+from backend import db
+from backend.alldata_operations import (
+    LOGICAL_PK_FIELDS,
+    ROW_VERSION_FIELD,
+    get_r_alldata_fields,
+    save_edited_r_alldata_rows,
+    search_r_alldata,
+)
+from backend.correction_import import apply_corrections
+from backend.exporter import export_search_results
+from backend.validation_rules import compile_validation_rules, find_invalid_values
+from benchmarks.run_benchmarks import SEARCH_CODES, measure, prepare_database
+
+DEFAULT_SIZES = [10_000, 100_000]
+DEFAULT_EDIT_ROWS = 1000
+SCENARIOS = ["search", "export", "validate", "save", "import"]
+
+# ฟิลด์ที่ scenario save / import เปลี่ยนค่า (สลับ 1/2 ทุกแถว)
+IMPORT_FIELD = "Religion"
+
+
+def _sample_rows(results, db_cols, edit_rows):
+    step = max(1, len(results) // edit_rows)
+    # ไม่เก็บ row_version เพราะบันทึกแถวเดิมซ้ำหลายรอบ (ดู run_benchmarks)
+    return [
+        {
+            field: value
+            for field, value in zip(db_cols, row)
+            if field != ROW_VERSION_FIELD
+        }
+        for row in results[::step][:edit_rows]
+    ]
+
+
+def run_size(rows, work_dir, repeat, edit_rows, scenarios):
+    """รันทุก scenario สำหรับข้อมูลขนาด rows แถว คืนรายการผลลัพธ์"""
+    prepare_database(rows, work_dir)
+    fields = get_r_alldata_fields()
+
+    results, db_cols, error_msg = search_r_alldata(
+        SEARCH_CODES, fields, LOGICAL_PK_FIELDS
+    )
+    if error_msg:
+        raise RuntimeError(error_msg)
+
+    rules = compile_validation_rules()
+    validated_fields = [field for field in db_cols if field in rules]
+    frame = pd.DataFrame([tuple(row) for row in results], columns=db_cols, dtype=object)
+    frame = frame[validated_fields].fillna("").astype(str)
+
+    sampled = _sample_rows(results, db_cols, edit_rows)
+    edit_timestamp = datetime.datetime.now()
+    # แก้หนึ่งช่องต่อแถว (เหมือนผู้ใช้แก้ในตาราง) เพื่อให้ทุกแถวมีรายการ audit
+    records = [
+        dict(
+            record,
+            **{IMPORT_FIELD: str(idx % 2 + 1)},
+            fullname="Benchmark User",
+            time_edit=edit_timestamp,
+        )
+        for idx, record in enumerate(sampled)
+    ]
+    changes = [
+        {
+            "row": idx,
+            "pk": tuple(str(record[pk]) for pk in LOGICAL_PK_FIELDS),
+            "field": IMPORT_FIELD,
+            "old": "",
+            "new": str(idx % 2 + 1),
+        }
+        for idx, record in enumerate(sampled)
+    ]
+    export_path = os.path.join(work_dir, f"bench_{rows}.csv")
+
+    def run_save():
+        saved, _, save_error = save_edited_r_alldata_rows(records, fields, sampled)
+        if save_error:
+            raise RuntimeError(save_error)
+
+    def run_import():
+        updated, _, import_error = apply_corrections(changes, "Benchmark User")
+        if import_error:
+            raise RuntimeError(import_error)
+
+    actions = {
+        "search": lambda: search_r_alldata(SEARCH_CODES, fields, LOGICAL_PK_FIELDS),
+        "export": lambda: export_search_results(
+            SEARCH_CODES, fields, export_path, fields, fields
+        ),
+        "validate": lambda: find_invalid_values(frame, rules),
+        "save": run_save,
+        "import": run_import,
+    }
+
+    size_results = []
+    for name in scenarios:
+        measured = measure(actions[name], repeat)
+        measured.update({"scenario": name, "rows": rows})
+        if name in ("save", "import"):
+            measured["edited_rows"] = len(records)
+        size_results.append(measured)
+        print(
+            f"{name:<9} rows={rows:>8,}  p50={measured['latency_ms']['p50']:>10.1f} ms"
+            f"  p95={measured['latency_ms']['p95']:>10.1f} ms"
+            f"  peak={measured['peak_memory_kb']:>10,.0f} KB",
+            flush=True,
+        )
+    return size_results
+
+
+def run_headless_benchmarks(
+    sizes=DEFAULT_SIZES,
+    repeat=5,
+    edit_rows=DEFAULT_EDIT_ROWS,
+    scenarios=SCENARIOS,
+    work_dir=None,
+):
+    """รันชุด benchmark ทั้งหมด คืน dict ที่พร้อมเขียนเป็น JSON"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="pop_edit_headless_") as temp_dir:
+        for rows in sizes:
+            results.extend(
+                run_size(rows, work_dir or temp_dir, repeat, edit_rows, scenarios)
+            )
+        # ปิดการเชื่อมต่อกับไฟล์ฐานข้อมูลชั่วคราวก่อนลบโฟลเดอร์
+        db.set_storage(None)
+
+    return {
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+            "repeat": repeat,
+            "edit_rows": edit_rows,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5, help="จำนวนรอบที่จับเวลา")
+    parser.add_argument(
+        "--edit-rows",
+        type=int,
+        default=DEFAULT_EDIT_ROWS,
+        help="จำนวนแถวที่ save / import ต่อรอบ",
+    )
+    parser.add_argument(
+        "--scenario", choices=SCENARIOS, action="append", help="เลือกเฉพาะบาง scenario"
+    )
+    parser.add_argument("--work-dir", help="โฟลเดอร์เก็บฐานข้อมูลจำลอง (ค่าเริ่มต้น: ชั่วคราว)")
+    parser.add_argument("--output", help="ไฟล์ JSON สำหรับเก็บผลลัพธ์")
+    args = parser.parse_args(argv)
+
+    report = run_headless_benchmarks(
+        sizes=args.sizes,
+        repeat=args.repeat,
+        edit_rows=args.edit_rows,
+        scenarios=args.scenario or SCENARIOS,
+        work_dir=args.work_dir,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+วัดผลของ index ที่ backend.index_advisor แนะนำ บนฐานข้อมูลจำลอง (SQLite) แบบก่อน/หลัง
+
+ขั้นตอน: สร้างข้อมูลจำลองทั้งประเทศ -> จับเวลาการค้นหาทั้งสี่ระดับพื้นที่และการบันทึก
+พร้อม EXPLAIN QUERY PLAN -> สร้าง index ตาม DDL ที่แนะนำ -> จับเวลาและดู plan อีกครั้ง
+รายงานมีทั้งผลก่อน/หลัง และ DDL ชุดเดียวกันสำหรับ SQL Server ให้ DBA นำไปใช้
+
+ตัวอย่าง:
+    python -m benchmarks.index_check
+    python -m benchmarks.index_check --rows 100000 --repeat 5 --output index_check.json
+"""
+import argparse
+import datetime
+import json
+import platform
+import sys
+import tempfile
+import time
+
+from backend import db
+from backend.alldata_operations import (
+    ROW_VERSION_FIELD,
+    build_search_query,
+    build_update_sql,
+    get_r_alldata_fields,
+    save_edited_r_alldata_rows,
+    search_r_alldata,
+)
+from backend.index_advisor import (
+    AREA_CODE_FIELDS,
+    LOGICAL_PK_FIELDS,
+    TABLE,
+    ddl_statements,
+    recommend,
+)
+from backend.storage import SqlServerStorage
+from benchmarks.run_benchmarks import measure, prepare_database
+
+DEFAULT_ROWS = 100_000
+DEFAULT_SAVE_ROWS = 100
+
+SEARCH_LEVELS = ["region", "province", "district", "subdistrict"]
+
+
+def _sample_codes(conn):
+    """
+    รหัสพื้นที่ทั้งสี่ระดับของตำบลที่มีจำนวนแถวเป็นค่ามัธยฐาน (ใช้เป็นเงื่อนไขค้นหาตัวอย่าง)
+    ไม่ใช้ตำบลที่ใหญ่ที่สุด เพราะข้อมูลจำลองกระจายแบบ Zipf ตำบลแรกๆ จึงใหญ่ผิดปกติ
+    """
+    codes_sql = ", ".join(AREA_CODE_FIELDS)
+    groups = conn.execute(
+        f"SELECT COUNT(*) FROM (SELECT 1 FROM {TABLE} GROUP BY {codes_sql})"
+    ).fetchone()[0]
+    row = conn.execute(
+        f"SELECT {codes_sql} FROM {TABLE} GROUP BY {codes_sql}"
+        " ORDER BY COUNT(*) LIMIT 1 OFFSET ?",
+        (groups // 2,),
+    ).fetchone()
+    return dict(zip(AREA_CODE_FIELDS, row))
+
+
+def _search_cases(sample):
+    cases = {}
+    for level, name in enumerate(SEARCH_LEVELS, 1):
+        codes = {field: None for field in AREA_CODE_FIELDS}
+        for field in AREA_CODE_FIELDS[:level]:
+            codes[field] = sample[field]
+        cases[f"search.{name}"] = codes
+    return cases
+
+
+def _records_to_save(fields, codes, save_rows):
+    """แถวตัวอย่างกระจายทั้งจังหวัด แปลงเป็น record แบบที่ execute_save_edits ส่งให้ backend"""
+    results, db_cols, error_msg = search_r_alldata(codes, fields, LOGICAL_PK_FIELDS)
+    if error_msg:
+        raise RuntimeError(error_msg)
+    step = max(1, len(results) // save_rows)
+    edit_timestamp = datetime.datetime.now()
+    records = []
+    for row in results[::step][:save_rows]:
+        record = dict(zip(db_cols, row))
+        record.pop(ROW_VERSION_FIELD, None)  # บันทึกซ้ำหลายรอบ (ดู run_benchmarks)
+        record["fullname"] = "Index Check"
+        record["time_edit"] = edit_timestamp
+        records.append(record)
+    return records
+
+
+def _query_plans(storage, fields, search_cases, save_record):
+    conn = storage.connect()
+    try:
+        plans = {}
+        for case, codes in search_cases.items():
+            query, params = build_search_query(codes, fields)
+            plans[case] = storage.explain(conn, query, params)["plan"]
+        sql_update, update_fields = build_update_sql(fields)
+        params = [save_record.get(field) for field in update_fields]
+        params += [save_record.get(pk) for pk in LOGICAL_PK_FIELDS]
+        plans["save"] = storage.explain(conn, sql_update, params)["plan"]
+    finally:
+        conn.close()
+    return plans
+
+
+def _measure_cases(fields, search_cases, records, repeat):
+    results = {}
+    for case, codes in search_cases.items():
+        rows = len(search_r_alldata(codes, fields, LOGICAL_PK_FIELDS)[0])
+        result = measure(
+            lambda codes=codes: search_r_alldata(codes, fields, LOGICAL_PK_FIELDS),
+            repeat,
+        )
+        result["rows"] = rows
+        results[case] = result
+
+    def run_save():
+        # ไม่มีช่องใดเปลี่ยนค่า จึงไม่มีรายการ audit (วัดเฉพาะผลของ index ต่อ UPDATE)
+        updated, _, error_msg = save_edited_r_alldata_rows(records, fields, records)
+        if error_msg:
+            raise RuntimeError(error_msg)
+
+    results["save"] = measure(run_save, repeat)
+    results["save"]["rows"] = len(records)
+    return results
+
+
+def run_index_check(
+    rows=DEFAULT_ROWS, repeat=5, save_rows=DEFAULT_SAVE_ROWS, work_dir=None, seed=0
+):
+    """คืนรายงานผลก่อน/หลังสร้าง index ที่แนะนำ (dict พร้อมเขียนเป็น JSON)"""
+    with tempfile.TemporaryDirectory(prefix="pop_edit_index_") as temp_dir:
+        prepare_database(rows, work_dir or temp_dir, seed=seed, province_codes=None)
+        storage = db.get_storage()
+        fields = get_r_alldata_fields()
+
+        conn = storage.connect()
+        try:
+            indexes_before = storage.list_indexes(conn, TABLE)
+            search_cases = _search_cases(_sample_codes(conn))
+        finally:
+            conn.close()
+
+        recommendations = recommend(indexes_before, storage.name, fields)
+        ddl = ddl_statements(storage, recommendations)
+        records = _records_to_save(fields, search_cases["search.province"], save_rows)
+
+        plans_before = _query_plans(storage, fields, search_cases, records[0])
+        before = _measure_cases(fields, search_cases, records, repeat)
+
+        conn = storage.connect()
+        try:
+            started = time.perf_counter()
+            for statement in ddl:
+                conn.execute(statement)
+            # ให้ planner ของ SQLite มีสถิติ เหมือน auto statistics ของ SQL Server
+            conn.execute("ANALYZE")
+            conn.commit()
+            build_ms = (time.perf_counter() - started) * 1000
+            indexes_after = storage.list_indexes(conn, TABLE)
+        finally:
+            conn.close()
+
+        plans_after = _query_plans(storage, fields, search_cases, records[0])
+        after = _measure_cases(fields, search_cases, records, repeat)
+
+    sqlserver_storage = SqlServerStorage(None)
+    sqlserver_recommendations = recommend(
+        indexes_before, sqlserver_storage.name, fields
+    )
+
+    results = []
+    for case in before:
+        before_ms = before[case]["latency_ms"]["min"]
+        after_ms = after[case]["latency_ms"]["min"]
+        results.append(
+            {
+                "case": case,
+                "rows": before[case]["rows"],
+                "before_ms": before_ms,
+                "after_ms": after_ms,
+                "speedup": round(before_ms / after_ms, 2) if after_ms else None,
+                "plan_before": plans_before[case],
+                "plan_after": plans_after[case],
+            }
+        )
+
+    return {
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "table_rows": rows,
+            "repeat": repeat,
+            "save_rows": len(records),
+        },
+        "indexes_before": indexes_before,
+        "indexes_after": indexes_after,
+        "recommendations": recommendations,
+        "ddl_sqlite": ddl,
+        "ddl_sqlserver": ddl_statements(sqlserver_storage, sqlserver_recommendations),
+        "index_build_ms": round(build_ms, 1),
+        "results": results,
+    }
+
+
+def format_summary(report):
+    lines = [
+        f"{TABLE}: {report['meta']['table_rows']:,} rows,"
+        f" index build {report['index_build_ms']:,.0f} ms",
+        "",
+    ]
+    for result in report["results"]:
+        lines.append(
+            f"{result['case']:<20} rows={result['rows']:>8,}"
+            f"  before={result['before_ms']:>10,.1f} ms"
+            f"  after={result['after_ms']:>10,.1f} ms"
+            f"  x{result['speedup'] or 0:,.1f}"
+        )
+        lines.append(f"{'':<20} plan before: {' | '.join(result['plan_before'])}")
+        lines.append(f"{'':<20} plan after:  {' | '.join(result['plan_after'])}")
+    lines.append("")
+    lines.append("DDL (SQL Server):")
+    lines.extend(f"  {statement};" for statement in report["ddl_sqlserver"])
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=5, help="จำนวนรอบที่จับเวลา")
+    parser.add_argument(
+        "--save-rows", type=int, default=DEFAULT_SAVE_ROWS, help="จำนวนแถวต่อการบันทึก"
+    )
+    parser.add_argument("--work-dir", help="โฟลเดอร์เก็บฐานข้อมูลจำลอง (ค่าเริ่มต้น: ชั่วคราว)")
+    parser.add_argument("--output", help="ไฟล์ JSON สำหรับเก็บผลลัพธ์")
+    args = parser.parse_args(argv)
+
+    report = run_index_check(
+        rows=args.rows,
+        repeat=args.repeat,
+        save_rows=args.save_rows,
+        work_dir=args.work_dir,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(format_summary(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
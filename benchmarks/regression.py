@@ -0,0 +1,179 @@
+"""
+เก็บผล benchmark เป็น baseline และเปรียบเทียบรอบใหม่กับ baseline
+
+ตรวจสามอย่างต่อ scenario:
+- เวลาที่เร็วที่สุดของแต่ละขนาดข้อมูล ช้ากว่า baseline เกิน time tolerance
+  (ใช้ค่าน้อยสุดแบบเดียวกับ timeit เพราะเวลาที่สูงกว่านั้นมักมาจากโปรเซสอื่นบนเครื่อง
+  ไม่ใช่จากโค้ดที่วัด และปรับตาม calibration_ms เพื่อหักความเร็วของเครื่องออก)
+- หน่วยความจำสูงสุด มากกว่า baseline เกิน memory tolerance
+- อัตราการโตของเวลาตามจำนวนแถว (ความชันแบบ log-log ระหว่างขนาดเล็กสุดกับใหญ่สุด)
+  สูงกว่า baseline เกิน scaling tolerance ซึ่งจับการกลับมาเป็น O(n^2) ได้
+  แม้เครื่องที่รันจะเร็วหรือช้ากว่าเครื่องที่ทำ baseline
+"""
+import datetime
+import json
+import math
+import os
+
+DEFAULT_TOLERANCES = {
+    "time": 0.5,  # ช้าลงได้ไม่เกิน 50%
+    "memory": 0.25,  # ใช้หน่วยความจำเพิ่มได้ไม่เกิน 25%
+    "scaling": 0.3,  # ความชัน log-log เพิ่มได้ไม่เกิน 0.3
+    "min_time_delta_ms": 5.0,  # ต่างกันน้อยกว่านี้ถือเป็น noise
+    "min_memory_delta_kb": 256.0,
+}
+
+# เวลาที่น้อยกว่านี้ไม่นำมาคำนวณความชัน เพราะ noise สูงเกินไป
+MIN_SCALING_TIME_MS = 1.0
+
+
+def scenario_key(scenario, rows):
+    return f"{scenario}/{rows}"
+
+
+def _machine_factor(result, entry):
+    """อัตราส่วนความเร็วเครื่องตอนทำ baseline ต่อรอบนี้ (1.0 ถ้าไม่มีข้อมูล calibration)"""
+    current = result.get("calibration_ms")
+    expected = entry.get("calibration_ms")
+    if not current or not expected:
+        return 1.0
+    return expected / current
+
+
+def scaling_exponents(results):
+    """
+    ความชัน log(เวลา)/log(จำนวนแถว) ของแต่ละ scenario จากขนาดเล็กสุดถึงใหญ่สุด
+    คืน {scenario: {"exponent": ..., "rows": [เล็กสุด, ใหญ่สุด]}}
+    """
+    by_scenario = {}
+    for result in results:
+        by_scenario.setdefault(result["scenario"], []).append(result)
+
+    exponents = {}
+    for scenario, runs in by_scenario.items():
+        runs = sorted(runs, key=lambda r: r["rows"])
+        smallest, largest = runs[0], runs[-1]
+        small_ms = smallest["latency_ms"]["min"]
+        large_ms = largest["latency_ms"]["min"]
+        if largest["rows"] <= smallest["rows"] or small_ms < MIN_SCALING_TIME_MS:
+            continue
+        # หักความเร็วเครื่องที่ต่างกันระหว่างสองขนาด (ถ้ามี calibration)
+        if smallest.get("calibration_ms") and largest.get("calibration_ms"):
+            large_ms *= smallest["calibration_ms"] / largest["calibration_ms"]
+        exponent = math.log(large_ms / small_ms) / math.log(
+            largest["rows"] / smallest["rows"]
+        )
+        exponents[scenario] = {
+            "exponent": round(exponent, 3),
+            "rows": [smallest["rows"], largest["rows"]],
+        }
+    return exponents
+
+
+def build_baseline(report, tolerances=None):
+    """สร้าง baseline จากผลของ run_benchmarks"""
+    merged_tolerances = dict(DEFAULT_TOLERANCES)
+    merged_tolerances.update(tolerances or {})
+    return {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "meta": report.get("meta", {}),
+        "tolerances": merged_tolerances,
+        "scenarios": {
+            scenario_key(r["scenario"], r["rows"]): {
+                "min_ms": r["latency_ms"]["min"],
+                "p50_ms": r["latency_ms"]["p50"],
+                "p95_ms": r["latency_ms"]["p95"],
+                "calibration_ms": r.get("calibration_ms"),
+                "peak_memory_kb": r["peak_memory_kb"],
+            }
+            for r in report["results"]
+        },
+        "scaling": scaling_exponents(report["results"]),
+    }
+
+
+def load_baseline(path):
+    """โหลด baseline คืน None ถ้ายังไม่มีไฟล์"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(baseline, path):
+    """เขียน baseline แบบ atomic (เขียนไฟล์ชั่วคราวแล้วค่อยแทนที่)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def _tolerance(name, entry, baseline, overrides):
+    """ลำดับความสำคัญ: ค่าที่ระบุตอนรัน > ค่าราย scenario ใน baseline > ค่าทั้งไฟล์ > ค่าเริ่มต้น"""
+    if overrides and overrides.get(name) is not None:
+        return overrides[name]
+    if entry and f"{name}_tolerance" in entry:
+        return entry[f"{name}_tolerance"]
+    return baseline.get("tolerances", {}).get(name, DEFAULT_TOLERANCES[name])
+
+
+def compare_with_baseline(report, baseline, overrides=None):
+    """
+    เปรียบเทียบผลรอบใหม่กับ baseline
+    คืน (regressions, notes) เป็นรายการข้อความ regressions ว่างแปลว่าผ่าน
+    """
+    regressions = []
+    notes = []
+    min_time_delta = _tolerance("min_time_delta_ms", None, baseline, overrides)
+    min_memory_delta = _tolerance("min_memory_delta_kb", None, baseline, overrides)
+
+    for result in report["results"]:
+        key = scenario_key(result["scenario"], result["rows"])
+        entry = baseline.get("scenarios", {}).get(key)
+        if entry is None:
+            notes.append(f"{key}: ไม่มีใน baseline (ข้าม)")
+            continue
+
+        time_tolerance = _tolerance("time", entry, baseline, overrides)
+        # เวลารอบนี้ปรับเป็นความเร็วของเครื่องตอนทำ baseline
+        factor = _machine_factor(result, entry)
+        current_ms = result["latency_ms"]["min"] * factor
+        limit_ms = max(
+            entry["min_ms"] * (1 + time_tolerance), entry["min_ms"] + min_time_delta
+        )
+        if current_ms > limit_ms:
+            regressions.append(
+                f"{key}: เวลาต่ำสุด {current_ms:,.1f} ms > {limit_ms:,.1f} ms "
+                f"(baseline {entry['min_ms']:,.1f} ms, +{time_tolerance:.0%}, "
+                f"machine factor {factor:.2f})"
+            )
+
+        memory_tolerance = _tolerance("memory", entry, baseline, overrides)
+        current_kb = result["peak_memory_kb"]
+        limit_kb = max(
+            entry["peak_memory_kb"] * (1 + memory_tolerance),
+            entry["peak_memory_kb"] + min_memory_delta,
+        )
+        if current_kb > limit_kb:
+            regressions.append(
+                f"{key}: peak memory {current_kb:,.0f} KB > {limit_kb:,.0f} KB "
+                f"(baseline {entry['peak_memory_kb']:,.0f} KB, +{memory_tolerance:.0%})"
+            )
+
+    scaling_tolerance = _tolerance("scaling", None, baseline, overrides)
+    baseline_scaling = baseline.get("scaling", {})
+    for scenario, current in scaling_exponents(report["results"]).items():
+        expected = baseline_scaling.get(scenario)
+        # เทียบความชันได้เฉพาะเมื่อช่วงจำนวนแถวเดียวกับ baseline
+        if expected is None or expected["rows"] != current["rows"]:
+            continue
+        limit = expected["exponent"] + scaling_tolerance
+        if current["exponent"] > limit:
+            regressions.append(
+                f"{scenario}: เวลาโตตามจำนวนแถวด้วยความชัน {current['exponent']:.2f}"
+                f" > {limit:.2f} (baseline {expected['exponent']:.2f})"
+            )
+
+    return regressions, notes
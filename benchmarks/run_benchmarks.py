@@ -0,0 +1,395 @@
+"""
+วัดประสิทธิภาพงานหลักของหน้าจอแก้ไขข้อมูลแบบ end-to-end
+
+ใช้ข้อมูลจาก benchmarks.synthetic_data ในฐานข้อมูลจำลอง (SQLite) ทีละขนาด
+แล้วจับเวลา search_r_alldata, display_results (Qt offscreen), filter_table_data,
+validate_edited_data และ save_edited_r_alldata_rows หลายรอบ รายงานเป็น
+percentile ของเวลา และหน่วยความจำสูงสุด (tracemalloc) ในรูปแบบ JSON
+
+ถ้าระบุ --baseline จะเทียบผลกับ baseline (ดู benchmarks.regression) และจบด้วย
+exit code 1 เมื่อพบ regression หรือ exit code 2 เมื่อไม่พบไฟล์ baseline
+(baseline ถูกเขียนเฉพาะเมื่อระบุ --update-baseline)
+
+ตัวอย่าง:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 --repeat 3 --output result.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --update-baseline
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --time-tolerance 0.5
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# ต้องตั้งก่อนสร้าง QApplication เพื่อให้รันได้โดยไม่มีหน้าจอ
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from backend import db
+from backend.alldata_operations import (
+    ROW_VERSION_FIELD,
+    get_r_alldata_fields,
+    save_edited_r_alldata_rows,
+    search_r_alldata,
+)
+from backend.storage import SqliteStorage
+from benchmarks.regression import (
+    build_baseline,
+    compare_with_baseline,
+    load_baseline,
+    save_baseline,
+)
+from benchmarks.synthetic_data import generate_population_frames, write_frames_to_sqlite
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+SCENARIOS = ["search", "display", "filter", "validate", "save"]
+
+# ข้อมูลทุกแถวอยู่ในจังหวัดเดียว เพื่อให้การค้นหาหนึ่งครั้งได้ครบทุกแถว
+BENCH_PROVINCE_CODE = 10
+SEARCH_CODES = {
+    "RegCode": None,
+    "ProvCode": BENCH_PROVINCE_CODE,
+    "DistCode": None,
+    "SubDistCode": None,
+}
+
+# ฟิลเตอร์ตัวอย่าง: คอลัมน์ Gender ที่มีเลข 1 (ได้ราว 1 ใน 5 ของแถว)
+FILTER_FIELD = "Gender"
+FILTER_TEXT = "1"
+
+
+def _percentile(sorted_values, pct):
+    """percentile แบบ nearest-rank จากรายการที่เรียงแล้ว"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize_latencies(seconds):
+    """สรุปเวลาหลายรอบเป็นมิลลิวินาที"""
+    values = sorted(s * 1000 for s in seconds)
+    return {
+        "min": round(values[0], 3),
+        "p50": round(_percentile(values, 50), 3),
+        "p90": round(_percentile(values, 90), 3),
+        "p95": round(_percentile(values, 95), 3),
+        "max": round(values[-1], 3),
+        "mean": round(statistics.fmean(values), 3),
+    }
+
+
+def _calibration_workload():
+    """งานคงที่ (ใช้ CPU ล้วน) สำหรับวัดความเร็วของเครื่อง ณ ขณะนั้น"""
+    rows = {str(i): i * 7 % 1000 for i in range(20_000)}
+    return sorted(rows.items(), key=lambda item: (item[1], item[0]))
+
+
+def measure(func, repeat, setup=None):
+    """
+    เรียก func ซ้ำ repeat รอบเพื่อจับเวลา แล้วอีกสองรอบภายใต้ tracemalloc
+    เพื่อวัดหน่วยความจำสูงสุด (แยกรอบกันเพราะ tracemalloc ทำให้ช้าลง)
+    setup ถูกเรียกก่อนทุกรอบและไม่นับเวลา เก็บขยะก่อนทุกรอบให้ผลนิ่งขึ้น
+
+    หน่วยความจำใช้ค่าน้อยสุดของสองรอบ เพราะรอบที่ตาราง wrapper ภายในของ
+    sip/Qt ขยายตัวจะสูงกว่าปกติราวเท่าตัว ทำให้เทียบกับ baseline ไม่นิ่ง
+
+    หลังแต่ละรอบจะจับเวลา _calibration_workload ด้วย (calibration_ms) เพื่อให้
+    การเทียบ baseline หักผลของเครื่องที่ช้าลงชั่วคราวหรือเครื่องคนละรุ่นได้
+    """
+    timings = []
+    calibrations = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+        # ปิด gc ระหว่าง calibration ไม่ให้เวลาขึ้นกับจำนวน object ที่ค้างอยู่ใน heap
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            _calibration_workload()
+            calibrations.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+
+    peaks = []
+    for _ in range(2):
+        if setup:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    peak = min(peaks)
+
+    return {
+        "repeat": repeat,
+        "latency_ms": summarize_latencies(timings),
+        "calibration_ms": round(min(calibrations) * 1000, 3),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def prepare_database(rows, work_dir, seed=0, province_codes=(BENCH_PROVINCE_CODE,)):
+    """
+    สร้างฐานข้อมูลจำลองขนาด rows แถวและตั้งให้ backend ใช้ฐานข้อมูลนี้
+    province_codes=None กระจายข้อมูลทั้งประเทศ
+    """
+    db_path = os.path.join(work_dir, f"bench_{rows}.sqlite3")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    frames = generate_population_frames(
+        rows,
+        seed=seed,
+        province_codes=list(province_codes) if province_codes else None,
+    )
+    write_frames_to_sqlite(frames, db_path)
+    db.set_storage(SqliteStorage(db_path))
+    return db_path
+
+
+def _filter_column(screen):
+    """คอลัมน์ในตาราง (รวมคอลัมน์ลำดับ) ของ FILTER_FIELD"""
+    return screen.column_mapper.get_fields_to_show().index(FILTER_FIELD) + 1
+
+
+def _build_edits(screen, edit_fraction):
+    """
+    สร้าง edited_items แบบเดียวกับที่ผู้ใช้แก้ในตาราง: แถวละหนึ่งช่อง
+    ใช้ค่าจากแถวถัดไปในฟิลด์เดียวกัน (จึงมีค่าผิดกฎปนอยู่ตามข้อมูลจำลอง)
+    """
+    displayed_fields = screen.column_mapper.get_fields_to_show()
+    editable_fields = [
+        field
+        for field in displayed_fields
+        if field in screen.FIELD_VALIDATION_RULES
+        and field not in screen.LOGICAL_PK_FIELDS
+        and field not in screen.NON_EDITABLE_FIELDS
+    ]
+    rows = screen.original_data_cache
+    step = max(1, round(1 / edit_fraction)) if edit_fraction > 0 else len(rows) + 1
+    edits = {}
+    for row_idx in range(0, len(rows), step):
+        field = editable_fields[row_idx % len(editable_fields)]
+        source = rows[(row_idx + 1) % len(rows)].get(field)
+        edits[(row_idx, displayed_fields.index(field) + 1)] = (
+            str(source) if source is not None else ""
+        )
+    return edits
+
+
+def _records_to_save(screen, edits):
+    """
+    แปลง edited_items เป็นรายการ record แบบที่ execute_save_edits ส่งให้ backend
+    คืน (records, original_rows) เรียงตรงกัน
+    """
+    displayed_fields = screen.column_mapper.get_fields_to_show()
+    edit_timestamp = datetime.datetime.now()
+    records = {}
+    for (row_idx, visual_col), new_text in edits.items():
+        record = records.get(row_idx)
+        if record is None:
+            record = screen.original_data_cache[row_idx].copy()
+            # บันทึกซ้ำหลายรอบ: ถ้าเก็บ row_version ไว้ รอบที่สองจะขัดแย้งกับรอบแรกทุกแถว
+            record.pop(ROW_VERSION_FIELD, None)
+            record["fullname"] = "Benchmark User"
+            record["time_edit"] = edit_timestamp
+            records[row_idx] = record
+        record[displayed_fields[visual_col - 1]] = new_text if new_text else None
+    return (
+        list(records.values()),
+        [screen.original_data_cache[row_idx] for row_idx in records],
+    )
+
+
+def run_size(screen, rows, work_dir, repeat, edit_fraction, scenarios):
+    """รันทุก scenario สำหรับข้อมูลขนาด rows แถว คืนรายการผลลัพธ์"""
+    prepare_database(rows, work_dir)
+    fields = get_r_alldata_fields()
+    pk_fields = screen.LOGICAL_PK_FIELDS
+    screen._all_db_fields_r_alldata = fields
+
+    results, db_cols, error_msg = search_r_alldata(SEARCH_CODES, fields, pk_fields)
+    if error_msg:
+        raise RuntimeError(error_msg)
+    if len(results) != rows:
+        raise RuntimeError(f"Expected {rows} rows from search, got {len(results)}")
+    screen.db_column_names = db_cols
+    screen.display_results(results)
+    edits = _build_edits(screen, edit_fraction)
+    records, original_rows = _records_to_save(screen, edits)
+
+    def reset_filters():
+        screen.edited_items.clear()
+        screen.active_filters = {
+            _filter_column(screen): {"text": FILTER_TEXT, "show_blank": False}
+        }
+
+    def set_edits():
+        screen.edited_items = dict(edits)
+
+    def run_save():
+        saved, _, save_error = save_edited_r_alldata_rows(
+            records, fields, original_rows
+        )
+        if save_error:
+            raise RuntimeError(save_error)
+
+    actions = {
+        "search": (lambda: search_r_alldata(SEARCH_CODES, fields, pk_fields), None),
+        "display": (lambda: screen.display_results(results), None),
+        "filter": (screen.filter_table_data, reset_filters),
+        "validate": (screen.validate_edited_data, set_edits),
+        "save": (run_save, None),
+    }
+
+    size_results = []
+    for name in scenarios:
+        func, setup = actions[name]
+        if name == "validate":
+            # validate ใช้ index แถวของข้อมูลทั้งหมด จึงต้องแสดงผลโดยไม่มีฟิลเตอร์
+            screen.display_results(results)
+        measured = measure(func, repeat, setup)
+        measured.update({"scenario": name, "rows": rows})
+        if name in ("validate", "save"):
+            measured["edited_rows"] = len(records)
+        size_results.append(measured)
+        print(
+            f"{name:<9} rows={rows:>8,}  p50={measured['latency_ms']['p50']:>10.1f} ms"
+            f"  p95={measured['latency_ms']['p95']:>10.1f} ms"
+            f"  peak={measured['peak_memory_kb']:>10,.0f} KB",
+            flush=True,
+        )
+    return size_results
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES, repeat=5, edit_fraction=0.1, scenarios=SCENARIOS, work_dir=None
+):
+    """รันชุด benchmark ทั้งหมด คืน dict ที่พร้อมเขียนเป็น JSON"""
+    # import PyQt เฉพาะตอนรันชุดนี้ ให้ measure / prepare_database ใช้ได้โดยไม่ต้องมี PyQt
+    from PyQt5.QtWidgets import QApplication
+
+    from frontend.edit_data_screen import EditDataScreen
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    screen = EditDataScreen()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="pop_edit_bench_") as temp_dir:
+        for rows in sizes:
+            results.extend(
+                run_size(
+                    screen, rows, work_dir or temp_dir, repeat, edit_fraction, scenarios
+                )
+            )
+        # ปิดการเชื่อมต่อกับไฟล์ฐานข้อมูลชั่วคราวก่อนลบโฟลเดอร์
+        db.set_storage(None)
+
+    screen.deleteLater()
+    app.processEvents()
+    return {
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+            "repeat": repeat,
+            "edit_fraction": edit_fraction,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5, help="จำนวนรอบที่จับเวลา")
+    parser.add_argument(
+        "--edit-fraction", type=float, default=0.1, help="สัดส่วนแถวที่ถูกแก้ไข"
+    )
+    parser.add_argument(
+        "--scenario", choices=SCENARIOS, action="append", help="เลือกเฉพาะบาง scenario"
+    )
+    parser.add_argument("--work-dir", help="โฟลเดอร์เก็บฐานข้อมูลจำลอง (ค่าเริ่มต้น: ชั่วคราว)")
+    parser.add_argument("--output", help="ไฟล์ JSON สำหรับเก็บผลลัพธ์")
+    parser.add_argument("--baseline", help="ไฟล์ baseline สำหรับตรวจ regression")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="เขียนผลรอบนี้เป็น baseline ใหม่ (แทนการเปรียบเทียบ)",
+    )
+    parser.add_argument("--time-tolerance", type=float, help="เช่น 0.5 = ช้าลงได้ 50%%")
+    parser.add_argument("--memory-tolerance", type=float, help="เช่น 0.25 = เพิ่มได้ 25%%")
+    parser.add_argument("--scaling-tolerance", type=float, help="ความชัน log-log ที่เพิ่มได้")
+    args = parser.parse_args(argv)
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline ต้องใช้คู่กับ --baseline")
+
+    # ตรวจก่อนรัน benchmark: baseline ที่หายหรือ path ผิดต้องไม่ผ่านการตรวจ regression
+    baseline = None
+    if args.baseline and not args.update_baseline:
+        baseline = load_baseline(args.baseline)
+        if baseline is None:
+            print(
+                f"Error: baseline file not found: {os.path.abspath(args.baseline)}"
+                " (create it with --update-baseline)",
+                file=sys.stderr,
+            )
+            return 2
+
+    tolerances = {
+        "time": args.time_tolerance,
+        "memory": args.memory_tolerance,
+        "scaling": args.scaling_tolerance,
+    }
+
+    report = run_benchmarks(
+        sizes=args.sizes,
+        repeat=args.repeat,
+        edit_fraction=args.edit_fraction,
+        scenarios=args.scenario or SCENARIOS,
+        work_dir=args.work_dir,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    elif not args.baseline:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if not args.baseline:
+        return 0
+
+    if args.update_baseline:
+        given = {name: value for name, value in tolerances.items() if value is not None}
+        save_baseline(build_baseline(report, given), args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions, notes = compare_with_baseline(report, baseline, tolerances)
+    for note in notes:
+        print(f"NOTE: {note}")
+    if regressions:
+        print(f"พบ regression {len(regressions)} รายการเมื่อเทียบกับ {args.baseline}:")
+        for regression in regressions:
+            print(f"  REGRESSION: {regression}")
+        return 1
+    print(f"ไม่พบ regression เมื่อเทียบกับ {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,281 @@
+"""
+สร้างข้อมูลประชากรจำลองจำนวนมากสำหรับทดสอบโหลดและ benchmark
+
+ข้อมูลกระจายตามพื้นที่จริงใน reg_prov_dist_subdist.xlsx ค่าฟิลด์สุ่มจาก
+FIELD_VALIDATION_RULES ให้ผ่านการตรวจสอบ ยกเว้นแถวส่วนหนึ่ง (ตาม error_rate)
+ที่จงใจใส่ค่าผิดไว้หนึ่งฟิลด์ การสร้างทำแบบ vectorized ด้วย numpy ทีละ chunk
+
+ตัวอย่าง:
+    python -m benchmarks.synthetic_data --rows 1000000 --sqlite data.sqlite3
+    python -m benchmarks.synthetic_data --rows 10000000 --out-dir out --format csv
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.location_data import LocationData
+from backend.storage import (
+    STANDIN_AREA_FIELDS,
+    STANDIN_PK_FIELDS,
+    STANDIN_R_ALLDATA_FIELDS,
+    SqliteStorage,
+)
+from backend.validation_rules import get_field_validation_rules
+
+# สัดส่วนค่าว่างของฟิลด์ที่อนุญาตให้ว่างได้
+BLANK_RATE = 0.1
+
+# จำนวนครัวเรือนต่อเขตแจงนับ (EA) และขนาดครัวเรือนเฉลี่ย
+HOUSEHOLDS_PER_EA = 200
+MEAN_HOUSEHOLD_SIZE = 3.0
+
+_FIRST_NAMES = np.array(
+    ["สมชาย", "สมหญิง", "มานะ", "มานี", "ปิติ", "ชูใจ", "วีระ", "สุดา", "ประเสริฐ", "กาญจนา"],
+    dtype=object,
+)
+_LAST_NAMES = np.array(
+    ["ใจดี", "รักไทย", "มีสุข", "ศรีสวัสดิ์", "บุญมา", "แก้วมณี", "ทองดี", "สุขสม"],
+    dtype=object,
+)
+_OTHER_TEXT = np.array(["อื่นๆ", "ไม่ระบุ", "ตามที่แจ้ง", "ทดสอบ"], dtype=object)
+
+
+def _area_weights(n_areas, skew, rng):
+    """น้ำหนักของแต่ละตำบลแบบ Zipf (skew=0 คือกระจายเท่ากัน) ในลำดับสุ่ม"""
+    ranks = rng.permutation(n_areas) + 1
+    weights = 1.0 / np.power(ranks, skew)
+    return weights / weights.sum()
+
+
+def _zero_pad(values, width):
+    return np.char.zfill(values.astype(str), width).astype(object)
+
+
+def _valid_values(rule, size, rng):
+    """สุ่มค่าที่ผ่านกฎการตรวจสอบของฟิลด์นั้น"""
+    rule_type = rule.get("type", "text")
+    if "allowed_values" in rule:
+        allowed = rule["allowed_values"]
+        if rule_type == "excel_padded_number":
+            # รายการจาก Excel มีบางรหัสที่ไม่ได้เติม 0 ซึ่งหน้าจอไม่ยอมรับ
+            allowed = [value for value in allowed if len(value) == rule["length"]]
+        allowed = np.array(allowed, dtype=object)
+        values = allowed[rng.integers(0, len(allowed), size)]
+    elif rule_type == "int_range":
+        values = rng.integers(rule["min_value"], rule["max_value"] + 1, size)
+        values = values.astype(str).astype(object)
+    elif rule_type == "padded_number":
+        values = rng.integers(rule["min_value"], rule["max_value"] + 1, size)
+        values = _zero_pad(values, rule["length"])
+    else:
+        max_length = rule.get("max_length")
+        vocabulary = np.array(
+            [text[:max_length] if max_length else text for text in _OTHER_TEXT],
+            dtype=object,
+        )
+        values = vocabulary[rng.integers(0, len(vocabulary), size)]
+
+    if rule.get("allow_blank", True):
+        values[rng.random(size) < BLANK_RATE] = None
+    return values
+
+
+def _invalid_value(rule):
+    """ค่าที่จงใจให้ไม่ผ่านกฎการตรวจสอบของฟิลด์นั้น"""
+    rule_type = rule.get("type", "text")
+    if not rule.get("allow_blank", True):
+        return None
+    if rule_type == "text":
+        return "x" * (rule.get("max_length", 50) + 1)
+    if rule_type == "int_range":
+        return str(rule["max_value"] + 1)
+    if rule_type in ("padded_number", "excel_padded_number"):
+        return "9" * (rule.get("length", 4) + 1)
+    return "X"
+
+
+def generate_population_frames(
+    total_rows,
+    skew=1.0,
+    error_rate=0.02,
+    seed=0,
+    chunk_size=500_000,
+    province_codes=None,
+):
+    """
+    สร้างข้อมูลจำลองเป็น DataFrame ทีละ chunk (คอลัมน์ตาม STANDIN_R_ALLDATA_FIELDS)
+
+    total_rows     จำนวนแถว (คน) ทั้งหมด
+    skew           ความเบ้ของจำนวนคนต่อตำบลแบบ Zipf (0 = เท่ากันทุกตำบล)
+    error_rate     สัดส่วนแถวที่มีค่าผิดกฎหนึ่งฟิลด์ (คอลัมน์ _invalid_field บอกว่าฟิลด์ไหน)
+    province_codes จำกัดเฉพาะจังหวัดที่กำหนด (None = ทั้งประเทศ)
+    """
+    rng = np.random.default_rng(seed)
+    rules = get_field_validation_rules()
+    survey_fields = [
+        field
+        for field in STANDIN_R_ALLDATA_FIELDS
+        if field not in STANDIN_PK_FIELDS and field not in STANDIN_AREA_FIELDS
+    ]
+    rule_fields = [field for field in survey_fields if field in rules]
+
+    areas = LocationData.get_instance().get_data()
+    if areas is None:
+        raise RuntimeError("reg_prov_dist_subdist.xlsx could not be loaded")
+    areas = areas[STANDIN_AREA_FIELDS].drop_duplicates(
+        ["ProvCode", "DistCode", "SubDistCode"]
+    )
+    if province_codes:
+        areas = areas[areas["ProvCode"].isin(province_codes)]
+    areas = areas.reset_index(drop=True)
+
+    # ทุกแถวได้ตำบลตามน้ำหนัก แล้วเรียงตามตำบลให้คนในพื้นที่เดียวกันอยู่ติดกัน
+    area_idx = np.sort(
+        rng.choice(
+            len(areas), size=total_rows, p=_area_weights(len(areas), skew, rng)
+        ).astype(np.int32)
+    )
+
+    # แบ่งครัวเรือน: เริ่มครัวเรือนใหม่ด้วยความน่าจะเป็น 1/ขนาดเฉลี่ย และทุกครั้งที่เปลี่ยนตำบล
+    area_start = np.ones(total_rows, dtype=bool)
+    area_start[1:] = area_idx[1:] != area_idx[:-1]
+    new_household = area_start | (rng.random(total_rows) < 1 / MEAN_HOUSEHOLD_SIZE)
+    household_seq = np.cumsum(new_household) - 1
+    first_household_of_area = np.maximum.accumulate(
+        np.where(area_start, household_seq, 0)
+    )
+    household_in_area = household_seq - first_household_of_area
+    household_first_row = np.maximum.accumulate(
+        np.where(new_household, np.arange(total_rows), 0)
+    )
+    person_in_household = np.arange(total_rows) - household_first_row + 1
+
+    for chunk_start in range(0, total_rows, chunk_size):
+        rows = slice(chunk_start, min(chunk_start + chunk_size, total_rows))
+        size = rows.stop - rows.start
+        chunk_areas = areas.iloc[area_idx[rows]].reset_index(drop=True)
+        hh_in_area = household_in_area[rows]
+
+        ea_code = (
+            _zero_pad(chunk_areas["ProvCode"].to_numpy(), 2)
+            + _zero_pad(chunk_areas["DistCode"].to_numpy(), 2)
+            + _zero_pad(chunk_areas["SubDistCode"].to_numpy(), 2)
+            + "1"
+            + _zero_pad(hh_in_area // HOUSEHOLDS_PER_EA + 1, 8)
+        )
+
+        columns = {
+            "EA_Code_15": ea_code,
+            "Building_No": _zero_pad(hh_in_area % HOUSEHOLDS_PER_EA + 1, 4),
+            "Household_No": np.full(size, "001", dtype=object),
+            "Population_No": _zero_pad(person_in_household[rows], 3),
+        }
+        for field in STANDIN_AREA_FIELDS:
+            columns[field] = chunk_areas[field].to_numpy().astype(object)
+
+        for field in survey_fields:
+            if field in rules:
+                columns[field] = _valid_values(rules[field], size, rng)
+            elif field == "FirstName":
+                columns[field] = _FIRST_NAMES[rng.integers(0, len(_FIRST_NAMES), size)]
+            elif field == "LastName":
+                columns[field] = _LAST_NAMES[rng.integers(0, len(_LAST_NAMES), size)]
+            else:
+                columns[field] = np.full(size, None, dtype=object)
+
+        # ใส่ค่าผิดกฎหนึ่งฟิลด์ในแถวที่สุ่มได้
+        invalid_field = np.full(size, None, dtype=object)
+        error_rows = np.flatnonzero(rng.random(size) < error_rate)
+        if len(error_rows) and rule_fields:
+            picked = rng.integers(0, len(rule_fields), len(error_rows))
+            for field_pos, field in enumerate(rule_fields):
+                target_rows = error_rows[picked == field_pos]
+                if len(target_rows):
+                    columns[field][target_rows] = _invalid_value(rules[field])
+                    invalid_field[target_rows] = field
+        columns["_invalid_field"] = invalid_field
+
+        # เก็บเป็น object ทั้งหมด เพื่อให้ค่าว่างเป็น None และรหัสเป็น int ของ Python
+        yield pd.DataFrame(columns, dtype=object)
+
+
+def write_frames_to_sqlite(frames, db_path, tables=("r_alldata", "r_alldata_edit")):
+    """เขียนข้อมูลลงฐานข้อมูลจำลอง (สร้างตารางให้ถ้ายังไม่มี) คืนจำนวนแถวที่เขียน"""
+    storage = SqliteStorage(db_path)
+    conn = storage.connect()
+    if conn is None:
+        raise RuntimeError(f"Cannot open SQLite database: {db_path}")
+
+    columns_sql = ", ".join(f"[{field}]" for field in STANDIN_R_ALLDATA_FIELDS)
+    placeholders = ", ".join("?" for _ in STANDIN_R_ALLDATA_FIELDS)
+    written = 0
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = OFF")
+        for frame in frames:
+            values = frame[STANDIN_R_ALLDATA_FIELDS].itertuples(index=False, name=None)
+            values = list(values)
+            for table in tables:
+                conn.executemany(
+                    f"INSERT INTO {table} ({columns_sql}) VALUES ({placeholders})",
+                    values,
+                )
+            conn.commit()
+            written += len(values)
+    finally:
+        conn.close()
+    return written
+
+
+def write_frames_to_files(frames, out_dir, file_format="csv"):
+    """เขียนข้อมูลเป็นไฟล์ทีละ chunk (csv หรือ parquet ถ้ามี pyarrow) คืนจำนวนแถวที่เขียน"""
+    os.makedirs(out_dir, exist_ok=True)
+    written = 0
+    for part, frame in enumerate(frames):
+        path = os.path.join(out_dir, f"population_part{part:04d}.{file_format}")
+        if file_format == "parquet":
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False, encoding="utf-8-sig")
+        written += len(frame)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="จำนวนแถวทั้งหมด")
+    parser.add_argument("--skew", type=float, default=1.0, help="ความเบ้ต่อพื้นที่ (Zipf)")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="สัดส่วนแถวที่ผิดกฎ")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    parser.add_argument(
+        "--province", type=int, action="append", help="จำกัดเฉพาะรหัสจังหวัด (ระบุซ้ำได้)"
+    )
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--sqlite", help="ไฟล์ฐานข้อมูลจำลองที่จะเขียนลง")
+    output.add_argument("--out-dir", help="โฟลเดอร์สำหรับเขียนไฟล์")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    frames = generate_population_frames(
+        args.rows,
+        skew=args.skew,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        province_codes=args.province,
+    )
+    if args.sqlite:
+        written = write_frames_to_sqlite(frames, args.sqlite)
+    else:
+        written = write_frames_to_files(frames, args.out_dir, args.format)
+    print(f"Generated {written:,} rows in {time.perf_counter() - started:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,271 @@
+"""
+ใช้งานแบบ command line (ไม่มีหน้าจอ และไม่ import PyQt) สำหรับงานอัตโนมัติและ server
+
+    python cli.py search --province 10 --district 1001 --output area.xlsx
+    python cli.py validate-area --province 10 --output-dir report
+    python cli.py import-corrections corrections.xlsx --editor "ชื่อ ผู้แก้ไข" --dry-run
+    python cli.py export --province 10 --workers 4        (ดู python -m backend.batch_jobs)
+    python cli.py benchmark --sizes 10000                 (ดู python -m benchmarks.headless)
+    python cli.py indexes --output indexes.sql            (ดู python -m backend.index_advisor)
+
+เลือกฐานข้อมูลด้วย POP_EDIT_DB_BACKEND / POP_EDIT_SQLITE_PATH เหมือนโปรแกรมหลัก
+แต่ละคำสั่ง import โมดูลที่ใช้เองตอนเรียก คำสั่งที่ไม่ต้องใช้ pandas จึงเริ่มทำงานได้เร็ว
+"""
+import argparse
+import sys
+
+AREA_CODE_OPTIONS = [
+    ("RegCode", "--region"),
+    ("ProvCode", "--province"),
+    ("DistCode", "--district"),
+    ("SubDistCode", "--subdistrict"),
+]
+
+
+def _add_area_arguments(parser):
+    for code_field, option in AREA_CODE_OPTIONS:
+        parser.add_argument(option, type=int, help=code_field)
+
+
+def _area_codes(args):
+    return {
+        code_field: getattr(args, option.lstrip("-"))
+        for code_field, option in AREA_CODE_OPTIONS
+    }
+
+
+def _error(message):
+    print(f"Error: {message}", file=sys.stderr)
+    return 2
+
+
+def cmd_search(args):
+    from backend.batch_jobs import job_fields
+    from backend.exporter import export_search_results
+
+    codes = _area_codes(args)
+    if all(code is None for code in codes.values()):
+        return _error("ต้องระบุรหัสพื้นที่อย่างน้อยหนึ่งระดับ")
+    try:
+        all_db_fields_r_alldata, export_fields, column_names = job_fields()
+        headers = (
+            export_fields
+            if args.field_names
+            else [column_names.get(field, field) for field in export_fields]
+        )
+        written = export_search_results(
+            codes,
+            all_db_fields_r_alldata,
+            args.output,
+            export_fields,
+            headers,
+        )
+    except (ValueError, RuntimeError, OSError) as e:
+        return _error(e)
+    print(f"{written:,} rows -> {args.output}")
+    return 0
+
+
+def cmd_validate_area(args):
+    import os
+
+    from backend import db
+    from backend.batch_jobs import (
+        area_label,
+        build_tasks,
+        format_summary,
+        job_fields,
+        merge_summaries,
+        process_area,
+        write_summary,
+    )
+    from backend.validation_rules import compile_validation_rules
+
+    codes = _area_codes(args)
+    if all(code is None for code in codes.values()):
+        return _error("ต้องระบุรหัสพื้นที่อย่างน้อยหนึ่งระดับ")
+    try:
+        all_db_fields_r_alldata, export_fields, column_names = job_fields()
+    except RuntimeError as e:
+        return _error(e)
+
+    output_dir = args.output_dir or os.path.join(".", f"validation_{area_label(codes)}")
+    (task,) = build_tasks([codes], output_dir, export_fields, extract_format=None)
+    connection = db.get_connection()
+    if connection is None:
+        return _error("Cannot connect to the database.")
+    try:
+        summary = process_area(
+            connection,
+            task,
+            all_db_fields_r_alldata,
+            column_names,
+            compile_validation_rules(),
+        )
+    finally:
+        connection.close()
+
+    merged = merge_summaries([summary], summary["seconds"], workers=1)
+    write_summary(merged, output_dir)
+    print(format_summary(merged))
+    if "validation" in summary["files"]:
+        print(f"invalid values: {summary['files']['validation']}")
+    if summary["error"]:
+        return 2
+    return 1 if summary["invalid_values"] else 0
+
+
+def _write_diff(path, changes, missing):
+    import csv
+
+    from backend.alldata_operations import LOGICAL_PK_FIELDS
+
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["row"] + LOGICAL_PK_FIELDS + ["field", "old", "new"])
+        for change in changes:
+            writer.writerow(
+                [change["row"], *change["pk"]]
+                + [change["field"], change["old"], change["new"]]
+            )
+        for row, pk in missing:
+            writer.writerow([row, *pk, "", "", "(not found)"])
+
+
+def cmd_import_corrections(args):
+    from backend.alldata_operations import get_r_alldata_fields
+    from backend.correction_import import (
+        apply_corrections,
+        build_diff,
+        load_corrections,
+        validate_corrections,
+    )
+
+    try:
+        frame, ignored_headers = load_corrections(args.file, get_r_alldata_fields())
+        errors = validate_corrections(frame)
+        if errors:
+            for message in errors[: args.max_errors]:
+                print(message, file=sys.stderr)
+            if len(errors) > args.max_errors:
+                print(f"... {len(errors) - args.max_errors:,} more", file=sys.stderr)
+            return 1
+        changes, missing = build_diff(frame)
+    except (ValueError, RuntimeError, OSError) as e:
+        return _error(e)
+
+    print(
+        f"{len(frame):,} rows in file, {len(changes):,} values to change"
+        f" in {len({change['pk'] for change in changes}):,} rows,"
+        f" {len(missing):,} rows not found"
+    )
+    if ignored_headers:
+        print("ignored columns: " + ", ".join(ignored_headers))
+    if args.diff_output:
+        _write_diff(args.diff_output, changes, missing)
+        print(f"diff -> {args.diff_output}")
+    if args.dry_run or not changes:
+        return 0
+
+    updated, conflicts, error_msg = apply_corrections(changes, args.editor)
+    if error_msg:
+        return _error(error_msg)
+    print(f"{updated:,} rows updated")
+    if conflicts:
+        print(
+            f"{len(conflicts):,} rows changed by another editor since the diff"
+            " (or deleted) were not updated; run the import again:",
+            file=sys.stderr,
+        )
+        for pk in conflicts[: args.max_errors]:
+            print("  " + " / ".join(pk), file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_export(argv):
+    from backend.batch_jobs import main
+
+    return main(argv)
+
+
+def cmd_benchmark(argv):
+    from benchmarks.headless import main
+
+    return main(argv)
+
+
+def cmd_indexes(argv):
+    from backend.index_advisor import main
+
+    return main(argv)
+
+
+# คำสั่งที่ส่งต่อ argument ทั้งหมด (รวม --help) ให้ main ของโมดูลนั้น
+FORWARD_COMMANDS = {
+    "export": (cmd_export, "partitioned parallel export/validation"),
+    "benchmark": (cmd_benchmark, "backend benchmark on a stand-in database"),
+    "indexes": (cmd_indexes, "index advisor for r_alldata_edit"),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Command line tools for r_alldata_edit (no GUI)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search = subparsers.add_parser(
+        "search", help="search one area and write the rows to xlsx/csv/parquet"
+    )
+    _add_area_arguments(search)
+    search.add_argument("--output", required=True, help="ไฟล์ผลลัพธ์ (.xlsx/.csv/.parquet)")
+    search.add_argument(
+        "--field-names", action="store_true", help="ใช้ชื่อฟิลด์ในฐานข้อมูลเป็นหัวคอลัมน์"
+    )
+    search.set_defaults(func=cmd_search)
+
+    validate = subparsers.add_parser(
+        "validate-area", help="validate every value of one area against the rules"
+    )
+    _add_area_arguments(validate)
+    validate.add_argument("--output-dir", help="โฟลเดอร์รายงาน")
+    validate.set_defaults(func=cmd_validate_area)
+
+    import_corrections = subparsers.add_parser(
+        "import-corrections", help="apply a corrections file keyed by the PK fields"
+    )
+    import_corrections.add_argument("file", help="ไฟล์แก้ไข (.xlsx/.csv)")
+    import_corrections.add_argument(
+        "--editor", required=True, help="ชื่อผู้แก้ไขที่บันทึกใน fullname"
+    )
+    import_corrections.add_argument(
+        "--dry-run", action="store_true", help="ตรวจและแสดงผลต่างโดยไม่บันทึก"
+    )
+    import_corrections.add_argument("--diff-output", help="เขียนค่าเดิม/ค่าใหม่ลงไฟล์ csv")
+    import_corrections.add_argument("--max-errors", type=int, default=50)
+    import_corrections.set_defaults(func=cmd_import_corrections)
+
+    # เพิ่มไว้เพื่อให้แสดงใน --help เท่านั้น main() ส่งต่อให้โมดูลก่อนถึง argparse
+    for name, (_, help_text) in FORWARD_COMMANDS.items():
+        subparsers.add_parser(name, help=help_text, add_help=False)
+
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in FORWARD_COMMANDS:
+        func, _ = FORWARD_COMMANDS[argv[0]]
+        return func(argv[1:])
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    # จำเป็นสำหรับ process pool ของคำสั่ง export เมื่อ build เป็น .exe ด้วย PyInstaller
+    from multiprocessing import freeze_support
+
+    freeze_support()
+    sys.exit(main())
@@ -1,20 +1,25 @@
 from PyQt5.QtWidgets import QMainWindow, QStackedWidget
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
+import importlib
 import os
 
-from .login_screen import LoginScreen
-from .add_user_screen import AddUserScreen
-from .edit_data_screen import EditDataScreen
-from .change_password_screen import ChangePasswordScreen
-from .admin_menu_screen import AdminMenuScreen
-from .reset_password_screen import ResetPasswordScreen
+from backend import metrics_export
+
+from .utils import startup_timeline
+from .utils.stall_detector import StallDetector
+from .utils.thread_shutdown import wait_or_abandon
+from .utils.warmup import BackendWarmupThread
 
 
 class MainApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.current_user = None  # เพิ่มตัวแปรเก็บข้อมูลผู้ใช้ปัจจุบัน
+        self.warmup_thread = None
+        self.stall_detector = None
+        self.metrics_exporter = None
+        self._first_paint_done = False
         self.setup_ui()
 
     def setup_ui(self):
@@ -25,25 +30,69 @@ class MainApp(QMainWindow):
 
         self.stacked_widget = QStackedWidget()
 
-        self.login_screen = LoginScreen(self)
-        self.admin_menu_screen = AdminMenuScreen(self)
-        self.add_user_screen = AddUserScreen(self)
-        self.reset_password_screen = ResetPasswordScreen(self)
-        self.edit_data_screen = EditDataScreen(self)
-        self.change_password_screen = ChangePasswordScreen(self)
-    
-        self.stacked_widget.addWidget(self.login_screen)
-        self.stacked_widget.addWidget(self.admin_menu_screen)
-        self.stacked_widget.addWidget(self.add_user_screen)
-        self.stacked_widget.addWidget(self.reset_password_screen)
-        self.stacked_widget.addWidget(self.edit_data_screen)
-        self.stacked_widget.addWidget(self.change_password_screen)
-
+        # หน้าจออื่นนอกจากหน้าล็อกอินจะถูก import และสร้างเมื่อมีการเปิดใช้งานครั้งแรก
+        self._screen_factories = {
+            "login": (".login_screen", "LoginScreen"),
+            "admin_menu": (".admin_menu_screen", "AdminMenuScreen"),
+            "add_user": (".add_user_screen", "AddUserScreen"),
+            "reset_password": (".reset_password_screen", "ResetPasswordScreen"),
+            "edit_data": (".edit_data_screen", "EditDataScreen"),
+            "change_password": (".change_password_screen", "ChangePasswordScreen"),
+        }
+        self._screens = {}
+
+        self.login_screen = self.get_screen("login")
         self.stacked_widget.setCurrentWidget(self.login_screen)
         self.setCentralWidget(self.stacked_widget)
 
         self.set_application_font()
 
+    def get_screen(self, screen_name):
+        """คืนหน้าจอตามชื่อ และสร้างหน้าจอนั้นถ้ายังไม่เคยถูกสร้าง"""
+        screen = self._screens.get(screen_name)
+        if screen is None:
+            module_name, class_name = self._screen_factories[screen_name]
+            module = importlib.import_module(module_name, __package__)
+            screen = getattr(module, class_name)(self)
+            self._screens[screen_name] = screen
+            self.stacked_widget.addWidget(screen)
+        return screen
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            startup_timeline.mark("first_paint")
+            # รอให้ event loop ว่างหลังวาดหน้าล็อกอินเสร็จก่อนเริ่มงาน background
+            QTimer.singleShot(0, self.on_login_ready)
+
+    def on_login_ready(self):
+        startup_timeline.mark("login_ready")
+        self.start_backend_warmup()
+        self.start_stall_detector()
+        self.start_metrics_export()
+
+    def start_stall_detector(self):
+        """เริ่มตรวจจับช่วงที่ UI ค้าง (ปิดได้ด้วย POP_EDIT_STALL_MS=0)"""
+        if self.stall_detector is None:
+            self.stall_detector = StallDetector(self)
+            self.stall_detector.start()
+
+    def start_metrics_export(self):
+        """เริ่มเขียนไฟล์ .prom เป็นระยะ ถ้าตั้ง POP_EDIT_METRICS_FILE ไว้"""
+        if self.metrics_exporter is None:
+            self.metrics_exporter = metrics_export.start_from_env()
+
+    def start_backend_warmup(self):
+        """เริ่มโหลดไฟล์อ้างอิงและโครงสร้างตารางใน background"""
+        if self.warmup_thread is not None:
+            return
+        self.warmup_thread = BackendWarmupThread(self)
+        self.warmup_thread.finished.connect(
+            lambda: startup_timeline.mark("edit_ready")
+        )
+        self.warmup_thread.start()
+
     def set_application_font(self):
         font = QFont("Segoe UI", 10)
         self.setFont(font)
@@ -63,34 +112,22 @@ class MainApp(QMainWindow):
     def navigate_to(self, screen_name):
         """Navigate to a specific screen."""
         if screen_name == "login":
-            if hasattr(self, "edit_data_screen") and self.edit_data_screen:
-                self.edit_data_screen.reset_screen_state()
-            if hasattr(self, "add_user_screen") and self.add_user_screen:
-                pass
+            edit_data_screen = self._screens.get("edit_data")
+            if edit_data_screen:
+                edit_data_screen.reset_screen_state()
             self.current_user = None
             self.stacked_widget.setCurrentWidget(self.login_screen)
 
             if hasattr(self.login_screen, "clear_inputs"):
                 self.login_screen.clear_inputs()
 
-        elif screen_name == "add_user":
-            self.stacked_widget.setCurrentWidget(self.add_user_screen)
-        elif screen_name == "edit_data":
-            self.stacked_widget.setCurrentWidget(self.edit_data_screen)
-        elif screen_name == "change_password":
-            self.stacked_widget.setCurrentWidget(self.change_password_screen)
-        elif screen_name == "admin_menu":
-            self.stacked_widget.setCurrentWidget(self.admin_menu_screen)
-        elif screen_name == "reset_password":
-            self.stacked_widget.setCurrentWidget(self.reset_password_screen)
+        elif screen_name in self._screen_factories:
+            self.stacked_widget.setCurrentWidget(self.get_screen(screen_name))
 
     def login_successful(self, user_data):
         """Handle successful login."""
         self.current_user = user_data
 
-        if hasattr(self.edit_data_screen, "update_user_fullname"):
-            self.edit_data_screen.update_user_fullname(user_data.get("fullname", "N/A"))
-
         from backend.auth import (
             Auth,
         )
@@ -98,7 +135,11 @@ class MainApp(QMainWindow):
         if Auth.is_admin(user_data["username"]):
             self.navigate_to("admin_menu")
         else:
+            edit_data_screen = self.get_screen("edit_data")
+            edit_data_screen.update_user_fullname(user_data.get("fullname", "N/A"))
             self.navigate_to("edit_data")
+            # ถามกู้คืนหลังออกจาก profile_action("login") ของ LoginScreen (รอผู้ใช้ไม่นับเป็นเวลาเข้าสู่ระบบ)
+            QTimer.singleShot(0, edit_data_screen.restore_edit_journal)
 
     def perform_logout(self):
         """Handles the full logout process including screen resets."""
@@ -107,5 +148,22 @@ class MainApp(QMainWindow):
     def navigate_to_change_password(self, user_data):
         """นำทางไปยังหน้าเปลี่ยนรหัสผ่านพร้อมส่งข้อมูลผู้ใช้"""
         self.current_user = user_data
-        self.change_password_screen.set_user_data(user_data)
-        self.stacked_widget.setCurrentWidget(self.change_password_screen)
+        change_password_screen = self.get_screen("change_password")
+        change_password_screen.set_user_data(user_data)
+        self.stacked_widget.setCurrentWidget(change_password_screen)
+
+    def closeEvent(self, event):
+        if self.stall_detector is not None:
+            self.stall_detector.stop()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        edit_data_screen = self._screens.get("edit_data")
+        if edit_data_screen is not None:
+            edit_data_screen.shutdown_background_work()
+            edit_data_screen.close_edit_journal()
+        # หยุด warm-up ก่อนขั้นถัดไปแล้วรอไม่เกิน SHUTDOWN_WAIT_MS
+        # (ขั้นที่ค้างอยู่ เช่นเชื่อมต่อฐานข้อมูล ไม่ทำให้การปิดหน้าต่างค้างตาม)
+        if self.warmup_thread is not None:
+            self.warmup_thread.requestInterruption()
+            wait_or_abandon(self.warmup_thread)
+        super().closeEvent(event)
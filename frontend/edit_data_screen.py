@@ -1,7 +1,6 @@
-import os
 import datetime
+import os
 
-import pandas as pd
 from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -17,340 +16,61 @@ from PyQt5.QtWidgets import (
     QMessageBox,
     QApplication,
     QLineEdit,
+    QCompleter,
+    QShortcut,
+    QFileDialog,
+    QProgressDialog,
 )
-from PyQt5.QtCore import Qt, QVariant
-from PyQt5.QtGui import QColor, QBrush, QFont, QFontMetrics
+from PyQt5.QtCore import Qt, QTimer, QVariant, QStringListModel
+from PyQt5.QtGui import QColor, QBrush, QFont, QFontMetrics, QKeySequence
 
+from backend import perf, profiling
 from backend.column_mapper import ColumnMapper
+from backend.edit_journal import SYNC_INTERVAL_MS, EditJournal, journal_value
+from backend.correction_import import (
+    apply_corrections,
+    build_diff,
+    load_corrections,
+    validate_corrections,
+)
+from backend.exporter import EXPORT_FORMATS, default_export_name
+from backend.location_data import LocationData
+from backend.validation_rules import (
+    FIELD_VALIDATION_RULES,
+    get_validation_data_from_excel,
+    update_validation_rules,
+)
 from backend.alldata_operations import (
-    fetch_all_r_alldata_fields,
+    NON_EDITABLE_FIELDS,
+    ROW_VERSION_FIELD,
+    get_r_alldata_fields,
     search_r_alldata,
     save_edited_r_alldata_rows,
 )
+from frontend.widgets.audit_history import AuditHistoryDialog
+from frontend.widgets.correction_preview import CorrectionPreviewDialog
 from frontend.widgets.multi_line_header import MultiLineHeaderView
+from frontend.widgets.original_diff import OriginalDiffDialog
+from frontend.widgets.save_conflict import SaveConflictDialog
+from frontend.widgets.perf_overlay import PerfOverlay
+from frontend.utils.change_feed import ChangeFeedPoller, latest_time_edit
 from frontend.utils.error_message import show_error_message, show_info_message
+from frontend.utils.export_worker import ExportThread
 from frontend.utils.shadow_effect import add_shadow_effect
-from frontend.utils.resource_path import resource_path
+from frontend.utils.thread_shutdown import wait_or_abandon
 
 
 class EditDataScreen(QWidget):
     LOGICAL_PK_FIELDS = ["EA_Code_15", "Building_No", "Household_No", "Population_No"]
 
-    NON_EDITABLE_FIELDS = ["FirstName", "LastName"]
-
-    # กำหนดกฎการตรวจสอบสำหรับแต่ละฟิลด์
-    FIELD_VALIDATION_RULES = {
-        "BuildingType": {
-            "type": "range",
-            "allowed_values": [f"{i:02d}" for i in range(1, 20)],  # 01-19
-            "allow_blank": False,
-            "description": "ต้องเป็น 01-19",
-        },
-        "BuildingTypeOther": {
-            "type": "text",
-            "max_length": 50,
-            "allow_blank": True,
-            "description": "ข้อความได้สูงสุด 50 ตัวอักษร",
-        },
-        "Residing": {
-            "type": "options",
-            "allowed_values": ["1", "2"],
-            "allow_blank": False,
-            "description": "ต้องเป็น 1 หรือ 2",
-        },
-        "HouseholdEnumeration": {
-            "type": "custom",
-            "allowed_values": ["11", "12", "13", "20", "21", "22", "23"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 11-13 หรือ 20-23",
-        },
-        "HouseholdEnumerationOther": {
-            "type": "text",
-            "max_length": 255,
-            "allow_blank": True,
-            "description": "ข้อความได้สูงสุด 255 ตัวอักษร",
-        },
-        "HouseholdType": {
-            "type": "range",
-            "allowed_values": ["1", "2", "3"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-3",
-        },
-        "NumberOfHousehold": {
-            "type": "int_range",
-            "min_value": 1,
-            "max_value": 99,
-            "allow_blank": True,
-            "description": "ต้องเป็นตัวเลข 1-99",
-        },
-        "TotalRoom": {
-            "type": "padded_number",
-            "length": 4,
-            "min_value": 1,
-            "max_value": 9999,
-            "allow_blank": True,
-            "description": "ต้องเป็น 0001-9999",
-        },
-        "RoomVacant": {
-            "type": "padded_number",
-            "length": 4,
-            "min_value": 1,
-            "max_value": 9999,
-            "allow_blank": True,
-            "description": "ต้องเป็น 0001-9999",
-        },
-        "RoomResidence": {
-            "type": "padded_number",
-            "length": 4,
-            "min_value": 1,
-            "max_value": 9999,
-            "allow_blank": True,
-            "description": "ต้องเป็น 0001-9999",
-        },
-        "Language": {
-            "type": "custom",
-            "allowed_values": ["1", "2", "3", "9"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-3 หรือ 9",
-        },
-        # "LanguageOther": {
-        #     "type": "custom",
-        #     "allowed_values": [f"{i:02d}" for i in range(2, 81)] + ["99"],
-        #     "allow_blank": True,
-        #     "description": "ต้องเป็น 02-80 หรือ 99",
-        # },
-        "HouseholdNumber": {
-            "type": "padded_number",
-            "length": 4,
-            "min_value": 1,
-            "max_value": 9999,
-            "allow_blank": True,
-            "description": "ต้องเป็น 0001-9999",
-        },
-        "ConstructionMaterial": {
-            "type": "range",
-            "allowed_values": ["1", "2", "3", "4", "5", "6"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-6",
-        },
-        "ConstructionMaterialOther": {
-            "type": "text",
-            "max_length": 50,
-            "allow_blank": True,
-            "description": "ข้อความได้สูงสุด 50 ตัวอักษร",
-        },
-        "TenureResidence": {
-            "type": "range",
-            "allowed_values": ["1", "2", "3", "4", "5", "6", "7"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-7",
-        },
-        "TenureResidenceOther": {
-            "type": "text",
-            "max_length": 30,
-            "allow_blank": True,
-            "description": "ข้อความได้สูงสุด 30 ตัวอักษร",
-        },
-        "TenureLand": {
-            "type": "range",
-            "allowed_values": ["1", "2", "3", "4", "5"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-5",
-        },
-        "TenureLandOther": {
-            "type": "text",
-            "max_length": 255,
-            "allow_blank": True,
-            "description": "ข้อความได้สูงสุด 255 ตัวอักษร",
-        },
-        "NumberOfHousueholdMember": {
-            "type": "int_range",
-            "min_value": 1,
-            "max_value": 9999,
-            "allow_blank": True,
-            "description": "ต้องเป็นตัวเลข 1-9999",
-        },
-        "HouseholdMemberNumber": {
-            "type": "padded_number",
-            "length": 5,
-            "min_value": 1,
-            "max_value": 99998,
-            "allow_blank": True,
-            "description": "ต้องเป็น 00001-99998",
-        },
-        "Title": {
-            "type": "custom",
-            "allowed_values": ["01", "02", "03", "04", "05", "09"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 01-05 หรือ 09",
-        },
-        "TitleOther": {
-            "type": "text",
-            "max_length": 50,
-            "allow_blank": True,
-            "description": "ข้อความได้สูงสุด 50 ตัวอักษร",
-        },
-        "Relationship": {
-            "type": "range",
-            "allowed_values": [f"{i:02d}" for i in range(0, 17)],  # 00-16
-            "allow_blank": True,
-            "description": "ต้องเป็น 00-16",
-        },
-        "Sex": {
-            "type": "options",
-            "allowed_values": ["1", "2"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1 หรือ 2",
-        },
-        "MonthOfBirth": {
-            "type": "custom",
-            "allowed_values": [f"{i:02d}" for i in range(1, 13)] + ["99"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 01-12 หรือ 99",
-        },
-        "YearOfBirth": {
-            "type": "custom",
-            "allowed_values": [str(i) for i in range(2419, 2569)] + ["9999"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 2419-2568 หรือ 9999",
-        },
-        "Age_01": {
-            "type": "padded_number",
-            "length": 3,
-            "min_value": 0,
-            "max_value": 150,
-            "allow_blank": True,
-            "description": "ต้องเป็น 000-150",
-        },
-        "Religion": {
-            "type": "range",
-            "allowed_values": ["1", "2", "3", "4", "5", "6", "7", "8", "9"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-9",
-        },
-        "ReligionOther": {
-            "type": "text",
-            "max_length": 50,
-            "allow_blank": True,
-            "description": "ข้อความได้สูงสุด 50 ตัวอักษร",
-        },
-        # "NationalityNumeric": {
-        #     "type": "custom",
-        #     "allowed_values": [f"{i:03d}" for i in range(4, 910)]
-        #     + ["997", "998", "999"],
-        #     "allow_blank": True,
-        #     "description": "ต้องเป็น 004-909 หรือ 997-999",
-        # },
-        "MaritalStatus": {
-            "type": "custom",
-            "allowed_values": ["1", "2", "3", "4", "5", "6", "7", "9"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-7 หรือ 9",
-        },
-        "EducationalAttainment": {
-            "type": "custom",
-            "allowed_values": [f"{i:02d}" for i in range(1, 13)] + ["98", "99"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 01-12 หรือ 98-99",
-        },
-        "EmploymentStatus": {
-            "type": "range",
-            "allowed_values": ["1", "2", "3", "4", "5", "6", "7", "8", "9"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-9",
-        },
-        "NameInHouseholdRegister": {
-            "type": "custom",
-            "allowed_values": ["1", "2", "3", "4", "5", "9"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-5 หรือ 9",
-        },
-        "NameInHouseholdRegisterOther": {
-            "type": "text",
-            "max_length": 2,
-            "allow_blank": True,
-            "description": "ข้อความได้สูงสุด 2 ตัวอักษร",
-        },
-        "DurationOfResidence": {
-            "type": "custom",
-            "allowed_values": ["0", "1", "2", "3", "4", "5", "6", "9"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 0-6 หรือ 9",
-        },
-        "MigrationCharecteristics": {
-            "type": "custom",
-            "allowed_values": ["1", "2", "3", "9"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-3 หรือ 9",
-        },
-        "MovedFromProvince": {
-            "type": "custom",
-            "allowed_values": (
-                ["10"]
-                + [str(i) for i in range(11, 20)]
-                + [str(i) for i in range(70, 78)]
-                + [str(i) for i in range(80, 87)]
-                + [str(i) for i in range(90, 97)]
-                + [str(i) for i in range(20, 28)]
-                + [str(i) for i in range(30, 50)]
-                + [str(i) for i in range(50, 59)]
-                + [str(i) for i in range(60, 68)]
-                + ["99"]
-            ),
-            "allow_blank": True,
-            "description": "ต้องเป็นรหัสจังหวัดที่กำหนด",
-        },
-        # "MovedFromAbroad": {
-        #     "type": "padded_number",
-        #     "length": 3,
-        #     "min_value": 0,
-        #     "max_value": 999,
-        #     "allow_blank": True,
-        #     "description": "ต้องเป็น 000-999",
-        # },
-        "MigrationReason": {
-            "type": "custom",
-            "allowed_values": ["1", "2", "3", "4", "5", "6", "7", "8", "9"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-8 หรือ 9",
-        },
-        "MigrationReasonOther": {
-            "type": "text",
-            "max_length": 255,
-            "allow_blank": True,
-            "description": "ข้อความได้สูงสุด 255 ตัวอักษร",
-        },
-        "Gender": {
-            "type": "range",
-            "allowed_values": ["1", "2", "3", "4", "5"],
-            "allow_blank": True,
-            "description": "ต้องเป็น 1-5",
-        },
-        "TotalPopulation": {
-            "type": "padded_number",
-            "length": 4,
-            "min_value": 1,
-            "max_value": 9999,
-            "allow_blank": True,
-            "description": "ต้องเป็น 0001-9999",
-        },
-        "TotalMale": {
-            "type": "padded_number",
-            "length": 4,
-            "min_value": 0,
-            "max_value": 9999,
-            "allow_blank": True,
-            "description": "ต้องเป็น 0000-9999",
-        },
-        "TotalFemale": {
-            "type": "padded_number",
-            "length": 4,
-            "min_value": 0,
-            "max_value": 9999,
-            "allow_blank": True,
-            "description": "ต้องเป็น 0000-9999",
-        },
-    }
+    NON_EDITABLE_FIELDS = NON_EDITABLE_FIELDS
+
+    # สีของแถว/ช่องที่ผู้อื่นบันทึกหลังจากค้นหา (จาก change feed)
+    REMOTE_CHANGE_COLOR = QColor("#e3f2fd")
+    REMOTE_CONFLICT_COLOR = QColor("#ffe0b2")
+
+    # กฎการตรวจสอบสำหรับแต่ละฟิลด์ (อยู่ใน backend.validation_rules)
+    FIELD_VALIDATION_RULES = FIELD_VALIDATION_RULES
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -360,53 +80,44 @@ class EditDataScreen(QWidget):
 
         self.db_column_names = []
         self.original_data_cache = []
+        self._original_row_index_by_pk = None  # PK -> index ใน original_data_cache
         self.filtered_data_cache = []  # เพิ่มสำหรับเก็บข้อมูลที่ถูกฟิลเตอร์
         self.edited_items = {}
         self.active_filters = {}  # เพิ่มสำหรับเก็บฟิลเตอร์
 
         self._all_db_fields_r_alldata = []
-
-        # โหลดข้อมูลการตรวจสอบจากไฟล์ Excel
-        self.validation_data_from_excel = self.load_validation_data_from_excel()
+        self._export_thread = None
+
+        # แถวที่ผู้อื่นบันทึกหลังจากค้นหา: index ใน original_data_cache -> แถวล่าสุด
+        self.remote_changed_rows = {}
+        self.change_feed = ChangeFeedPoller(self)
+        self.change_feed.changes_ready.connect(self.apply_remote_changes)
+
+        # journal บนเครื่องของการแก้ไขที่ยังไม่ได้บันทึก (สร้างเมื่อใช้ครั้งแรกหลังเข้าสู่ระบบ)
+        self.edit_journal = None
+        # กำลังค้นหาเพื่อกู้คืน journal (segment ใหม่จึงเขียนทับ segment ที่ค้างได้)
+        self._recovering_journal = False
+        # แจ้งผู้ใช้แล้วว่า journal ใช้ไม่ได้ (แจ้งครั้งเดียวต่อการเข้าใช้)
+        self._journal_error_reported = False
+        self._journal_sync_timer = QTimer(self)
+        self._journal_sync_timer.setSingleShot(True)
+        self._journal_sync_timer.setInterval(SYNC_INTERVAL_MS)
+        self._journal_sync_timer.timeout.connect(self.sync_edit_journal)
+
+        # โหลดข้อมูลการตรวจสอบจากไฟล์ Excel (ปกติถูกโหลดไว้แล้วตอน warm-up)
+        self.validation_data_from_excel = get_validation_data_from_excel()
 
         # อัปเดตกฎการตรวจสอบ
         self.update_validation_rules()
 
         self.setup_ui()
         self.load_location_data()
-        self._all_db_fields_r_alldata = fetch_all_r_alldata_fields()
+        # ใช้โครงสร้างตารางที่ warm-up ดึงไว้แล้ว ถ้ายังไม่มีจะดึงอีกครั้งตอนค้นหา
+        self._all_db_fields_r_alldata = get_r_alldata_fields(fetch_if_missing=False)
 
     def update_validation_rules(self):
         """อัปเดตกฎการตรวจสอบด้วยข้อมูลจากไฟล์ Excel"""
-
-        # อัปเดต LanguageOther
-        if "LanguageOther" in self.validation_data_from_excel:
-            self.FIELD_VALIDATION_RULES["LanguageOther"] = {
-                "type": "custom",
-                "allowed_values": self.validation_data_from_excel["LanguageOther"],
-                "allow_blank": True,
-                "description": "ต้องเป็นรหัสภาษาอื่นที่กำหนด",
-            }
-
-        # อัปเดต NationalityNumeric
-        if "NationalityNumeric" in self.validation_data_from_excel:
-            self.FIELD_VALIDATION_RULES["NationalityNumeric"] = {
-                "type": "custom",
-                "allowed_values": self.validation_data_from_excel["NationalityNumeric"],
-                "allow_blank": True,
-                "description": "ต้องเป็นรหัสสัญชาติที่กำหนด",
-            }
-
-        # อัปเดต MovedFromAbroad
-        if "MovedFromAbroad" in self.validation_data_from_excel:
-            # สำหรับ MovedFromAbroad ยังคงใช้ padded_number แต่เพิ่มการตรวจสอบค่าที่อนุญาต
-            self.FIELD_VALIDATION_RULES["MovedFromAbroad"] = {
-                "type": "excel_padded_number",  # ประเภทใหม่
-                "length": 3,
-                "allowed_values": self.validation_data_from_excel["MovedFromAbroad"],
-                "allow_blank": True,
-                "description": "ต้องเป็นรหัสประเทศที่กำหนด",
-            }
+        update_validation_rules(self.validation_data_from_excel)
 
     def update_user_fullname(self, fullname):
         if hasattr(self, "user_fullname_label"):
@@ -448,6 +159,24 @@ class EditDataScreen(QWidget):
         search_title = QLabel("ค้นหาข้อมูลตามพื้นที่")
         search_title.setObjectName("sectionTitle")
         search_layout.addWidget(search_title)
+
+        # ช่องค้นหาพื้นที่แบบพิมพ์บางส่วน เลือกแล้วจะตั้งค่า combo ทั้ง 4 ระดับให้ในครั้งเดียว
+        self.area_search_input = QLineEdit()
+        self.area_search_input.setObjectName("areaSearchInput")
+        self.area_search_input.setPlaceholderText(
+            "พิมพ์ชื่อหรือรหัสพื้นที่ เช่น เชียงใหม่ แจ่ม หรือ 502503"
+        )
+        self.area_search_input.textEdited.connect(self.on_area_search_text_edited)
+        self.area_search_input.returnPressed.connect(self.on_area_search_submitted)
+        self.area_search_model = QStringListModel(self)
+        self.area_completer = QCompleter(self.area_search_model, self)
+        self.area_completer.setWidget(self.area_search_input)
+        self.area_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.area_completer.setMaxVisibleItems(15)
+        self.area_completer.activated[str].connect(self.on_area_search_activated)
+        self.area_search_matches = {}
+        search_layout.addWidget(self.area_search_input)
+
         dropdown_layout = QHBoxLayout()
 
         region_layout = QVBoxLayout()
@@ -545,12 +274,46 @@ class EditDataScreen(QWidget):
         self.save_edits_button.setFixedWidth(130)
         self.save_edits_button.setEnabled(False)
 
+        self.export_button = QPushButton("ส่งออกไฟล์")
+        self.export_button.setObjectName("secondaryButton")
+        self.export_button.setCursor(Qt.PointingHandCursor)
+        self.export_button.clicked.connect(self.export_results)
+        self.export_button.setFixedWidth(130)
+
+        self.import_button = QPushButton("นำเข้าไฟล์แก้ไข")
+        self.import_button.setObjectName("secondaryButton")
+        self.import_button.setCursor(Qt.PointingHandCursor)
+        self.import_button.clicked.connect(self.import_corrections)
+        self.import_button.setFixedWidth(130)
+
+        self.history_button = QPushButton("ประวัติการแก้ไข")
+        self.history_button.setObjectName("secondaryButton")
+        self.history_button.setCursor(Qt.PointingHandCursor)
+        self.history_button.clicked.connect(self.show_edit_history)
+        self.history_button.setFixedWidth(130)
+
+        self.diff_button = QPushButton("เทียบข้อมูลเดิม")
+        self.diff_button.setObjectName("secondaryButton")
+        self.diff_button.setCursor(Qt.PointingHandCursor)
+        self.diff_button.clicked.connect(self.show_original_diff)
+        self.diff_button.setFixedWidth(130)
+
         buttons_under_table_layout = QHBoxLayout()
+        buttons_under_table_layout.addWidget(self.export_button)
+        buttons_under_table_layout.addWidget(self.import_button)
+        buttons_under_table_layout.addWidget(self.history_button)
+        buttons_under_table_layout.addWidget(self.diff_button)
         buttons_under_table_layout.addStretch()
         buttons_under_table_layout.addWidget(self.reset_edits_button)
         buttons_under_table_layout.addWidget(self.save_edits_button)
         results_layout.addLayout(buttons_under_table_layout)
 
+        # แผงแสดงประสิทธิภาพ (ซ่อนไว้ เปิด/ปิดด้วย Ctrl+Shift+P)
+        self.perf_overlay = PerfOverlay(self)
+        results_layout.addWidget(self.perf_overlay)
+        self.perf_overlay_shortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+        self.perf_overlay_shortcut.activated.connect(self.perf_overlay.toggle)
+
         content_layout.addWidget(results_section, 1)
         main_layout.addWidget(self.content_frame, 1)
         self.setLayout(main_layout)
@@ -575,6 +338,7 @@ class EditDataScreen(QWidget):
         self.header.filter_cleared.connect(self.clear_table_filter)
         self.results_table.setHorizontalHeader(self.header)
 
+    @perf.timed("table.headers")
     def setup_table_headers_text_and_widths(self):
         displayed_fields = self.column_mapper.get_fields_to_show()
         if not displayed_fields:
@@ -661,6 +425,7 @@ class EditDataScreen(QWidget):
 
             # ล้างการแก้ไขทั้งหมด
             self.edited_items.clear()
+            self.discard_edit_journal()
             self.update_save_button_state()
 
     def update_save_button_state(self):
@@ -699,6 +464,18 @@ class EditDataScreen(QWidget):
         self.save_edits_button.style().polish(self.save_edits_button)
         self.save_edits_button.update()
 
+    def find_original_row_index(self, row_data):
+        """หา index ของแถวใน original_data_cache จาก Primary Key (ไม่พบคืน -1)"""
+        # สร้าง index ครั้งแรกที่ใช้หลังจาก original_data_cache ถูกเปลี่ยน
+        if self._original_row_index_by_pk is None:
+            self._original_row_index_by_pk = {}
+            for idx, original_row in enumerate(self.original_data_cache):
+                pk = tuple(original_row.get(f) for f in self.LOGICAL_PK_FIELDS)
+                self._original_row_index_by_pk.setdefault(pk, idx)
+
+        pk = tuple(row_data.get(f) for f in self.LOGICAL_PK_FIELDS)
+        return self._original_row_index_by_pk.get(pk, -1)
+
     def handle_item_changed(self, item: QTableWidgetItem):
         """ตรวจสอบและจัดการการเปลี่ยนแปลงข้อมูลในตารางแบบเรียลไทม์"""
         if not item or not self.original_data_cache:
@@ -717,20 +494,9 @@ class EditDataScreen(QWidget):
         if hasattr(self, 'filtered_data_cache') and self.filtered_data_cache and row < len(self.filtered_data_cache):
             # หา index ของข้อมูลนี้ใน original_data_cache
             filtered_row_data = self.filtered_data_cache[row]
-            original_row_idx = -1
-        
+
             # ค้นหาใน original_data_cache โดยใช้ Primary Key
-            for i, original_row in enumerate(self.original_data_cache):
-                # เปรียบเทียบ Primary Key
-                is_same_row = True
-                for pk_field in self.LOGICAL_PK_FIELDS:
-                    if original_row.get(pk_field) != filtered_row_data.get(pk_field):
-                        is_same_row = False
-                        break
-            
-                if is_same_row:
-                    original_row_idx = i
-                    break
+            original_row_idx = self.find_original_row_index(filtered_row_data)
         
             if original_row_idx == -1:
                 return
@@ -782,18 +548,240 @@ class EditDataScreen(QWidget):
 
         if is_changed:
             # มีการเปลี่ยนแปลง - เพิ่มลงใน edited_items และเปลี่ยนสีพื้นหลัง
-            self.edited_items[edit_key] = new_text
+            # (setBackground ทำให้ itemChanged ถูกเรียกซ้ำ จึงเขียน journal เฉพาะเมื่อค่าเปลี่ยน)
+            if self.edited_items.get(edit_key) != new_text:
+                self.edited_items[edit_key] = new_text
+                self.journal_edit(original_row_dict, db_field_name_for_column, new_text)
             item.setBackground(QColor("lightyellow"))
         else:
             # ไม่มีการเปลี่ยนแปลง หรือเปลี่ยนกลับเป็นค่าเดิม - ลบออกจาก edited_items
             if edit_key in self.edited_items:
                 del self.edited_items[edit_key]
+                self.journal_edit(original_row_dict, db_field_name_for_column, None)
             item.setBackground(QBrush())
 
         # อัปเดตสถานะปุ่มทันทีหลังจากการเปลี่ยนแปลง
         self.update_save_button_state()
 
 
+    def _journal_user_key(self):
+        current_user = self.parent_app.current_user or {}
+        return current_user.get("username") or current_user.get("fullname")
+
+    def _get_edit_journal(self):
+        if self.edit_journal is None:
+            user_key = self._journal_user_key()
+            if user_key:
+                self.edit_journal = EditJournal(user_key)
+        return self.edit_journal
+
+    def start_edit_journal(self, processed_codes):
+        """
+        เริ่ม segment ของ journal สำหรับพื้นที่ที่เพิ่งค้นหา (segment เดิมของเราถูกตัดทิ้ง)
+        segment ที่ค้างจาก session ก่อนถูกเขียนทับเฉพาะตอนกู้คืน ไม่เช่นนั้นถูกย้ายไปเก็บ
+        """
+        journal = self._get_edit_journal()
+        if journal is None:
+            return
+        try:
+            set_aside_path = journal.start(
+                self.get_selected_names(),
+                processed_codes,
+                replace_unrecovered=self._recovering_journal,
+            )
+        except OSError as e:
+            self.edit_journal = None
+            self._report_journal_error(f"ไม่สามารถเขียนไฟล์ได้: {e}")
+            return
+        if set_aside_path:
+            # เรียกจากภายใน span ของการค้นหา จึงแสดงหลังจบ event ปัจจุบัน
+            QTimer.singleShot(
+                0,
+                lambda: show_error_message(
+                    self,
+                    "กู้คืนการแก้ไข",
+                    "พบการแก้ไขที่ยังไม่ได้กู้คืนจากครั้งก่อน ไฟล์ journal ถูกเก็บไว้ที่"
+                    f"\n{set_aside_path}",
+                ),
+            )
+
+    def journal_edit(self, original_row_dict, field, value):
+        """
+        ต่อท้าย journal หนึ่งช่อง (value None = กลับเป็นค่าเดิม) fsync เป็นชุดด้วย timer
+        เขียนไม่ได้ (ดิสก์เต็ม ฯลฯ) ก็แก้ไขต่อได้ตามปกติ เพียงแต่ไม่มีการกู้คืน
+        """
+        if self.edit_journal is None:
+            return
+        try:
+            self.edit_journal.record(
+                [original_row_dict.get(pk) for pk in self.LOGICAL_PK_FIELDS],
+                field,
+                value,
+                original_row_dict.get(ROW_VERSION_FIELD),
+            )
+        except OSError as e:
+            self.edit_journal = None
+            self._report_journal_error(f"ไม่สามารถเขียนไฟล์ได้: {e}")
+            return
+        if not self._journal_sync_timer.isActive():
+            self._journal_sync_timer.start()
+
+    def sync_edit_journal(self):
+        if self.edit_journal is None:
+            return
+        try:
+            self.edit_journal.sync()
+        except OSError as e:
+            self._report_journal_error(f"ไม่สามารถ sync ไฟล์ได้: {e}")
+
+    def _report_journal_error(self, reason):
+        """
+        แจ้งว่าการป้องกันการแก้ไขหายเมื่อโปรแกรมปิดผิดปกติใช้ไม่ได้ ครั้งเดียวต่อการเข้าใช้
+        (ไม่แจ้งซ้ำทุกช่องที่แก้) และนับใน perf ทุกครั้ง แสดงหลังจบ event ปัจจุบัน
+        เพราะอาจถูกเรียกระหว่าง itemChanged หรือภายใน span ของการค้นหา
+        """
+        perf.count("journal.errors")
+        if self._journal_error_reported:
+            return
+        self._journal_error_reported = True
+        QTimer.singleShot(
+            0,
+            lambda: show_info_message(
+                self,
+                "บันทึกการแก้ไขชั่วคราว",
+                f"{reason}\nแก้ไขและบันทึกต่อได้ตามปกติ แต่ถ้าโปรแกรมปิดผิดปกติ"
+                " การแก้ไขที่ยังไม่ได้บันทึกจะกู้คืนไม่ได้",
+            ),
+        )
+
+    def discard_edit_journal(self):
+        """การแก้ไขถูกบันทึกหรือยกเลิกแล้ว ตัด journal ทิ้ง"""
+        self._journal_sync_timer.stop()
+        if self.edit_journal is not None:
+            self.edit_journal.truncate()
+
+    def close_edit_journal(self):
+        """ปิด journal โดยเก็บไฟล์ไว้ (ออกจากระบบ / ปิดโปรแกรม)"""
+        self._journal_sync_timer.stop()
+        if self.edit_journal is not None:
+            self.edit_journal.close()
+            self.edit_journal = None
+        self._journal_error_reported = False
+
+    def restore_edit_journal(self):
+        """
+        ถ้ามีการแก้ไขที่ค้างใน journal ของผู้ใช้นี้ (โปรแกรมปิดก่อนบันทึก) ถามว่าจะกู้คืนหรือไม่
+        ถ้าใช่ ค้นหาพื้นที่เดิมแล้วใส่ค่าที่แก้ไว้กลับเข้าตาราง (ยังไม่บันทึก)
+        เรียกหลังเข้าสู่ระบบ และก่อนการค้นหาทุกครั้งที่ journal ยังค้างอยู่ (เช่นครั้งก่อนค้นหาไม่สำเร็จ)
+        คืน True ถ้าผู้ใช้เลือกกู้คืน (เปลี่ยนพื้นที่ที่เลือกแล้ว ผู้เรียกไม่ต้องค้นหาต่อ)
+        """
+        journal = self._get_edit_journal()
+        if journal is None or not journal.has_unrecovered():
+            return False
+        header, edits = journal.load()
+        if header is None or not edits:
+            journal.dismiss()
+            return False
+
+        area_text = " > ".join(header["names"]) or "-"
+        reply = QMessageBox.question(
+            self,
+            "กู้คืนการแก้ไข",
+            f"พบการแก้ไขที่ยังไม่ได้บันทึก {len(edits)} รายการ"
+            f" ของพื้นที่ {area_text} (ค้นหาเมื่อ {header['started']})"
+            "\nต้องการกู้คืนหรือไม่? ถ้าไม่ การแก้ไขเหล่านี้จะถูกลบ",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes,
+        )
+        if reply != QMessageBox.Yes:
+            journal.dismiss()
+            return False
+
+        self.select_area(header["names"])
+        if self.get_processed_codes() != header["codes"]:
+            self._set_aside_edit_journal(
+                f"ไม่พบพื้นที่ {area_text} ในรายการพื้นที่ปัจจุบัน"
+            )
+            return True
+
+        self._recovering_journal = True
+        try:
+            self.search_data()
+        finally:
+            self._recovering_journal = False
+        if not self.original_data_cache:
+            # ค้นหาไม่สำเร็จ (เช่นยังเชื่อมต่อไม่ได้) journal ยังค้างอยู่ จะถามอีกครั้งเมื่อค้นหาครั้งถัดไป
+            return True
+        self.replay_journal_edits(edits)
+        if journal.has_unrecovered():
+            # ไม่มีรายการใดใส่กลับเข้าตารางได้ segment ใหม่จึงยังไม่ได้เขียนทับ
+            self._set_aside_edit_journal("ไม่สามารถกู้คืนการแก้ไขเข้าผลค้นหาปัจจุบันได้")
+        return True
+
+    def _set_aside_edit_journal(self, reason):
+        """ย้าย journal ที่กู้คืนไม่ได้ไปเก็บ (ไม่ถูกถามซ้ำและไม่ถูกเขียนทับ) แล้วแจ้ง path จริง"""
+        try:
+            path = self.edit_journal.set_aside()
+        except OSError as e:
+            path = f"{self.edit_journal.path} ({e})"
+        show_error_message(
+            self, "กู้คืนการแก้ไข", f"{reason} ไฟล์ journal ถูกเก็บไว้ที่\n{path}"
+        )
+
+    @perf.timed("journal.replay")
+    def replay_journal_edits(self, edits):
+        """
+        ใส่ค่าจาก journal ลงตารางผ่าน handle_item_changed (จึงถูกบันทึกลง journal segment ใหม่ด้วย)
+        แถวที่ถูกผู้อื่นบันทึกหลังจากเราเริ่มแก้ (row_version ไม่ตรงกับใน journal) ทำเครื่องหมายสีส้ม
+        """
+        displayed_db_fields = self.column_mapper.get_fields_to_show()
+        visual_col_by_field = {
+            field: idx + 1 for idx, field in enumerate(displayed_db_fields)
+        }
+        restored = 0
+        skipped = 0
+        changed_rows = set()
+        self.results_table.setUpdatesEnabled(False)
+        try:
+            for entry in edits:
+                row_key = dict(zip(self.LOGICAL_PK_FIELDS, entry["pk"]))
+                original_row_idx = self.find_original_row_index(row_key)
+                visual_col = visual_col_by_field.get(entry["field"])
+                item = None
+                if original_row_idx != -1 and visual_col is not None:
+                    item = self.results_table.item(original_row_idx, visual_col)
+                if item is None:
+                    skipped += 1
+                    continue
+                original_row = self.original_data_cache[original_row_idx]
+                current_version = journal_value(original_row.get(ROW_VERSION_FIELD))
+                if entry["row_version"] != current_version:
+                    changed_rows.add(original_row_idx)
+                item.setText(entry["value"])
+                restored += 1
+            for row_idx in changed_rows:
+                sequence_item = self.results_table.item(row_idx, 0)
+                if sequence_item:
+                    row = self.original_data_cache[row_idx]
+                    sequence_item.setBackground(self.REMOTE_CONFLICT_COLOR)
+                    sequence_item.setToolTip(
+                        f"แก้ไขโดย {row.get('fullname') or '-'} เมื่อ {row.get('time_edit')}"
+                        "\nหลังจากการแก้ไขที่กู้คืน กรุณาตรวจสอบค่าก่อนบันทึก"
+                    )
+        finally:
+            self.results_table.setUpdatesEnabled(True)
+        perf.annotate(restored=restored, skipped=skipped)
+
+        message = f"กู้คืนการแก้ไข {restored} รายการแล้ว (ยังไม่ได้บันทึก)"
+        if changed_rows:
+            message += (
+                f"\n{len(changed_rows)} แถว (สีส้ม) ถูกผู้อื่นแก้ไขหลังจากนั้น"
+                " กรุณาตรวจสอบค่าก่อนบันทึก"
+            )
+        if skipped:
+            message += f"\n{skipped} รายการไม่พบแถวหรือคอลัมน์ในผลค้นหาปัจจุบัน"
+        show_info_message(self, "กู้คืนการแก้ไข", message)
+
     def search_data(self):
         """ค้นหาข้อมูล พร้อมเตือนถ้ามีการแก้ไขที่ยังไม่ได้บันทึก"""
 
@@ -818,49 +806,68 @@ class EditDataScreen(QWidget):
                 return
             # ถ้าเลือก Discard จะดำเนินการค้นหาต่อไป
 
+        # journal ที่ค้างจาก session ก่อน ถามกู้คืนก่อนเริ่ม segment ใหม่ของการค้นหานี้
+        if not self._recovering_journal and self.restore_edit_journal():
+            return
+
         if not self._all_db_fields_r_alldata:
-            self._all_db_fields_r_alldata = fetch_all_r_alldata_fields()
+            self._all_db_fields_r_alldata = get_r_alldata_fields()
             if not self._all_db_fields_r_alldata:
                 show_error_message(
                     self, "Error", "โครงสร้างตาราง r_alldata ไม่พร้อมใช้งาน ไม่สามารถค้นหาได้"
                 )
                 return
 
-        codes = self.get_selected_codes()
-        processed_codes = codes.copy()
-        if processed_codes["RegCode"] is not None:
-            processed_codes["RegCode"] = int(processed_codes["RegCode"])
-        if processed_codes["ProvCode"] is not None:
-            processed_codes["ProvCode"] = int(processed_codes["ProvCode"])
-        if processed_codes["DistCode"] is not None:
-            processed_codes["DistCode"] = int(processed_codes["DistCode"])
-        if processed_codes["SubDistCode"] is not None:
-            processed_codes["SubDistCode"] = int(processed_codes["SubDistCode"])
-
+        processed_codes = self.get_processed_codes()
         if all(value is None for value in processed_codes.values()):
             show_error_message(
                 self, "Search Error", "กรุณาเลือกเงื่อนไขในการค้นหาอย่างน้อยหนึ่งรายการ"
             )
             return
 
-        results, db_cols, error_msg = search_r_alldata(
-            processed_codes, self._all_db_fields_r_alldata, self.LOGICAL_PK_FIELDS
-        )
+        # span ของการค้นหาทั้งรอบ (ดึงข้อมูล + แสดงผล) ใช้แสดงใน PerfOverlay
+        # หน้าต่างแจ้งเตือน (modal) แสดงหลังออกจาก span เพื่อไม่ให้เวลารอผู้ใช้กดปิดถูกนับรวม
+        with profiling.profile_action("search"), perf.span("ui.search") as search_span:
+            rss_before_mb = perf.current_rss_mb() if perf.is_enabled() else None
 
-        if error_msg:
-            show_error_message(self, "Search Error", error_msg)
-            self.results_table.setRowCount(0)
-            self.original_data_cache.clear()
-            return
+            results, db_cols, error_msg = search_r_alldata(
+                processed_codes, self._all_db_fields_r_alldata, self.LOGICAL_PK_FIELDS
+            )
 
-        self.db_column_names = db_cols
+            if error_msg:
+                self.change_feed.stop()
+                self.results_table.setRowCount(0)
+                self.original_data_cache.clear()
+                self._original_row_index_by_pk = None
+            else:
+                self.db_column_names = db_cols
 
-        self.edited_items.clear()
-        # self.save_edits_button.setEnabled(False)
-        self.update_save_button_state()
+                self.edited_items.clear()
+                # self.save_edits_button.setEnabled(False)
+                self.update_save_button_state()
 
-        self.display_results(results)
+                self.display_results(results)
+                self.start_edit_journal(processed_codes)
+                self.change_feed.start(
+                    processed_codes,
+                    self._all_db_fields_r_alldata,
+                    latest_time_edit(self.original_data_cache),
+                )
+
+                search_span.set(rows=len(results))
+                if rss_before_mb is not None:
+                    rss_after_mb = perf.current_rss_mb()
+                    if rss_after_mb is not None:
+                        search_span.set(
+                            rss_delta_mb=round(rss_after_mb - rss_before_mb, 1)
+                        )
+
+        if error_msg:
+            show_error_message(self, "Search Error", error_msg)
+        elif not results and self.results_table.columnCount() > 0:
+            show_info_message(self, "ผลการค้นหา", "ไม่พบข้อมูลตามเงื่อนไขที่ระบุ")
 
+    @perf.timed("display")
     def display_results(self, results_tuples):
         self.setup_table_headers_text_and_widths()
 
@@ -872,6 +879,8 @@ class EditDataScreen(QWidget):
 
         self.results_table.setRowCount(0)
         self.original_data_cache.clear()
+        self._original_row_index_by_pk = None
+        self.remote_changed_rows.clear()
     
         # **สำคัญ: ล้างข้อมูลที่เกี่ยวข้องกับฟิลเตอร์**
         if hasattr(self, 'filtered_data_cache'):
@@ -886,55 +895,373 @@ class EditDataScreen(QWidget):
         self.edited_items.clear()
         self.update_save_button_state()
 
-        if not results_tuples:
-            if self.results_table.columnCount() > 0:
-                from frontend.utils.error_message import show_info_message
-                show_info_message(self, "ผลการค้นหา", "ไม่พบข้อมูลตามเงื่อนไขที่ระบุ")
-        else:
+        # ไม่พบข้อมูล: search_data แจ้งผู้ใช้หลังออกจาก span ของการค้นหา
+        if results_tuples:
+            perf.annotate(rows=len(results_tuples))
             self.results_table.setRowCount(len(results_tuples))
             displayed_db_fields_in_table = self.column_mapper.get_fields_to_show()
 
-            for row_idx, db_row_tuple in enumerate(results_tuples):
-                sequence_text = str(row_idx + 1)
-                sequence_item = QTableWidgetItem(sequence_text)
-                sequence_item.setTextAlignment(Qt.AlignCenter)
-                flags = sequence_item.flags()
-                sequence_item.setFlags(flags & ~Qt.ItemIsEditable)
-                sequence_item.setBackground(QColor("#f0f0f0"))
-                self.results_table.setItem(row_idx, 0, sequence_item)
-
-                current_row_full_data_dict = dict(
-                    zip(self.db_column_names, db_row_tuple)
+            # แปลงผลลัพธ์เป็น dict ก่อน แยกเวลาออกจากการสร้าง widget
+            with perf.span("display.rows"):
+                self.original_data_cache.extend(
+                    dict(zip(self.db_column_names, db_row_tuple))
+                    for db_row_tuple in results_tuples
                 )
-                self.original_data_cache.append(current_row_full_data_dict)
 
-                for db_field_idx, displayed_field_name in enumerate(
-                    displayed_db_fields_in_table
+            with perf.span("display.items"):
+                for row_idx, current_row_full_data_dict in enumerate(
+                    self.original_data_cache
                 ):
-                    visual_col_idx_table = db_field_idx + 1
-
-                    cell_value = ""
-                    if displayed_field_name in current_row_full_data_dict:
-                        raw_value = current_row_full_data_dict[displayed_field_name]
-                        cell_value = str(raw_value) if raw_value is not None else ""
-
-                    item = QTableWidgetItem(cell_value)
-                    item.setTextAlignment(Qt.AlignCenter)
-
-                    if (
-                        displayed_field_name in self.LOGICAL_PK_FIELDS
-                        or displayed_field_name in self.NON_EDITABLE_FIELDS
+                    sequence_text = str(row_idx + 1)
+                    sequence_item = QTableWidgetItem(sequence_text)
+                    sequence_item.setTextAlignment(Qt.AlignCenter)
+                    flags = sequence_item.flags()
+                    sequence_item.setFlags(flags & ~Qt.ItemIsEditable)
+                    sequence_item.setBackground(QColor("#f0f0f0"))
+                    self.results_table.setItem(row_idx, 0, sequence_item)
+
+                    for db_field_idx, displayed_field_name in enumerate(
+                        displayed_db_fields_in_table
                     ):
-                        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                        item.setBackground(QColor("#f0f0f0"))
-                    else:
-                        item.setFlags(item.flags() | Qt.ItemIsEditable)
-                    self.results_table.setItem(row_idx, visual_col_idx_table, item)
+                        visual_col_idx_table = db_field_idx + 1
+
+                        cell_value = ""
+                        if displayed_field_name in current_row_full_data_dict:
+                            raw_value = current_row_full_data_dict[displayed_field_name]
+                            cell_value = str(raw_value) if raw_value is not None else ""
+
+                        item = QTableWidgetItem(cell_value)
+                        item.setTextAlignment(Qt.AlignCenter)
+
+                        if (
+                            displayed_field_name in self.LOGICAL_PK_FIELDS
+                            or displayed_field_name in self.NON_EDITABLE_FIELDS
+                        ):
+                            item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+                            item.setBackground(QColor("#f0f0f0"))
+                        else:
+                            item.setFlags(item.flags() | Qt.ItemIsEditable)
+                        self.results_table.setItem(row_idx, visual_col_idx_table, item)
 
         self.results_table.itemChanged.connect(self.handle_item_changed)
         self.results_table.setUpdatesEnabled(True)
 
 
+    def _mark_remote_change(self, sequence_item, row, pending_edit=False):
+        editor = row.get("fullname") or "-"
+        tooltip = f"แก้ไขโดย {editor} เมื่อ {row.get('time_edit')}"
+        if pending_edit:
+            tooltip += "\nแถวนี้มีการแก้ไขที่ยังไม่ได้บันทึก เมื่อบันทึกจะให้เลือกรวมค่ากับค่าล่าสุด"
+        sequence_item.setBackground(
+            self.REMOTE_CONFLICT_COLOR if pending_edit else self.REMOTE_CHANGE_COLOR
+        )
+        sequence_item.setToolTip(tooltip)
+
+    @perf.timed("change_feed.merge")
+    def apply_remote_changes(self, results, db_cols):
+        """
+        รวมแถวที่ผู้อื่นบันทึก (จาก change feed) เข้า original_data_cache และทำเครื่องหมายในตาราง
+        แถวที่เรามีการแก้ไขค้างอยู่จะไม่ถูกแทนค่า (ตอนบันทึก row_version เดิมจะทำให้ได้หน้าต่างรวมค่า)
+        """
+        if not self.original_data_cache:
+            return
+        pending_rows = {row_idx for row_idx, _ in self.edited_items}
+        displayed_db_fields = self.column_mapper.get_fields_to_show()
+        if self.active_filters:
+            table_row_by_id = {
+                id(row_data): table_row
+                for table_row, row_data in enumerate(self.filtered_data_cache)
+            }
+        else:
+            table_row_by_id = None
+
+        merged = 0
+        self.results_table.setUpdatesEnabled(False)
+        try:
+            self.results_table.itemChanged.disconnect(self.handle_item_changed)
+        except TypeError:
+            pass
+        try:
+            for row_tuple in results:
+                row = dict(zip(db_cols, row_tuple))
+                original_row_idx = self.find_original_row_index(row)
+                if original_row_idx == -1:
+                    continue
+                cached_row = self.original_data_cache[original_row_idx]
+                if cached_row.get(ROW_VERSION_FIELD) == row.get(ROW_VERSION_FIELD):
+                    continue
+                self.remote_changed_rows[original_row_idx] = row
+                pending_edit = original_row_idx in pending_rows
+                if not pending_edit:
+                    cached_row.update(row)
+                    merged += 1
+
+                if table_row_by_id is None:
+                    table_row = original_row_idx
+                else:
+                    table_row = table_row_by_id.get(id(cached_row))
+                if table_row is None or table_row >= self.results_table.rowCount():
+                    continue
+                sequence_item = self.results_table.item(table_row, 0)
+                if sequence_item:
+                    self._mark_remote_change(sequence_item, row, pending_edit)
+                if pending_edit:
+                    continue
+                for db_field_idx, field in enumerate(displayed_db_fields):
+                    item = self.results_table.item(table_row, db_field_idx + 1)
+                    value = row.get(field)
+                    text = str(value) if value is not None else ""
+                    if item and item.text() != text:
+                        item.setText(text)
+                        item.setBackground(self.REMOTE_CHANGE_COLOR)
+        finally:
+            self.results_table.itemChanged.connect(self.handle_item_changed)
+            self.results_table.setUpdatesEnabled(True)
+        perf.annotate(rows=len(results), merged=merged)
+
+    def export_results(self):
+        """ส่งออกแถวที่แสดงอยู่ (หลังใช้ฟิลเตอร์) เป็นไฟล์ xlsx / csv / parquet"""
+        rows = (
+            self.filtered_data_cache if self.active_filters else self.original_data_cache
+        )
+        if not rows:
+            show_info_message(self, "ส่งออกไฟล์", "ไม่มีข้อมูลให้ส่งออก กรุณาค้นหาข้อมูลก่อน")
+            return
+        if self._export_thread is not None:
+            return  # กำลังส่งออกอยู่
+        if self.edited_items:
+            show_info_message(
+                self,
+                "ส่งออกไฟล์",
+                f"มีการแก้ไข {len(self.edited_items)} รายการที่ยังไม่ได้บันทึก "
+                "ไฟล์ที่ส่งออกจะมีเฉพาะข้อมูลที่บันทึกแล้ว",
+            )
+
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "ส่งออกไฟล์",
+            default_export_name(self.get_selected_codes(), "xlsx"),
+            ";;".join(EXPORT_FORMATS.values()),
+        )
+        if not path:
+            return
+        # เติมนามสกุลตามชนิดไฟล์ที่เลือก ถ้าผู้ใช้ไม่ได้พิมพ์มาเอง
+        if os.path.splitext(path)[1].lower().lstrip(".") not in EXPORT_FORMATS:
+            file_format = next(
+                (fmt for fmt, label in EXPORT_FORMATS.items() if label == selected_filter),
+                "xlsx",
+            )
+            path = f"{path}.{file_format}"
+
+        # ใส่ Primary Key ไว้หน้าสุด ให้แก้ไฟล์แล้วนำเข้ากลับด้วย "นำเข้าไฟล์แก้ไข" ได้
+        shown_fields = self.column_mapper.get_fields_to_show()
+        fields = [
+            pk for pk in self.LOGICAL_PK_FIELDS if pk not in shown_fields
+        ] + list(shown_fields)
+        headers = [self.column_mapper.get_column_name(field) for field in fields]
+
+        progress_dialog = QProgressDialog(
+            f"กำลังส่งออก {len(rows):,} แถว...", "ยกเลิก", 0, len(rows), self
+        )
+        progress_dialog.setWindowTitle("ส่งออกไฟล์")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(0)
+        progress_dialog.setAutoClose(False)
+        progress_dialog.setAutoReset(False)
+
+        # ส่งสำเนารายการแถวให้ thread เพื่อไม่ให้ได้รับผลจากการค้นหาใหม่ระหว่างเขียนไฟล์
+        export_thread = ExportThread(list(rows), fields, headers, path, self)
+        export_thread.progress.connect(progress_dialog.setValue)
+        progress_dialog.canceled.connect(export_thread.cancel)
+        export_thread.completed.connect(
+            lambda written: show_info_message(
+                self, "ส่งออกไฟล์", f"ส่งออก {written:,} แถวไปที่\n{path}\nเรียบร้อยแล้ว"
+            )
+        )
+        export_thread.failed.connect(
+            lambda message: show_error_message(
+                self, "ส่งออกไฟล์", f"ไม่สามารถส่งออกไฟล์ได้: {message}"
+            )
+        )
+        export_thread.finished.connect(progress_dialog.close)
+        export_thread.finished.connect(self._on_export_finished)
+        self._export_thread = export_thread
+        export_thread.start()
+
+    def shutdown_background_work(self):
+        """
+        ปิดโปรแกรม: ยกเลิกการส่งออกที่ค้างอยู่ (ไฟล์ .part ถูกลบ) และหยุดดึงแถวที่ผู้อื่นแก้
+        แล้วรอ thread จบ เพื่อไม่ให้ QThread ที่ยังทำงานถูกทำลายพร้อมหน้าต่าง
+        """
+        self.change_feed.shutdown()
+        if self._export_thread is not None:
+            self._export_thread.cancel()
+            wait_or_abandon(self._export_thread)
+
+    def _on_export_finished(self):
+        export_thread, self._export_thread = self._export_thread, None
+        if export_thread is not None:
+            export_thread.deleteLater()
+
+    def import_corrections(self):
+        """
+        นำเข้าไฟล์แก้ไข (xlsx / csv) ที่อ้างอิงแถวด้วย Primary Key ทั้ง 4 คอลัมน์
+        ตรวจค่าทั้งไฟล์ -> แสดงค่าเดิม/ค่าใหม่ให้ยืนยัน -> บันทึกด้วยคำสั่ง UPDATE เดียว
+        """
+        if (
+            self.parent_app.current_user is None
+            or "fullname" not in self.parent_app.current_user
+        ):
+            show_error_message(self, "ข้อผิดพลาด", "ไม่พบข้อมูลผู้ใช้งานปัจจุบัน ไม่สามารถบันทึกได้")
+            return
+        if self.edited_items:
+            show_info_message(
+                self,
+                "นำเข้าไฟล์แก้ไข",
+                f"มีการแก้ไข {len(self.edited_items)} รายการที่ยังไม่ได้บันทึก "
+                "กรุณาบันทึกหรือยกเลิกการแก้ไขก่อนนำเข้าไฟล์",
+            )
+            return
+
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            "นำเข้าไฟล์แก้ไข",
+            "",
+            "ไฟล์แก้ไข (*.xlsx *.csv);;Excel (*.xlsx);;CSV (*.csv)",
+        )
+        if not path:
+            return
+
+        if not self._all_db_fields_r_alldata:
+            self._all_db_fields_r_alldata = get_r_alldata_fields()
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            with profiling.profile_action("import"):
+                frame, ignored_headers = load_corrections(
+                    path, self._all_db_fields_r_alldata, self.column_mapper
+                )
+                errors = validate_corrections(
+                    frame, self.FIELD_VALIDATION_RULES, self.column_mapper
+                )
+                changes, missing = ([], []) if errors else build_diff(frame)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            show_error_message(self, "นำเข้าไฟล์แก้ไข", f"ไม่สามารถอ่านไฟล์ได้: {e}")
+            return
+        QApplication.restoreOverrideCursor()
+
+        if errors:
+            self.show_validation_errors(errors)
+            return
+        if not changes:
+            message = "ไม่มีค่าที่แตกต่างจากข้อมูลปัจจุบัน"
+            if missing:
+                message += f" (ไม่พบในฐานข้อมูล {len(missing):,} แถว)"
+            show_info_message(self, "นำเข้าไฟล์แก้ไข", message)
+            return
+
+        dialog = CorrectionPreviewDialog(
+            changes, missing, self.column_mapper, len(frame), ignored_headers, self
+        )
+        if dialog.exec_() != CorrectionPreviewDialog.Accepted:
+            return
+        accepted_changes = dialog.accepted_changes()
+        if not accepted_changes:
+            return
+
+        updated_count, conflicts, error_msg = apply_corrections(
+            accepted_changes, self.parent_app.current_user["fullname"]
+        )
+        if error_msg:
+            show_error_message(self, "Import Error", error_msg)
+            return
+        message = f"นำเข้าไฟล์แก้ไขจำนวน {updated_count} แถวเรียบร้อยแล้ว"
+        if conflicts:
+            message += (
+                f"\n\nไม่ได้นำเข้า {len(conflicts):,} แถวที่ถูกแก้ไขโดยผู้อื่นหลังจากเทียบไฟล์"
+                " (หรือถูกลบไปแล้ว) กรุณานำเข้าไฟล์อีกครั้งเพื่อเทียบกับค่าล่าสุด"
+            )
+        show_info_message(self, "สำเร็จ", message)
+        if self.original_data_cache:
+            self.search_data()
+
+    def show_edit_history(self):
+        """
+        ประวัติการแก้ไขของแถวที่เลือกอยู่ในตาราง
+        ถ้าไม่ได้เลือกแถว แสดงประวัติการแก้ไขของผู้ใช้งานปัจจุบัน
+        """
+        pk_values = None
+        row = self.results_table.currentRow()
+        if row >= 0 and self.original_data_cache:
+            if self.filtered_data_cache and row < len(self.filtered_data_cache):
+                row_data = self.filtered_data_cache[row]
+            elif row < len(self.original_data_cache):
+                row_data = self.original_data_cache[row]
+            else:
+                row_data = None
+            if row_data is not None:
+                pk_values = tuple(row_data.get(pk) for pk in self.LOGICAL_PK_FIELDS)
+
+        editor = None
+        if pk_values is None:
+            current_user = self.parent_app.current_user or {}
+            editor = current_user.get("fullname")
+            if not editor:
+                show_info_message(
+                    self, "ประวัติการแก้ไข", "กรุณาเลือกแถวในตารางที่ต้องการดูประวัติ"
+                )
+                return
+
+        AuditHistoryDialog(
+            self.column_mapper, pk_values=pk_values, editor=editor, parent=self
+        ).exec_()
+
+    def show_original_diff(self):
+        """
+        เทียบข้อมูลของพื้นที่ที่เลือกกับข้อมูลสำมะโนเดิม (r_alldata) และคืนค่าเดิมเป็นชุด
+        ถ้ามีการคืนค่า จะค้นหาใหม่เพื่อให้ตารางตรงกับฐานข้อมูล
+        """
+        if (
+            self.parent_app.current_user is None
+            or "fullname" not in self.parent_app.current_user
+        ):
+            show_error_message(self, "ข้อผิดพลาด", "ไม่พบข้อมูลผู้ใช้งานปัจจุบัน ไม่สามารถบันทึกได้")
+            return
+        if self.edited_items:
+            show_info_message(
+                self,
+                "เทียบข้อมูลเดิม",
+                f"มีการแก้ไข {len(self.edited_items)} รายการที่ยังไม่ได้บันทึก "
+                "กรุณาบันทึกหรือยกเลิกการแก้ไขก่อนเทียบข้อมูลเดิม",
+            )
+            return
+
+        processed_codes = self.get_processed_codes()
+        if all(value is None for value in processed_codes.values()):
+            show_error_message(
+                self, "เทียบข้อมูลเดิม", "กรุณาเลือกพื้นที่อย่างน้อยหนึ่งระดับ"
+            )
+            return
+        if not self._all_db_fields_r_alldata:
+            self._all_db_fields_r_alldata = get_r_alldata_fields()
+            if not self._all_db_fields_r_alldata:
+                show_error_message(
+                    self, "Error", "โครงสร้างตาราง r_alldata ไม่พร้อมใช้งาน"
+                )
+                return
+
+        dialog = OriginalDiffDialog(
+            processed_codes,
+            self._all_db_fields_r_alldata,
+            self.column_mapper,
+            self.parent_app.current_user["fullname"],
+            self,
+        )
+        dialog.exec_()
+        if dialog.reverted_rows and self.original_data_cache:
+            self.search_data()
+
     def prompt_save_edits(self):
         if self.results_table.state() == QAbstractItemView.EditingState:
             self.results_table.setCurrentItem(None)
@@ -955,6 +1282,7 @@ class EditDataScreen(QWidget):
         if reply == QMessageBox.Yes:
             self.execute_save_edits()
 
+    @profiling.profiled("save")
     def execute_save_edits(self):
         if (
             self.parent_app.current_user is None
@@ -978,6 +1306,7 @@ class EditDataScreen(QWidget):
         edit_timestamp = datetime.datetime.now()
 
         list_of_records_to_save = []
+        list_of_original_rows = []
         displayed_db_fields_in_table = self.column_mapper.get_fields_to_show()
 
         edited_table_row_indices = sorted(
@@ -1025,6 +1354,7 @@ class EditDataScreen(QWidget):
                 data_for_this_row_dict["fullname"] = editor_fullname
                 data_for_this_row_dict["time_edit"] = edit_timestamp
                 list_of_records_to_save.append(data_for_this_row_dict)
+                list_of_original_rows.append(self.original_data_cache[table_row_idx])
 
         if not list_of_records_to_save:
             show_info_message(
@@ -1037,12 +1367,27 @@ class EditDataScreen(QWidget):
                 if item:
                     item.setBackground(QBrush())
             self.edited_items.clear()
+            self.discard_edit_journal()
             self.save_edits_button.setEnabled(False)
             return
 
-        saved_count, error_msg = save_edited_r_alldata_rows(
-            list_of_records_to_save, self._all_db_fields_r_alldata
+        saved_count, conflicts, error_msg = save_edited_r_alldata_rows(
+            list_of_records_to_save,
+            self._all_db_fields_r_alldata,
+            list_of_original_rows,
         )
+        if conflicts and not error_msg:
+            merged_count, error_msg = self.resolve_save_conflicts(
+                conflicts, editor_fullname, edit_timestamp
+            )
+            saved_count += merged_count
+            if saved_count == 0 and not error_msg:
+                # ไม่มีแถวใดถูกบันทึก ค้นหาใหม่เพื่อแสดงค่าปัจจุบัน
+                self.edited_items.clear()
+                self.discard_edit_journal()
+                self.update_save_button_state()
+                self.search_data()
+                return
 
         if error_msg:
             show_error_message(self, "Save Error", error_msg)
@@ -1056,6 +1401,8 @@ class EditDataScreen(QWidget):
                     if item:
                         item.setBackground(QBrush())
                 self.edited_items.clear()
+                # บันทึกแล้ว ตัด journal ทิ้งก่อนค้นหาใหม่ (ถ้าค้นหาไม่สำเร็จจะไม่ถูกกู้คืนซ้ำ)
+                self.discard_edit_journal()
                 # self.save_edits_button.setEnabled(False)
                 self.update_save_button_state()
                 # print("Refreshing data after save...")
@@ -1072,6 +1419,7 @@ class EditDataScreen(QWidget):
                         if item:
                             item.setBackground(QBrush())
                     self.edited_items.clear()
+                    self.discard_edit_journal()
                     self.save_edits_button.setEnabled(False)
                     self.search_data()
                 else:
@@ -1081,8 +1429,53 @@ class EditDataScreen(QWidget):
                         "ไม่มีการเปลี่ยนแปลงที่จำเป็นต้องบันทึกเพิ่มเติม หรือ ไม่มีข้อมูลที่ถูกต้องสำหรับบันทึก",
                     )
 
+    def resolve_save_conflicts(self, conflicts, editor_fullname, edit_timestamp):
+        """
+        แสดง SaveConflictDialog ให้เลือกค่าที่จะใช้ แล้วบันทึกค่าที่รวมแล้ว (ตรวจ row_version อีกครั้ง)
+        คืน (จำนวนแถวที่บันทึก, ข้อความผิดพลาดหรือ None)
+        """
+        originals = {}
+        for conflict in conflicts:
+            original_row_idx = self.find_original_row_index(conflict["record"])
+            if original_row_idx != -1:
+                originals[conflict["pk"]] = self.original_data_cache[original_row_idx]
+
+        dialog = SaveConflictDialog(conflicts, originals, self.column_mapper, self)
+        if dialog.exec_() != SaveConflictDialog.Accepted:
+            show_info_message(
+                self,
+                "ไม่ได้บันทึก",
+                f"ไม่ได้บันทึก {len(conflicts)} แถวที่ถูกแก้ไขโดยผู้อื่น",
+            )
+            return 0, None
+        merged_records = dialog.merged_records()
+        if not merged_records:
+            return 0, None
+        current_by_pk = {conflict["pk"]: conflict["current"] for conflict in conflicts}
+        # ค่าตั้งต้นของการรวมคือค่าปัจจุบันในฐานข้อมูล (ใช้เทียบเพื่อเขียน audit)
+        current_rows = [
+            current_by_pk[tuple(record[pk] for pk in self.LOGICAL_PK_FIELDS)]
+            for record in merged_records
+        ]
+        for record in merged_records:
+            record["fullname"] = editor_fullname
+            record["time_edit"] = edit_timestamp
+
+        saved_count, conflicts, error_msg = save_edited_r_alldata_rows(
+            merged_records, self._all_db_fields_r_alldata, current_rows
+        )
+        if conflicts and not error_msg:
+            show_error_message(
+                self,
+                "Save Conflict",
+                f"{len(conflicts)} แถวถูกแก้ไขอีกครั้งระหว่างรวมข้อมูล จึงไม่ได้บันทึก"
+                " กรุณาค้นหาใหม่แล้วแก้ไขอีกครั้ง",
+            )
+        return saved_count, error_msg
+
     def reset_screen_state(self):
         self.region_combo.setCurrentIndex(0)
+        self.area_search_input.clear()
 
         try:
             self.results_table.itemChanged.disconnect(self.handle_item_changed)
@@ -1091,10 +1484,15 @@ class EditDataScreen(QWidget):
         self.results_table.setRowCount(0)
         self.results_table.itemChanged.connect(self.handle_item_changed)
 
+        self.change_feed.stop()
+        self.remote_changed_rows.clear()
         self.original_data_cache.clear()
+        self._original_row_index_by_pk = None
         self.filtered_data_cache.clear()
         self.db_column_names = []
         self.edited_items.clear()
+        # ไม่ลบ journal (อาจเป็นการออกจากระบบโดยไม่ได้ตั้งใจ) จะเสนอให้กู้คืนตอนเข้าใช้ครั้งถัดไป
+        self.close_edit_journal()
         self.active_filters.clear()  # ล้างฟิลเตอร์
     
         # ล้างฟิลเตอร์ใน header
@@ -1108,6 +1506,7 @@ class EditDataScreen(QWidget):
 
     def clear_search(self):
         self.region_combo.setCurrentIndex(0)
+        self.area_search_input.clear()
 
         try:
             self.results_table.itemChanged.disconnect(self.handle_item_changed)
@@ -1116,10 +1515,14 @@ class EditDataScreen(QWidget):
         self.results_table.setRowCount(0)
         self.results_table.itemChanged.connect(self.handle_item_changed)
 
+        self.change_feed.stop()
+        self.remote_changed_rows.clear()
         self.original_data_cache.clear()
+        self._original_row_index_by_pk = None
         self.filtered_data_cache.clear()
         self.db_column_names = []
         self.edited_items.clear()
+        self.discard_edit_journal()
         self.active_filters.clear()  # ล้างฟิลเตอร์
     
         # ล้างฟิลเตอร์ใน header
@@ -1142,23 +1545,22 @@ class EditDataScreen(QWidget):
                 if not self.edited_items:
                     self.parent_app.perform_logout()
             elif reply == QMessageBox.Discard:
+                self.discard_edit_journal()
                 self.parent_app.perform_logout()
         else:
             self.parent_app.perform_logout()
 
     def load_location_data(self):
         try:
-            excel_path = resource_path(
-                os.path.join("assets", "reg_prov_dist_subdist.xlsx")
-            )
-            self.location_data = pd.read_excel(excel_path, sheet_name="Area_code")
+            # ใช้ index ของ LocationData แทนการอ่านและกรองไฟล์ Excel ซ้ำอีกรอบ
+            self.location_data = LocationData.get_instance()
+            if not self.location_data.has_data():
+                raise ValueError("reg_prov_dist_subdist.xlsx could not be loaded")
 
             self.region_combo.blockSignals(True)
             self.region_combo.clear()
             self.region_combo.addItem("-- เลือกภาค --")
-            regions = sorted(self.location_data["RegName"].unique())
-            for region in regions:
-                self.region_combo.addItem(region)
+            self.region_combo.addItems(self.location_data.get_regions())
             self.region_combo.blockSignals(False)
 
             self.province_combo.clear()
@@ -1170,7 +1572,7 @@ class EditDataScreen(QWidget):
 
         except Exception as e:
             show_error_message(self, "Error", f"Failed to load location data: {str(e)}")
-            self.location_data = pd.DataFrame()
+            self.location_data = None
 
     def on_region_changed(self, index):
         self.province_combo.blockSignals(True)
@@ -1184,19 +1586,11 @@ class EditDataScreen(QWidget):
         self.subdistrict_combo.clear()
         self.subdistrict_combo.addItem("-- เลือกตำบล/แขวง --")
 
-        if (
-            index > 0
-            and self.location_data is not None
-            and not self.location_data.empty
-        ):
+        if index > 0 and self.location_data is not None:
             selected_region = self.region_combo.currentText()
-            provinces = sorted(
-                self.location_data[self.location_data["RegName"] == selected_region][
-                    "ProvName"
-                ].unique()
+            self.province_combo.addItems(
+                self.location_data.get_provinces(selected_region)
             )
-            for province in provinces:
-                self.province_combo.addItem(province)
 
         self.province_combo.blockSignals(False)
         self.district_combo.blockSignals(False)
@@ -1215,18 +1609,15 @@ class EditDataScreen(QWidget):
             index > 0
             and self.region_combo.currentIndex() > 0
             and self.location_data is not None
-            and not self.location_data.empty
         ):
             selected_region = self.region_combo.currentText()
             selected_province = self.province_combo.currentText()
             if selected_province != "-- เลือกจังหวัด --":
-                filtered_data = self.location_data[
-                    (self.location_data["RegName"] == selected_region)
-                    & (self.location_data["ProvName"] == selected_province)
-                ]
-                districts = sorted(filtered_data["DistName"].unique())
-                for district in districts:
-                    self.district_combo.addItem(district)
+                self.district_combo.addItems(
+                    self.location_data.get_districts(
+                        selected_region, selected_province
+                    )
+                )
 
         self.district_combo.blockSignals(False)
         self.subdistrict_combo.blockSignals(False)
@@ -1242,75 +1633,96 @@ class EditDataScreen(QWidget):
             and self.province_combo.currentIndex() > 0
             and self.region_combo.currentIndex() > 0
             and self.location_data is not None
-            and not self.location_data.empty
         ):
             selected_region = self.region_combo.currentText()
             selected_province = self.province_combo.currentText()
             selected_district = self.district_combo.currentText()
             if selected_district != "-- เลือกอำเภอ/เขต --":
-                filtered_data = self.location_data[
-                    (self.location_data["RegName"] == selected_region)
-                    & (self.location_data["ProvName"] == selected_province)
-                    & (self.location_data["DistName"] == selected_district)
-                ]
-                subdistricts = sorted(filtered_data["SubDistName"].unique())
-                for subdistrict in subdistricts:
-                    self.subdistrict_combo.addItem(subdistrict)
+                self.subdistrict_combo.addItems(
+                    self.location_data.get_subdistricts(
+                        selected_region, selected_province, selected_district
+                    )
+                )
         self.subdistrict_combo.blockSignals(False)
 
     def on_subdistrict_changed(self, index):
         pass
 
-    def get_selected_codes(self):
-        codes = {
-            "RegCode": None,
-            "ProvCode": None,
-            "DistCode": None,
-            "SubDistCode": None,
-        }
-        if self.location_data is None or self.location_data.empty:
-            return codes
-
-        selected_region = self.region_combo.currentText()
-        selected_province = self.province_combo.currentText()
-        selected_district = self.district_combo.currentText()
-        selected_subdistrict = self.subdistrict_combo.currentText()
-
-        current_filter = pd.Series(
-            [True] * len(self.location_data), index=self.location_data.index
-        )
+    def on_area_search_text_edited(self, text):
+        """ค้นหาพื้นที่จาก index ทุกครั้งที่พิมพ์ และแสดงรายการที่ตรงที่สุด"""
+        matches = []
+        if self.location_data is not None and text.strip():
+            matches = self.location_data.search_areas(text, limit=20)
 
-        if selected_region != "-- เลือกภาค --":
-            current_filter &= self.location_data["RegName"] == selected_region
-            df_filtered = self.location_data[current_filter]
-            if not df_filtered.empty:
-                codes["RegCode"] = df_filtered["RegCode"].iloc[0]
+        self.area_search_matches = {entry.label: entry for entry in matches}
+        self.area_search_model.setStringList([entry.label for entry in matches])
+        if matches:
+            self.area_completer.complete()
         else:
-            return codes
+            self.area_completer.popup().hide()
 
-        if selected_province != "-- เลือกจังหวัด --":
-            current_filter &= self.location_data["ProvName"] == selected_province
-            df_filtered = self.location_data[current_filter]
-            if not df_filtered.empty:
-                codes["ProvCode"] = df_filtered["ProvCode"].iloc[0]
-        else:
-            return codes
+    def on_area_search_activated(self, label):
+        entry = self.area_search_matches.get(label)
+        if entry is not None:
+            self.select_area(entry.names)
 
-        if selected_district != "-- เลือกอำเภอ/เขต --":
-            current_filter &= self.location_data["DistName"] == selected_district
-            df_filtered = self.location_data[current_filter]
-            if not df_filtered.empty:
-                codes["DistCode"] = df_filtered["DistCode"].iloc[0]
-        else:
-            return codes
+    def on_area_search_submitted(self):
+        """กด Enter โดยไม่ได้เลือกจากรายการ ให้ใช้รายการที่ตรงที่สุด"""
+        if self.area_completer.popup().isVisible():
+            return
+        matches = list(self.area_search_matches.values())
+        if matches:
+            self.select_area(matches[0].names)
+
+    def select_area(self, names):
+        """ตั้งค่า combo ภาค/จังหวัด/อำเภอ/ตำบล ตามเส้นทางชื่อพื้นที่ในครั้งเดียว"""
+        combos = [
+            self.region_combo,
+            self.province_combo,
+            self.district_combo,
+            self.subdistrict_combo,
+        ]
+        for level, combo in enumerate(combos):
+            combo_index = combo.findText(names[level]) if level < len(names) else 0
+            combo.setCurrentIndex(max(combo_index, 0))
+
+        self.area_search_input.clear()
+        self.area_search_matches = {}
+        self.area_search_model.setStringList([])
 
-        if selected_subdistrict != "-- เลือกตำบล/แขวง --":
-            current_filter &= self.location_data["SubDistName"] == selected_subdistrict
-            df_filtered = self.location_data[current_filter]
-            if not df_filtered.empty:
-                codes["SubDistCode"] = df_filtered["SubDistCode"].iloc[0]
+    def get_selected_codes(self):
+        if self.location_data is None:
+            return {
+                "RegCode": None,
+                "ProvCode": None,
+                "DistCode": None,
+                "SubDistCode": None,
+            }
 
-        return codes
+        return self.location_data.get_codes(*self.get_selected_names())
+
+    def get_selected_names(self):
+        """ชื่อพื้นที่ที่เลือกจากภาคลงไป หยุดที่ระดับแรกที่ยังไม่ได้เลือก"""
+        selected_names = []
+        for combo, placeholder in (
+            (self.region_combo, "-- เลือกภาค --"),
+            (self.province_combo, "-- เลือกจังหวัด --"),
+            (self.district_combo, "-- เลือกอำเภอ/เขต --"),
+            (self.subdistrict_combo, "-- เลือกตำบล/แขวง --"),
+        ):
+            selected_text = combo.currentText()
+            if selected_text == placeholder:
+                break
+            selected_names.append(selected_text)
+        return selected_names
+
+    def get_processed_codes(self):
+        """รหัสพื้นที่ที่เลือกแปลงเป็น int (ระดับที่ไม่ได้เลือกเป็น None) สำหรับ backend"""
+        processed_codes = self.get_selected_codes().copy()
+        for code_field in ("RegCode", "ProvCode", "DistCode", "SubDistCode"):
+            if processed_codes[code_field] is not None:
+                processed_codes[code_field] = int(processed_codes[code_field])
+        return processed_codes
 
     def validate_field_value(self, field_name, value, row_number):
         """ตรวจสอบค่าของฟิลด์เดียว"""
@@ -1458,6 +1870,7 @@ class EditDataScreen(QWidget):
 
         return None
 
+    @perf.timed("validate")
     def validate_edited_data(self):
         """ตรวจสอบข้อมูลที่แก้ไขทั้งหมดก่อนบันทึก"""
         validation_errors = []
@@ -1481,6 +1894,8 @@ class EditDataScreen(QWidget):
                     if error:
                         validation_errors.append(error)
 
+        perf.annotate(edits=len(self.edited_items), errors=len(validation_errors))
+        perf.count("validate.failures", len(validation_errors))
         return validation_errors
 
     def show_validation_errors(self, errors):
@@ -1512,118 +1927,6 @@ class EditDataScreen(QWidget):
         msg.setStandardButtons(QMessageBox.Ok)
         msg.exec_()
 
-    def load_validation_data_from_excel(self):
-        """โหลดข้อมูลการตรวจสอบจากไฟล์ Excel"""
-        validation_data = {}
-
-        # กำหนดค่าเริ่มต้นในกรณีที่โหลดไฟล์ไม่ได้
-        default_values = {
-            "LanguageOther": [f"{i:02d}" for i in range(2, 81)] + ["99"],  # ค่าเดิม
-            "NationalityNumeric": [f"{i:03d}" for i in range(4, 910)]
-            + ["000", "910", "920", "930", "940", "990", "997", "998", "999"],
-            "MovedFromAbroad": [f"{i:03d}" for i in range(0, 1000)],  # 000-999
-        }
-
-        try:
-            # โหลดข้อมูล LanguageOther
-            language_other_path = resource_path("assets/language_other.xlsx")
-            if os.path.exists(language_other_path):
-                language_df = pd.read_excel(language_other_path)
-                if "LanguageOther_Code" in language_df.columns:
-                    language_codes = (
-                        language_df["LanguageOther_Code"].dropna().astype(str).tolist()
-                    )
-                    language_codes = [
-                        code.strip() for code in language_codes if code.strip()
-                    ]
-                    if language_codes:  # ถ้ามีข้อมูล
-                        validation_data["LanguageOther"] = language_codes
-                    else:
-                        validation_data["LanguageOther"] = default_values[
-                            "LanguageOther"
-                        ]
-                else:
-                    validation_data["LanguageOther"] = default_values["LanguageOther"]
-            else:
-                validation_data["LanguageOther"] = default_values["LanguageOther"]
-        except Exception as e:
-            validation_data["LanguageOther"] = default_values["LanguageOther"]
-
-        try:
-            # โหลดข้อมูล NationalityNumeric
-            nationality_path = resource_path("assets/nationality.xlsx")
-            if os.path.exists(nationality_path):
-                nationality_df = pd.read_excel(nationality_path)
-                if "Nationality_Code_Numeric-3" in nationality_df.columns:
-                    nationality_codes = (
-                        nationality_df["Nationality_Code_Numeric-3"]
-                        .dropna()
-                        .astype(str)
-                        .tolist()
-                    )
-                    nationality_codes = [
-                        code.strip() for code in nationality_codes if code.strip()
-                    ]
-                    # เพิ่มรหัสพิเศษ
-                    additional_codes = [
-                        "000",
-                        "910",
-                        "920",
-                        "930",
-                        "940",
-                        "990",
-                        "997",
-                        "998",
-                        "999",
-                    ]
-                    nationality_codes.extend(additional_codes)
-                    nationality_codes = list(set(nationality_codes))  # ลบค่าซ้ำ
-                    if nationality_codes:
-                        validation_data["NationalityNumeric"] = nationality_codes
-                    else:
-                        validation_data["NationalityNumeric"] = default_values[
-                            "NationalityNumeric"
-                        ]
-                else:
-                    validation_data["NationalityNumeric"] = default_values[
-                        "NationalityNumeric"
-                    ]
-            else:
-                validation_data["NationalityNumeric"] = default_values[
-                    "NationalityNumeric"
-                ]
-        except Exception as e:
-            validation_data["NationalityNumeric"] = default_values["NationalityNumeric"]
-
-        try:
-            # โหลดข้อมูล MovedFromAbroad
-            country_path = resource_path("assets/country.xlsx")
-            if os.path.exists(country_path):
-                country_df = pd.read_excel(country_path)
-                if "Countries_Code_Num-3" in country_df.columns:
-                    country_codes = (
-                        country_df["Countries_Code_Num-3"].dropna().astype(str).tolist()
-                    )
-                    country_codes = [
-                        code.strip() for code in country_codes if code.strip()
-                    ]
-                    if country_codes:
-                        validation_data["MovedFromAbroad"] = country_codes
-                    else:
-                        validation_data["MovedFromAbroad"] = default_values[
-                            "MovedFromAbroad"
-                        ]
-                else:
-                    validation_data["MovedFromAbroad"] = default_values[
-                        "MovedFromAbroad"
-                    ]
-            else:
-                validation_data["MovedFromAbroad"] = default_values["MovedFromAbroad"]
-        except Exception as e:
-            validation_data["MovedFromAbroad"] = default_values["MovedFromAbroad"]
-
-        return validation_data
-    
     # เพิ่ม methods สำหรับจัดการฟิลเตอร์
     def apply_table_filter(self, column, text, show_blank_only):
         """ใช้ฟิลเตอร์กับตาราง"""
@@ -1651,55 +1954,69 @@ class EditDataScreen(QWidget):
         # กรองข้อมูลใหม่
         self.filter_table_data()
 
-    def filter_table_data(self):
-        """กรองข้อมูลในตารางตามฟิลเตอร์ที่ใช้งานอยู่"""
-        if not self.original_data_cache:
-            return
-    
+    def build_row_filter(self):
+        """
+        สร้างฟังก์ชัน row_filter(row_data) -> bool จากฟิลเตอร์ที่ใช้งานอยู่
+        (ใช้ทั้งตอนกรองตารางและตอนส่งออกไฟล์)
+        """
         displayed_fields = self.column_mapper.get_fields_to_show()
-        filtered_data = []
-    
-        for row_data in self.original_data_cache:
-            should_include = True
-        
-            # ตรวจสอบทุกฟิลเตอร์
-            for column, filter_info in self.active_filters.items():
-                if column == 0:  # ข้ามคอลัมน์ลำดับ
-                    continue
-            
-                # คำนวณ field index (ลบ 1 เพราะคอลัมน์ 0 คือลำดับ)
-                field_index = column - 1
-                if field_index >= len(displayed_fields):
-                    continue
-            
-                field_name = displayed_fields[field_index]
+        conditions = []
+        for column, filter_info in self.active_filters.items():
+            if column == 0:  # ข้ามคอลัมน์ลำดับ
+                continue
+
+            # คำนวณ field index (ลบ 1 เพราะคอลัมน์ 0 คือลำดับ)
+            field_index = column - 1
+            if field_index >= len(displayed_fields):
+                continue
+
+            conditions.append(
+                (
+                    displayed_fields[field_index],
+                    filter_info.get('show_blank', False),
+                    filter_info.get('text', '').strip().lower(),
+                )
+            )
+
+        def row_filter(row_data):
+            for field_name, show_blank, filter_text in conditions:
                 field_value = row_data.get(field_name)
-            
+
                 # แปลงค่าเป็น string สำหรับการเปรียบเทียบ
                 if field_value is None:
                     value_str = ""
                 else:
                     value_str = str(field_value).strip()
-            
+
                 # ตรวจสอบเงื่อนไข show_blank
-                if filter_info.get('show_blank', False):
-                    if value_str != "":  # ถ้าไม่ใช่ค่าว่าง ให้ข้าม
-                        should_include = False
-                        break
-            
+                if show_blank and value_str != "":  # ถ้าไม่ใช่ค่าว่าง ให้ข้าม
+                    return False
+
                 # ตรวจสอบเงื่อนไขข้อความ
-                filter_text = filter_info.get('text', '').strip()
-                if filter_text:
-                    if filter_text.lower() not in value_str.lower():
-                        should_include = False
-                        break
-        
-            if should_include:
-                filtered_data.append(row_data)
+                if filter_text and filter_text not in value_str.lower():
+                    return False
+            return True
+
+        return row_filter
+
+    @profiling.profiled("filter")
+    @perf.timed("filter")
+    def filter_table_data(self):
+        """กรองข้อมูลในตารางตามฟิลเตอร์ที่ใช้งานอยู่"""
+        if not self.original_data_cache:
+            return
     
+        row_filter = self.build_row_filter()
+        filtered_data = [
+            row_data for row_data in self.original_data_cache if row_filter(row_data)
+        ]
+
+        perf.annotate(rows=len(self.original_data_cache), matched=len(filtered_data))
+
         # อัปเดตตาราง
         self.display_filtered_results(filtered_data)
 
+    @perf.timed("filter.display")
     def display_filtered_results(self, filtered_data):
         """แสดงผลข้อมูลที่ถูกฟิลเตอร์"""
         # **สำคัญ: ปิด itemChanged signal ก่อนอัปเดตตาราง**
@@ -1720,6 +2037,7 @@ class EditDataScreen(QWidget):
     
         # เก็บข้อมูลที่กรองแล้ว
         self.filtered_data_cache = filtered_data
+        perf.annotate(rows=len(filtered_data))
     
         if not filtered_data:
             from frontend.utils.error_message import show_info_message
@@ -1739,18 +2057,11 @@ class EditDataScreen(QWidget):
                 self.results_table.setItem(row_idx, 0, sequence_item)
 
                 # หา index ของข้อมูลนี้ใน original_data_cache
-                original_row_index = -1
-                for orig_idx, orig_data in enumerate(self.original_data_cache):
-                    # เปรียบเทียบ Primary Key เพื่อหา original index
-                    is_same_row = True
-                    for pk_field in self.LOGICAL_PK_FIELDS:
-                        if orig_data.get(pk_field) != row_data.get(pk_field):
-                            is_same_row = False
-                            break
-                
-                    if is_same_row:
-                        original_row_index = orig_idx
-                        break
+                original_row_index = self.find_original_row_index(row_data)
+                if original_row_index in self.remote_changed_rows:
+                    self._mark_remote_change(
+                        sequence_item, self.remote_changed_rows[original_row_index]
+                    )
 
                 # สร้าง items สำหรับแต่ละคอลัมน์
                 for db_field_idx, displayed_field_name in enumerate(displayed_db_fields_in_table):
@@ -12,6 +12,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QSize
 from PyQt5.QtGui import QIcon
 
+from backend import profiling
 from backend.auth import Auth
 from frontend.utils.shadow_effect import add_shadow_effect
 
@@ -161,13 +162,14 @@ class LoginScreen(QWidget):
                 )
                 return
 
-        # การเข้าสู่ระบบปกติ
-        user_data = Auth.login(username, password)
-        if user_data:
-            self.username_input.clear()
-            self.password_input.clear()
-            self.parent_app.login_successful(user_data)
-        else:
+        # การเข้าสู่ระบบปกติ (ไม่รวมเวลาที่กล่องข้อความแจ้งเตือนเปิดค้างไว้ใน profile)
+        with profiling.profile_action("login"):
+            user_data = Auth.login(username, password)
+            if user_data:
+                self.username_input.clear()
+                self.password_input.clear()
+                self.parent_app.login_successful(user_data)
+        if not user_data:
             QMessageBox.warning(
                 self,
                 "Login Failed",
@@ -0,0 +1,126 @@
+import datetime
+import os
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from backend.alldata_operations import fetch_changed_r_alldata
+
+from .thread_shutdown import wait_or_abandon
+
+# ดึงแถวที่ผู้อื่นบันทึกทุกกี่วินาที ตั้งเป็น 0 เพื่อปิด
+CHANGE_FEED_SECONDS_ENV = "POP_EDIT_CHANGE_FEED_SECONDS"
+DEFAULT_CHANGE_FEED_SECONDS = 30
+
+# time_edit มาจากนาฬิกาของเครื่องผู้บันทึก จึงถอยเวลาที่เห็นล่าสุดลงเผื่อนาฬิกาไม่ตรงกัน
+# และการบันทึกที่ commit ช้ากว่าเวลาที่ประทับ (แถวที่ได้ซ้ำจะถูกข้ามด้วย row_version)
+CHANGE_FEED_OVERLAP = datetime.timedelta(minutes=2)
+
+# จุดเริ่มเมื่อผลค้นหายังไม่มีแถวใดถูกแก้ (อยู่ในช่วงของชนิด datetime ของ SQL Server)
+NEVER_EDITED = datetime.datetime(1900, 1, 1)
+
+
+def get_change_feed_interval_ms():
+    try:
+        seconds = float(
+            os.environ.get(CHANGE_FEED_SECONDS_ENV, DEFAULT_CHANGE_FEED_SECONDS)
+        )
+    except ValueError:
+        seconds = DEFAULT_CHANGE_FEED_SECONDS
+    return max(0, int(seconds * 1000))
+
+
+def latest_time_edit(rows):
+    """time_edit ล่าสุดของแถว (dict) ที่มี หรือ None ถ้ายังไม่มีแถวใดถูกแก้"""
+    stamps = [row.get("time_edit") for row in rows]
+    stamps = [stamp for stamp in stamps if isinstance(stamp, datetime.datetime)]
+    return max(stamps) if stamps else None
+
+
+class _FetchThread(QThread):
+    fetched = pyqtSignal(list, list, str)
+
+    def __init__(self, codes, fields, edited_since, parent=None):
+        super().__init__(parent)
+        self.codes = codes
+        self.fields = fields
+        self.edited_since = edited_since
+
+    def run(self):
+        results, db_cols, error_msg = fetch_changed_r_alldata(
+            self.codes, self.fields, self.edited_since
+        )
+        self.fetched.emit(list(results), db_cols, error_msg or "")
+
+
+class ChangeFeedPoller(QObject):
+    """
+    ดึงเฉพาะแถวในพื้นที่ที่ค้นหาอยู่ซึ่งถูกบันทึกหลังเวลาที่เห็นล่าสุด (time_edit) เป็นระยะ
+    ใน background thread แล้วส่ง changes_ready(results, db_column_names) ให้หน้าจอรวมเข้าตาราง
+    ไม่ดึงระหว่างที่หน้าจอไม่แสดงอยู่ และไม่เริ่มรอบใหม่ถ้ารอบก่อนยังไม่เสร็จ
+    """
+
+    changes_ready = pyqtSignal(list, list)
+
+    def __init__(self, parent=None, interval_ms=None):
+        super().__init__(parent)
+        self.interval_ms = (
+            get_change_feed_interval_ms() if interval_ms is None else interval_ms
+        )
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.poll)
+        self._thread = None
+        self._codes = None
+        self._fields = None
+        self._last_seen = None
+        # เปลี่ยนทุกครั้งที่ค้นหาใหม่ ผลของรอบที่เริ่มก่อนหน้านั้นจะถูกทิ้ง
+        self._generation = 0
+
+    def start(self, codes, fields, last_seen):
+        """เริ่มติดตามพื้นที่ codes โดยนับจาก last_seen (time_edit ล่าสุดในผลค้นหา)"""
+        self._generation += 1
+        self._codes = dict(codes)
+        self._fields = list(fields)
+        self._last_seen = last_seen or NEVER_EDITED
+        if self.interval_ms > 0:
+            self._timer.start(self.interval_ms)
+
+    def stop(self):
+        self._generation += 1
+        self._codes = None
+        self._timer.stop()
+
+    def shutdown(self):
+        """ปิดโปรแกรม: หยุดดึงและรอรอบที่กำลังดึงอยู่ให้จบ (ผลของรอบนั้นถูกทิ้ง)"""
+        self.stop()
+        if self._thread is not None:
+            wait_or_abandon(self._thread)
+
+    def poll(self):
+        if self._codes is None or self._thread is not None:
+            return
+        parent = self.parent()
+        if parent is not None and not parent.isVisible():
+            return
+        since = max(self._last_seen - CHANGE_FEED_OVERLAP, NEVER_EDITED)
+        generation = self._generation
+        self._thread = _FetchThread(self._codes, self._fields, since, self)
+        self._thread.fetched.connect(
+            lambda results, db_cols, error_msg: self._on_fetched(
+                generation, results, db_cols, error_msg
+            )
+        )
+        self._thread.finished.connect(self._on_thread_finished)
+        self._thread.start()
+
+    def _on_thread_finished(self):
+        self._thread.deleteLater()
+        self._thread = None
+
+    def _on_fetched(self, generation, results, db_cols, error_msg):
+        if generation != self._generation or error_msg or not results:
+            # ผิดพลาด (เช่นเชื่อมต่อไม่ได้ชั่วคราว) ก็ลองใหม่ในรอบถัดไป
+            return
+        latest = latest_time_edit(dict(zip(db_cols, row)) for row in results)
+        if latest is not None and latest > self._last_seen:
+            self._last_seen = latest
+        self.changes_ready.emit(results, db_cols)
@@ -0,0 +1,46 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from backend.exporter import ExportCancelled, export_rows, iter_row_batches
+
+
+class ExportThread(QThread):
+    """
+    เขียนไฟล์ส่งออกใน background เพื่อไม่ให้หน้าจอค้าง
+    progress ส่งจำนวนแถวที่เขียนแล้ว (ใช้กับ QProgressDialog) และยกเลิกได้ด้วย cancel()
+    """
+
+    progress = pyqtSignal(int)
+    completed = pyqtSignal(int)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, rows, fields, headers, path, parent=None):
+        super().__init__(parent)
+        self.rows = rows
+        self.fields = fields
+        self.headers = headers
+        self.path = path
+        self._cancel_requested = False
+
+    def cancel(self):
+        self._cancel_requested = True
+
+    def _on_progress(self, written):
+        self.progress.emit(written)
+        return not self._cancel_requested
+
+    def run(self):
+        try:
+            written = export_rows(
+                iter_row_batches(self.rows),
+                self.fields,
+                self.headers,
+                self.path,
+                progress=self._on_progress,
+            )
+        except ExportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(written)
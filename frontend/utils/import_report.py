@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+
+# โมดูลที่ถือเป็นของโปรเจกต์ (นอกนั้นนับเป็น stdlib / third-party)
+PROJECT_PACKAGES = ("main", "backend", "frontend")
+
+# โมดูลที่ถูก import ตอนใช้งานจริงครั้งแรก (หน้าจอที่สร้างแบบ lazy และ dependency ที่หนัก)
+# เรียงตามลำดับที่โปรแกรมมักจะใช้งาน
+DEFERRED_IMPORTS = [
+    "backend.auth",
+    "bcrypt",
+    "frontend.admin_menu_screen",
+    "frontend.add_user_screen",
+    "frontend.reset_password_screen",
+    "frontend.change_password_screen",
+    "frontend.edit_data_screen",
+    "backend.validation_rules",
+    "backend.location_data",
+    "pandas",
+    "openpyxl",
+]
+
+# นับ cumulative ของ dependency ที่หนักแยกออกมาให้เห็นชัด
+HEAVY_PACKAGES = ("PyQt5", "pandas", "numpy", "openpyxl", "bcrypt", "pyodbc")
+
+
+class _ImportNode:
+    def __init__(self, name, self_us, cumulative_us):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.children = []
+
+    @property
+    def package(self):
+        return self.name.split(".")[0]
+
+    @property
+    def is_project_module(self):
+        return self.package in PROJECT_PACKAGES
+
+
+def _parse_importtime(stderr_text):
+    """แปลงผลลัพธ์ของ -X importtime ให้เป็น tree (ผลลัพธ์เรียงลูกก่อนพ่อ)"""
+    pending = {}
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|", 2)
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us, raw_name = fields
+        # หลัง "|" มีช่องว่างคั่น 1 ตัว ตามด้วยการย่อหน้าระดับละ 2 ช่อง
+        indent = len(raw_name) - len(raw_name.lstrip())
+        depth = max(indent - 1, 0) // 2
+        node = _ImportNode(raw_name.strip(), int(self_us), int(cumulative_us))
+        node.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def _walk(nodes, parent=None):
+    for node in nodes:
+        yield parent, node
+        yield from _walk(node.children, node)
+
+
+def _print_section(title, roots):
+    pairs = list(_walk(roots))
+    total_ms = sum(root.cumulative_us for root in roots) / 1000
+    print(f"\n{title}: {total_ms:.1f} ms")
+
+    print(f"  {'project module':<45}{'self ms':>10}{'cumulative ms':>16}")
+    project_nodes = [node for _, node in pairs if node.is_project_module]
+    for node in sorted(project_nodes, key=lambda n: n.cumulative_us, reverse=True):
+        print(
+            f"  {node.name:<45}{node.self_us / 1000:>10.1f}"
+            f"{node.cumulative_us / 1000:>16.1f}"
+        )
+
+    # dependency ที่หนัก: ใช้ cumulative ของจุดแรกที่ถูก import และบอกว่าใครเป็นคน import
+    print(f"\n  {'heavy dependency':<20}{'cumulative ms':>16}  first imported by")
+    reported_packages = set()
+    for parent, node in pairs:
+        if node.package not in HEAVY_PACKAGES or node.package in reported_packages:
+            continue
+        reported_packages.add(node.package)
+        importer = parent.name if parent is not None else "(direct)"
+        print(f"  {node.name:<20}{node.cumulative_us / 1000:>16.1f}  {importer}")
+
+
+def run_import_report():
+    """
+    รัน Python ตัวใหม่ด้วย -X importtime แล้วสรุปเวลา import แยกตามโมดูลของโปรเจกต์
+    ช่วงแรกคือสิ่งที่ main.py import ก่อนหน้าต่างจะขึ้น ช่วงหลังคือสิ่งที่ถูก import
+    แบบ lazy ตอนใช้งานจริงครั้งแรก
+    """
+    project_root = os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    child_code = "import main\n" + "".join(
+        f"import {module_name}\n" for module_name in DEFERRED_IMPORTS
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", child_code],
+        cwd=project_root,
+        capture_output=True,
+        text=True,
+    )
+    roots = _parse_importtime(completed.stderr)
+    if completed.returncode != 0 or not roots:
+        print(completed.stderr, file=sys.stderr)
+        return 1
+
+    startup_roots = [root for root in roots if root.name == "main"]
+    deferred_roots = [root for root in roots if root.name != "main"]
+    _print_section("Startup imports (python main.py)", startup_roots)
+    _print_section("Deferred imports (first use)", deferred_roots)
+    return 0
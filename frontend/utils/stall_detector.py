@@ -0,0 +1,137 @@
+import os
+import sys
+import threading
+import time
+import traceback
+
+from PyQt5.QtCore import QObject, QTimer
+
+from backend import perf
+from backend.app_paths import get_app_data_dir
+
+# เวลาที่ event loop ไม่ตอบสนองก่อนถือว่า UI ค้าง (ms) ตั้งเป็น 0 เพื่อปิด
+STALL_THRESHOLD_ENV = "POP_EDIT_STALL_MS"
+DEFAULT_STALL_THRESHOLD_MS = 500
+
+STALL_LOG_FILE = "stalls.jsonl"
+
+# จำนวนเฟรมล่างสุดของ stack ที่เก็บ (ส่วนบนเป็น main/app.exec_ ซึ่งเหมือนกันทุกครั้ง)
+STACK_LIMIT = 25
+
+
+def get_stall_threshold_ms():
+    try:
+        return int(os.environ.get(STALL_THRESHOLD_ENV, DEFAULT_STALL_THRESHOLD_MS))
+    except ValueError:
+        return DEFAULT_STALL_THRESHOLD_MS
+
+
+class StallDetector(QObject):
+    """
+    ตรวจจับช่วงที่ event loop ของ Qt ถูกบล็อก (UI ค้าง)
+
+    QTimer บน GUI thread อัปเดตเวลาล่าสุดทุก heartbeat_ms ส่วน watchdog thread
+    คอยเทียบกับเวลาจริง ถ้า heartbeat หายไปนานเกิน threshold_ms จะเก็บ stack ของ
+    GUI thread และชื่อ span ที่กำลังทำงาน (จาก backend.perf) ไว้ เมื่อ event loop
+    กลับมาทำงานจะบันทึกระยะเวลาที่ค้างรวมลงไฟล์ logs/stalls.jsonl
+    """
+
+    def __init__(self, parent=None, threshold_ms=None, heartbeat_ms=100, log_path=None):
+        super().__init__(parent)
+        self.threshold_ms = (
+            get_stall_threshold_ms() if threshold_ms is None else threshold_ms
+        )
+        self.heartbeat_ms = heartbeat_ms
+        self.log_path = log_path
+        self.stalls = []  # รายการที่บันทึกแล้วในรอบการทำงานนี้
+
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._pending = None  # ข้อมูลของการค้างที่กำลังเกิดอยู่
+        self._finished_gap = None  # ช่วงห่าง heartbeat ล่าสุดที่เกิน threshold
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watchdog = None
+        self._log_sink = None
+
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setInterval(self.heartbeat_ms)
+        self._heartbeat.timeout.connect(self._on_heartbeat)
+
+    def is_enabled(self):
+        return self.threshold_ms > 0
+
+    def start(self):
+        if not self.is_enabled() or self._watchdog is not None:
+            return
+        # ต้องมี sink อย่างน้อยหนึ่งตัว span ถึงจะถูกติดตาม (ใช้ระบุงานที่ทำให้ค้าง)
+        perf.get_memory_recorder()
+        self._last_beat = time.monotonic()
+        self._heartbeat.start()
+        self._stop_event.clear()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="StallWatchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self):
+        self._heartbeat.stop()
+        self._stop_event.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+            perf.release_memory_recorder()
+
+    def _on_heartbeat(self):
+        now = time.monotonic()
+        gap_ms = (now - self._last_beat) * 1000 - self.heartbeat_ms
+        self._last_beat = now
+        if gap_ms >= self.threshold_ms:
+            with self._lock:
+                self._finished_gap = gap_ms
+
+    def _watch(self):
+        poll_seconds = min(self.heartbeat_ms, self.threshold_ms) / 2000
+        while not self._stop_event.wait(poll_seconds):
+            blocked_ms = (
+                (time.monotonic() - self._last_beat) * 1000 - self.heartbeat_ms
+            )
+            if blocked_ms >= self.threshold_ms and self._pending is None:
+                self._pending = self._capture(blocked_ms)
+
+            with self._lock:
+                finished_gap, self._finished_gap = self._finished_gap, None
+            if finished_gap is not None:
+                # ค้างสั้นจน watchdog จับ stack ไม่ทัน ยังบันทึกระยะเวลาไว้
+                stall = self._pending or {
+                    "ts": round(time.time() - finished_gap / 1000, 3),
+                    "operation": [],
+                    "stack": [],
+                }
+                self._pending = None
+                stall["stall_ms"] = round(finished_gap, 1)
+                self._record(stall)
+
+    def _capture(self, blocked_ms):
+        """เก็บ stack ของ GUI thread และ span ที่กำลังทำงานขณะค้าง"""
+        frame = sys._current_frames().get(self._gui_thread_id)
+        stack = traceback.format_stack(frame)[-STACK_LIMIT:] if frame else []
+        return {
+            "ts": round(time.time() - blocked_ms / 1000, 3),
+            "detected_after_ms": round(blocked_ms, 1),
+            "operation": perf.active_spans(self._gui_thread_id),
+            "stack": [line.rstrip() for line in stack],
+        }
+
+    def _record(self, stall):
+        perf.count("ui.stall")
+        self.stalls.append(stall)
+        try:
+            if self._log_sink is None:
+                self._log_sink = perf.RotatingJsonLinesSink(
+                    self.log_path
+                    or os.path.join(get_app_data_dir("logs"), STALL_LOG_FILE)
+                )
+            self._log_sink.write(stall)
+        except OSError:
+            pass
@@ -0,0 +1,58 @@
+import os
+import time
+
+from backend.app_paths import get_app_data_dir
+
+# จุดวัดหลักที่ใช้ติดตามเวลาเปิดโปรแกรม (มิลลิวินาทีนับจาก main.py เริ่มทำงาน)
+# first_paint  : หน้าต่างหลักถูกวาดครั้งแรก
+# login_ready  : event loop ว่างหลังวาดหน้าล็อกอิน พร้อมรับการพิมพ์
+# edit_ready   : warm-up โหลด asset และโครงสร้างตารางเสร็จ หน้าแก้ไขข้อมูลเปิดได้ทันที
+MILESTONES = ("first_paint", "login_ready", "edit_ready")
+
+# ตั้งค่า POP_EDIT_STARTUP_TIMELINE=1 เพื่อพิมพ์ผลออกทาง stdout ด้วย
+STARTUP_TIMELINE_ENV = "POP_EDIT_STARTUP_TIMELINE"
+
+_start_time = time.perf_counter()
+_marks = {}
+_reported = False
+
+
+def mark(name):
+    """บันทึกเวลาของจุดวัด (บันทึกเฉพาะครั้งแรกของแต่ละชื่อ)"""
+    if name in _marks:
+        return
+    _marks[name] = round((time.perf_counter() - _start_time) * 1000, 1)
+
+    if all(milestone in _marks for milestone in MILESTONES):
+        _report()
+
+
+def get_marks():
+    return dict(_marks)
+
+
+def _report():
+    """ต่อท้ายผลการวัดลงไฟล์ startup.jsonl หนึ่งบรรทัดต่อการเปิดโปรแกรมหนึ่งครั้ง"""
+    global _reported
+    if _reported:
+        return
+    _reported = True
+
+    import datetime
+    import json
+
+    record = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "marks_ms": get_marks(),
+    }
+
+    if os.environ.get(STARTUP_TIMELINE_ENV):
+        for name, elapsed_ms in record["marks_ms"].items():
+            print(f"[startup] {name:<24} {elapsed_ms:>9.1f} ms")
+
+    try:
+        log_path = os.path.join(get_app_data_dir("logs"), "startup.jsonl")
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError:
+        pass
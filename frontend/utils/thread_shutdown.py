@@ -0,0 +1,18 @@
+from PyQt5 import sip
+
+# เวลาสูงสุดที่รอ background thread แต่ละตัวตอนปิดโปรแกรม (ms)
+SHUTDOWN_WAIT_MS = 3000
+
+
+def wait_or_abandon(thread, timeout_ms=SHUTDOWN_WAIT_MS):
+    """
+    รอ QThread จบไม่เกิน timeout_ms ตอนปิดโปรแกรม คืน True ถ้าจบแล้ว
+    ถ้ายังไม่จบ (เช่นค้างอยู่ที่การเชื่อมต่อฐานข้อมูล) ตัดออกจาก parent และโอนให้ฝั่ง C++
+    เพื่อไม่ให้ถูกทำลายพร้อมหน้าต่าง (Qt จะ abort เมื่อ QThread ที่ยังทำงานถูกทำลาย)
+    thread จะถูกหยุดไปพร้อมกับโปรเซส
+    """
+    if thread.wait(timeout_ms):
+        return True
+    thread.setParent(None)
+    sip.transferto(thread, None)
+    return False
@@ -0,0 +1,28 @@
+from PyQt5.QtCore import QThread
+
+
+class BackendWarmupThread(QThread):
+    """
+    โหลดข้อมูลที่หน้าแก้ไขข้อมูลต้องใช้ไว้ล่วงหน้าใน background
+    (ไฟล์ Excel อ้างอิงทั้งหมด และโครงสร้างตาราง r_alldata)
+    เพื่อไม่ให้หน้าล็อกอินต้องรอ
+    ตรวจ requestInterruption() ระหว่างแต่ละขั้น (ปิดโปรแกรมระหว่าง warm-up ไม่ต้องรอครบทุกขั้น)
+    """
+
+    def run(self):
+        # import ภายใน thread นี้ เพื่อให้ค่า import ของ backend ไม่ไปอยู่ในช่วงเปิดโปรแกรม
+        from backend.alldata_operations import get_r_alldata_fields
+        from backend.column_mapper import ColumnMapper
+        from backend.location_data import LocationData
+        from backend.validation_rules import get_validation_data_from_excel
+
+        steps = (
+            ColumnMapper.get_instance,
+            lambda: LocationData.get_instance().get_search_index(),
+            get_validation_data_from_excel,
+            get_r_alldata_fields,
+        )
+        for step in steps:
+            if self.isInterruptionRequested():
+                return
+            step()
@@ -0,0 +1,143 @@
+from PyQt5.QtWidgets import (
+    QAbstractItemView,
+    QDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+from PyQt5.QtCore import Qt
+
+from backend.audit_log import AUDIT_KEY_FIELDS, DEFAULT_PAGE_SIZE, fetch_history
+from frontend.utils.error_message import show_error_message
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+class AuditHistoryDialog(QDialog):
+    """
+    ประวัติการแก้ไขรายช่องของแถวหนึ่ง (pk_values) หรือของผู้แก้ไขหนึ่งคน (editor)
+    ใหม่สุดก่อน ทีละหน้า (keyset จาก fetch_history) ไม่ได้โหลดประวัติทั้งหมดมาไว้ในหน้าจอ
+    """
+
+    def __init__(
+        self,
+        column_mapper,
+        pk_values=None,
+        editor=None,
+        parent=None,
+        page_size=DEFAULT_PAGE_SIZE,
+    ):
+        super().__init__(parent)
+        self.column_mapper = column_mapper
+        self.pk_values = pk_values
+        self.editor = editor
+        self.page_size = page_size
+        # before_id ของแต่ละหน้าที่เปิดแล้ว (หน้าแรกเป็น None) สำหรับปุ่มย้อนกลับ
+        self._page_starts = [None]
+        self._next_before_id = None
+
+        if pk_values is not None:
+            title = "ประวัติการแก้ไขแถว " + " / ".join(_text(v) for v in pk_values)
+        else:
+            title = f"ประวัติการแก้ไขโดย {editor}"
+        self.setWindowTitle(title)
+        self.resize(1000, 560)
+
+        layout = QVBoxLayout(self)
+        self.title_label = QLabel(title)
+        layout.addWidget(self.title_label)
+
+        headers = ["เวลา", "แก้ไขโดย"]
+        headers += [column_mapper.get_column_name(pk) for pk in AUDIT_KEY_FIELDS]
+        headers += ["คอลัมน์", "ค่าเดิม", "ค่าใหม่"]
+        self.table = QTableWidget(0, len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table, 1)
+
+        buttons_layout = QHBoxLayout()
+        self.page_label = QLabel()
+        self.previous_button = QPushButton("ใหม่กว่า")
+        self.previous_button.setObjectName("secondaryButton")
+        self.previous_button.clicked.connect(self.show_previous_page)
+        self.next_button = QPushButton("เก่ากว่า")
+        self.next_button.setObjectName("secondaryButton")
+        self.next_button.clicked.connect(self.show_next_page)
+        close_button = QPushButton("ปิด")
+        close_button.setObjectName("primaryButton")
+        close_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(self.page_label)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(self.previous_button)
+        buttons_layout.addWidget(self.next_button)
+        buttons_layout.addWidget(close_button)
+        layout.addLayout(buttons_layout)
+
+    def load_page(self, before_id):
+        """แสดงหน้าที่เริ่มหลัง before_id คืน False ถ้าอ่านประวัติไม่ได้"""
+        try:
+            entries, next_before_id = fetch_history(
+                self.pk_values, self.editor, before_id, self.page_size
+            )
+        except Exception as e:
+            show_error_message(self, "ข้อผิดพลาด", f"ไม่สามารถอ่านประวัติการแก้ไขได้: {e}")
+            return False
+        self._next_before_id = next_before_id
+
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(len(entries))
+        for row_idx, entry in enumerate(entries):
+            values = [_text(entry["time_edit"]), _text(entry["editor"])]
+            values += [_text(entry[pk]) for pk in AUDIT_KEY_FIELDS]
+            values += [
+                self.column_mapper.get_column_name(entry["field_name"]),
+                _text(entry["old_value"]),
+                _text(entry["new_value"]),
+            ]
+            for col_idx, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.UserRole, entry["audit_id"])
+                self.table.setItem(row_idx, col_idx, item)
+        self.table.setUpdatesEnabled(True)
+        self.table.resizeColumnsToContents()
+
+        page = len(self._page_starts)
+        if entries:
+            self.page_label.setText(f"หน้า {page} ({len(entries):,} รายการ)")
+        else:
+            self.page_label.setText("ยังไม่มีประวัติการแก้ไข")
+        self.previous_button.setEnabled(page > 1)
+        self.next_button.setEnabled(next_before_id is not None)
+        return True
+
+    def show_next_page(self):
+        if self._next_before_id is None:
+            return
+        self._page_starts.append(self._next_before_id)
+        if not self.load_page(self._next_before_id):
+            self._page_starts.pop()
+
+    def show_previous_page(self):
+        if len(self._page_starts) < 2:
+            return
+        self._page_starts.pop()
+        self.load_page(self._page_starts[-1])
+
+    def exec_(self):
+        if not self.load_page(None):
+            return QDialog.Rejected
+        return super().exec_()
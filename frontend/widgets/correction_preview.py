@@ -0,0 +1,114 @@
+from PyQt5.QtWidgets import (
+    QAbstractItemView,
+    QDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QColor
+
+from backend.alldata_operations import LOGICAL_PK_FIELDS
+
+
+class CorrectionPreviewDialog(QDialog):
+    """
+    แสดงค่าเดิม/ค่าใหม่ของทุกช่องที่ไฟล์แก้ไขจะเปลี่ยน ให้ผู้ใช้เลือกรายการที่จะนำไปใช้
+    changes มาจาก backend.correction_import.build_diff
+    """
+
+    NEW_VALUE_COLOR = QColor("#e8f5e9")
+
+    def __init__(
+        self, changes, missing, column_mapper, file_rows, ignored_headers=(), parent=None
+    ):
+        super().__init__(parent)
+        self.changes = changes
+        self.setWindowTitle("ตรวจสอบก่อนนำเข้าไฟล์แก้ไข")
+        self.resize(1000, 600)
+
+        layout = QVBoxLayout(self)
+        changed_rows = len({change["pk"] for change in changes})
+        summary = (
+            f"ไฟล์มี {file_rows:,} แถว: จะแก้ไข {len(changes):,} ค่า"
+            f" ใน {changed_rows:,} แถว"
+        )
+        if missing:
+            summary += f"  (ไม่พบในฐานข้อมูล {len(missing):,} แถว: " + ", ".join(
+                str(row) for row, _ in missing[:10]
+            )
+            summary += " ...)" if len(missing) > 10 else ")"
+        if ignored_headers:
+            summary += "\nไม่นำเข้าคอลัมน์: " + ", ".join(ignored_headers)
+        summary_label = QLabel(summary)
+        summary_label.setWordWrap(True)
+        layout.addWidget(summary_label)
+
+        headers = ["นำไปใช้", "แถวในไฟล์"]
+        headers += [column_mapper.get_column_name(pk) for pk in LOGICAL_PK_FIELDS]
+        headers += ["คอลัมน์", "ค่าเดิม", "ค่าใหม่"]
+        self.table = QTableWidget(len(changes), len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        self.table.setUpdatesEnabled(False)
+        for row_idx, change in enumerate(changes):
+            check_item = QTableWidgetItem()
+            check_item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
+            check_item.setCheckState(Qt.Checked)
+            self.table.setItem(row_idx, 0, check_item)
+            values = [str(change["row"]), *change["pk"]]
+            values += [
+                column_mapper.get_column_name(change["field"]),
+                change["old"],
+                change["new"],
+            ]
+            for col_idx, value in enumerate(values, 1):
+                self.table.setItem(row_idx, col_idx, QTableWidgetItem(value))
+            self.table.item(row_idx, len(headers) - 1).setBackground(
+                QBrush(self.NEW_VALUE_COLOR)
+            )
+        self.table.setUpdatesEnabled(True)
+        self.table.resizeColumnsToContents()
+        layout.addWidget(self.table, 1)
+
+        buttons_layout = QHBoxLayout()
+        select_all_button = QPushButton("เลือกทั้งหมด")
+        select_all_button.clicked.connect(lambda: self.set_all_checked(True))
+        clear_all_button = QPushButton("ไม่เลือกทั้งหมด")
+        clear_all_button.clicked.connect(lambda: self.set_all_checked(False))
+        apply_button = QPushButton("นำไปใช้")
+        apply_button.setObjectName("primaryButton")
+        apply_button.clicked.connect(self.accept)
+        cancel_button = QPushButton("ยกเลิก")
+        cancel_button.setObjectName("secondaryButton")
+        cancel_button.clicked.connect(self.reject)
+        buttons_layout.addWidget(select_all_button)
+        buttons_layout.addWidget(clear_all_button)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(cancel_button)
+        buttons_layout.addWidget(apply_button)
+        layout.addLayout(buttons_layout)
+
+    def set_all_checked(self, checked):
+        state = Qt.Checked if checked else Qt.Unchecked
+        self.table.setUpdatesEnabled(False)
+        for row_idx in range(self.table.rowCount()):
+            self.table.item(row_idx, 0).setCheckState(state)
+        self.table.setUpdatesEnabled(True)
+
+    def accepted_changes(self):
+        """รายการที่ยังติ๊กไว้ (ลำดับเดียวกับ changes)"""
+        return [
+            change
+            for row_idx, change in enumerate(self.changes)
+            if self.table.item(row_idx, 0).checkState() == Qt.Checked
+        ]
@@ -0,0 +1,284 @@
+from PyQt5.QtWidgets import (
+    QAbstractItemView,
+    QApplication,
+    QComboBox,
+    QDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QMessageBox,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QColor
+
+from backend.alldata_operations import LOGICAL_PK_FIELDS, NON_EDITABLE_FIELDS
+from backend.original_diff import (
+    DEFAULT_PAGE_SIZE,
+    compared_fields,
+    diff_summary,
+    fetch_diff_page,
+    revert_to_original,
+)
+from frontend.utils.error_message import show_error_message, show_info_message
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+class OriginalDiffDialog(QDialog):
+    """
+    ช่องที่ค่าใน r_alldata_edit ต่างจากข้อมูลสำมะโนเดิม (r_alldata) ของพื้นที่ codes
+    เทียบฝั่งฐานข้อมูล (backend.original_diff) แล้วแสดงทีละหน้า หนึ่งแถวต่อหนึ่งช่องที่ต่างกัน
+    ติ๊กช่องที่ต้องการแล้วกด "คืนค่าเดิม" เพื่อคืนค่าทั้งหมดด้วย UPDATE คำสั่งเดียว
+    reverted_rows คือจำนวนแถวที่คืนค่าไปแล้ว (หน้าจอหลักใช้ตัดสินใจว่าต้องค้นหาใหม่หรือไม่)
+    """
+
+    ORIGINAL_COLOR = QColor("#fff3e0")
+    EDITED_COLOR = QColor("#e8f5e9")
+
+    def __init__(
+        self,
+        codes,
+        all_db_fields_r_alldata,
+        column_mapper,
+        editor_fullname,
+        parent=None,
+        page_size=DEFAULT_PAGE_SIZE,
+    ):
+        super().__init__(parent)
+        self.codes = codes
+        self.fields = compared_fields(all_db_fields_r_alldata)
+        self.column_mapper = column_mapper
+        self.editor_fullname = editor_fullname
+        self.page_size = page_size
+        self.reverted_rows = 0
+
+        self.counts = {}
+        # after_pk ของแต่ละหน้าที่เปิดแล้ว (หน้าแรกเป็น None) สำหรับปุ่มย้อนกลับ
+        self._page_starts = [None]
+        self._next_after_pk = None
+        # (pk, field) ของแต่ละแถวในตาราง
+        self.entries = []
+
+        self.setWindowTitle("เทียบกับข้อมูลเดิม")
+        self.resize(1100, 640)
+
+        layout = QVBoxLayout(self)
+        filter_layout = QHBoxLayout()
+        self.summary_label = QLabel()
+        self.field_combo = QComboBox()
+        self.field_combo.setMinimumWidth(260)
+        self.field_combo.activated.connect(lambda _: self.load_page(None, reset=True))
+        filter_layout.addWidget(self.summary_label, 1)
+        filter_layout.addWidget(QLabel("คอลัมน์:"))
+        filter_layout.addWidget(self.field_combo)
+        layout.addLayout(filter_layout)
+
+        headers = ["คืนค่าเดิม"]
+        headers += [column_mapper.get_column_name(pk) for pk in LOGICAL_PK_FIELDS]
+        headers += ["คอลัมน์", "ค่าเดิม", "ค่าที่แก้แล้ว", "แก้ไขล่าสุดโดย"]
+        self.table = QTableWidget(0, len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table, 1)
+
+        buttons_layout = QHBoxLayout()
+        self.page_label = QLabel()
+        check_all_button = QPushButton("เลือกทั้งหน้า")
+        check_all_button.clicked.connect(lambda: self.set_all_checked(True))
+        uncheck_all_button = QPushButton("ไม่เลือก")
+        uncheck_all_button.clicked.connect(lambda: self.set_all_checked(False))
+        self.previous_button = QPushButton("ก่อนหน้า")
+        self.previous_button.setObjectName("secondaryButton")
+        self.previous_button.clicked.connect(self.show_previous_page)
+        self.next_button = QPushButton("ถัดไป")
+        self.next_button.setObjectName("secondaryButton")
+        self.next_button.clicked.connect(self.show_next_page)
+        self.revert_button = QPushButton("คืนค่าเดิมช่องที่เลือก")
+        self.revert_button.setObjectName("primaryButton")
+        self.revert_button.clicked.connect(self.revert_checked)
+        close_button = QPushButton("ปิด")
+        close_button.setObjectName("secondaryButton")
+        close_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(self.page_label)
+        buttons_layout.addWidget(check_all_button)
+        buttons_layout.addWidget(uncheck_all_button)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(self.previous_button)
+        buttons_layout.addWidget(self.next_button)
+        buttons_layout.addWidget(self.revert_button)
+        buttons_layout.addWidget(close_button)
+        layout.addLayout(buttons_layout)
+
+    def selected_fields(self):
+        """คอลัมน์ที่แสดง: คอลัมน์ที่เลือกใน combo หรือทุกคอลัมน์ที่มีค่าต่างกัน"""
+        field = self.field_combo.currentData()
+        return [field] if field else list(self.counts)
+
+    def load_summary(self):
+        """นับแถว/คอลัมน์ที่ต่างกันของพื้นที่ แล้วสร้างตัวเลือกคอลัมน์ คืน False ถ้าผิดพลาด"""
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            total, self.counts = diff_summary(self.codes, self.fields)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            show_error_message(self, "ข้อผิดพลาด", f"ไม่สามารถเทียบกับข้อมูลเดิมได้: {e}")
+            return False
+        QApplication.restoreOverrideCursor()
+
+        selected = self.field_combo.currentData()
+        self.field_combo.clear()
+        self.field_combo.addItem(f"ทุกคอลัมน์ ({len(self.counts):,})", None)
+        for field, count in sorted(self.counts.items(), key=lambda item: -item[1]):
+            self.field_combo.addItem(
+                f"{self.column_mapper.get_column_name(field)} ({count:,} แถว)", field
+            )
+        index = self.field_combo.findData(selected) if selected else 0
+        self.field_combo.setCurrentIndex(max(index, 0))
+        self.summary_label.setText(f"มี {total:,} แถวที่ค่าต่างจากข้อมูลเดิม")
+        return True
+
+    def load_page(self, after_pk, reset=False):
+        """แสดงแถวที่ต่างกันต่อจาก after_pk คืน False ถ้าอ่านไม่ได้"""
+        if reset:
+            self._page_starts = [None]
+        fields = self.selected_fields()
+        entries = []
+        next_after_pk = None
+        if fields:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                entries, next_after_pk = fetch_diff_page(
+                    self.codes, fields, after_pk, self.page_size
+                )
+            except Exception as e:
+                QApplication.restoreOverrideCursor()
+                show_error_message(self, "ข้อผิดพลาด", f"ไม่สามารถเทียบกับข้อมูลเดิมได้: {e}")
+                return False
+            QApplication.restoreOverrideCursor()
+        self._next_after_pk = next_after_pk
+
+        self.entries = [
+            (entry, field) for entry in entries for field in entry["fields"]
+        ]
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(len(self.entries))
+        original_col = len(LOGICAL_PK_FIELDS) + 2
+        for row_idx, (entry, field) in enumerate(self.entries):
+            original, edited = entry["fields"][field]
+            check_item = QTableWidgetItem()
+            if field in NON_EDITABLE_FIELDS:
+                check_item.setFlags(Qt.ItemIsEnabled)
+            else:
+                check_item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
+                check_item.setCheckState(Qt.Unchecked)
+            self.table.setItem(row_idx, 0, check_item)
+            values = [_text(value) for value in entry["pk"]]
+            values += [
+                self.column_mapper.get_column_name(field),
+                _text(original),
+                _text(edited),
+                f"{_text(entry['fullname'])} {_text(entry['time_edit'])}".strip(),
+            ]
+            for col_idx, value in enumerate(values, 1):
+                self.table.setItem(row_idx, col_idx, QTableWidgetItem(value))
+            self.table.item(row_idx, original_col).setBackground(
+                QBrush(self.ORIGINAL_COLOR)
+            )
+            self.table.item(row_idx, original_col + 1).setBackground(
+                QBrush(self.EDITED_COLOR)
+            )
+        self.table.setUpdatesEnabled(True)
+        self.table.resizeColumnsToContents()
+
+        page = len(self._page_starts)
+        if entries:
+            self.page_label.setText(
+                f"หน้า {page} ({len(entries):,} แถว, {len(self.entries):,} ช่อง)"
+            )
+        else:
+            self.page_label.setText("ไม่มีค่าที่ต่างจากข้อมูลเดิม")
+        self.previous_button.setEnabled(page > 1)
+        self.next_button.setEnabled(next_after_pk is not None)
+        self.revert_button.setEnabled(bool(self.entries))
+        return True
+
+    def show_next_page(self):
+        if self._next_after_pk is None:
+            return
+        self._page_starts.append(self._next_after_pk)
+        if not self.load_page(self._next_after_pk):
+            self._page_starts.pop()
+
+    def show_previous_page(self):
+        if len(self._page_starts) < 2:
+            return
+        self._page_starts.pop()
+        self.load_page(self._page_starts[-1])
+
+    def set_all_checked(self, checked):
+        state = Qt.Checked if checked else Qt.Unchecked
+        self.table.setUpdatesEnabled(False)
+        for row_idx in range(self.table.rowCount()):
+            item = self.table.item(row_idx, 0)
+            if item.flags() & Qt.ItemIsUserCheckable:
+                item.setCheckState(state)
+        self.table.setUpdatesEnabled(True)
+
+    def checked_selection(self):
+        """(pk, field) ของช่องที่ติ๊กไว้ในหน้านี้"""
+        return [
+            (entry["pk"], field)
+            for row_idx, (entry, field) in enumerate(self.entries)
+            if self.table.item(row_idx, 0).checkState() == Qt.Checked
+        ]
+
+    def revert_checked(self):
+        selection = self.checked_selection()
+        if not selection:
+            show_info_message(self, "คืนค่าเดิม", "กรุณาติ๊กช่องที่ต้องการคืนค่าเดิม")
+            return
+        reply = QMessageBox.question(
+            self,
+            "ยืนยันการคืนค่าเดิม",
+            f"คืนค่าเดิมจำนวน {len(selection):,} ช่อง"
+            f" ใน {len({pk for pk, _ in selection}):,} แถวหรือไม่?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No,
+        )
+        if reply != QMessageBox.Yes:
+            return
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            updated, error_msg = revert_to_original(selection, self.editor_fullname)
+        finally:
+            QApplication.restoreOverrideCursor()
+        if error_msg:
+            show_error_message(self, "Revert Error", error_msg)
+            return
+        self.reverted_rows += updated
+        show_info_message(self, "สำเร็จ", f"คืนค่าเดิมจำนวน {updated:,} แถวเรียบร้อยแล้ว")
+        # แถวที่คืนค่าครบทุกช่องจะหายจากผลเทียบ จึงนับใหม่และกลับไปหน้าแรก
+        if self.load_summary():
+            self.load_page(None, reset=True)
+
+    def exec_(self):
+        if not self.load_summary() or not self.load_page(None):
+            return QDialog.Rejected
+        return super().exec_()
@@ -0,0 +1,140 @@
+from PyQt5.QtWidgets import QFrame, QVBoxLayout, QLabel
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFont
+
+from backend import perf
+
+# ตัวนับ cache ที่แสดงในแผง (prefix ของ <prefix>.hit / <prefix>.miss) และชื่อที่แสดง
+CACHE_COUNTERS = [
+    ("asset_cache", "ไฟล์ Excel"),
+    ("r_alldata_fields", "โครงสร้างตาราง"),
+    ("validation_data", "ข้อมูลตรวจสอบ"),
+]
+
+
+def _find_child(tree, name, parent=None):
+    """หา span ลูกชื่อ name (และ parent ถ้าระบุ) ใน tree จาก MemoryRecorder.get_tree"""
+    for child in tree["children"]:
+        if child["span"] == name and (parent is None or child.get("parent") == parent):
+            return child
+    return None
+
+
+def _ms(record):
+    return f"{record['ms']:,.1f} ms" if record else "-"
+
+
+class PerfOverlay(QFrame):
+    """
+    แผงแสดงประสิทธิภาพสำหรับผู้ใช้และทีม support (เปิด/ปิดด้วย Ctrl+Shift+P)
+    อ่านข้อมูลจาก backend.perf อย่างเดียว ไม่ได้วัดหรือคำนวณอะไรเพิ่ม
+    ลงทะเบียน MemoryRecorder เฉพาะตอนแผงเปิดอยู่ (ปิดแผงแล้ว span กลับเป็นแบบไม่มีต้นทุน)
+    """
+
+    REFRESH_INTERVAL_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("perfOverlay")
+        self.setStyleSheet(
+            "#perfOverlay { background-color: #263238; border-radius: 4px; }"
+            "QLabel { color: #eceff1; }"
+        )
+        self.recorder = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 6, 10, 6)
+        self.text_label = QLabel()
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.Monospace)
+        self.text_label.setFont(font)
+        layout.addWidget(self.text_label)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.setVisible(False)
+
+    def toggle(self):
+        if self.recorder is None:
+            self.recorder = perf.get_memory_recorder()
+            self.setVisible(True)
+        else:
+            self.setVisible(False)
+            perf.release_memory_recorder()
+            self.recorder = None
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        if self.recorder is None:
+            return
+        self.text_label.setText("\n".join(self.build_lines()))
+
+    def build_lines(self):
+        lines = []
+
+        tree = self.recorder.get_tree("ui.search")
+        if tree is None:
+            lines.append("ค้นหาล่าสุด: ยังไม่มีข้อมูล")
+        else:
+            root = tree["root"]
+            display = _find_child(tree, "display")
+            lines.append(
+                f"ค้นหาล่าสุด: {root.get('rows', 0):,} แถว | รวม {_ms(root)}"
+                + (
+                    f" | หน่วยความจำ {root['rss_delta_mb']:+,.1f} MB"
+                    if root.get("rss_delta_mb") is not None
+                    else ""
+                )
+            )
+            lines.append(
+                f"  เชื่อมต่อ {_ms(_find_child(tree, 'db.connect', 'search'))}"
+                f" | execute {_ms(_find_child(tree, 'search.execute'))}"
+                f" | fetch {_ms(_find_child(tree, 'search.fetch'))}"
+                f" | แสดงผล {_ms(display)}"
+                f" (หัวตาราง {_ms(_find_child(tree, 'table.headers', 'display'))})"
+            )
+
+        others = []
+        for name, label in (("filter", "กรอง"), ("validate", "ตรวจสอบ"), ("save", "บันทึก")):
+            record = self.recorder.get_last(name)
+            if record:
+                others.append(f"{label} {_ms(record)}")
+        if others:
+            lines.append("ล่าสุด: " + " | ".join(others))
+
+        counters = perf.get_counters()
+        cache_parts = []
+        for prefix, label in CACHE_COUNTERS:
+            rate = perf.hit_rate(prefix)
+            if rate is None:
+                continue
+            hits = counters.get(f"{prefix}.hit", 0)
+            total = hits + counters.get(f"{prefix}.miss", 0)
+            cache_parts.append(f"{label} {rate:.0%} ({hits}/{total})")
+        lines.append("Cache hit: " + (" | ".join(cache_parts) or "-"))
+
+        stall_count = counters.get("ui.stall", 0)
+        if stall_count:
+            lines.append(f"UI ค้าง: {stall_count} ครั้ง (รายละเอียดใน logs/stalls.jsonl)")
+
+        slow_query_count = counters.get("db.slow_query", 0)
+        if slow_query_count:
+            lines.append(
+                f"SQL ช้า: {slow_query_count} ครั้ง (รายละเอียดใน logs/slow_queries.jsonl)"
+            )
+
+        rss_mb = perf.current_rss_mb()
+        lines.append(
+            f"หน่วยความจำที่ใช้: {rss_mb:,.1f} MB" if rss_mb is not None else "หน่วยความจำที่ใช้: -"
+        )
+        return lines
@@ -0,0 +1,168 @@
+from PyQt5.QtWidgets import (
+    QAbstractItemView,
+    QDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QColor
+
+from backend.alldata_operations import (
+    EDIT_STAMP_FIELDS,
+    LOGICAL_PK_FIELDS,
+    ROW_VERSION_FIELD,
+)
+
+
+def _text(value):
+    """ข้อความสำหรับเทียบ/แสดงค่า (เหมือนตอนเทียบค่าที่แก้ในตาราง)"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+class SaveConflictDialog(QDialog):
+    """
+    แถวที่บันทึกไม่ได้เพราะมีผู้อื่นแก้ไขไปหลังจากค้นหา (conflicts จาก save_edited_r_alldata_rows)
+    แสดงค่าตอนค้นหา / ค่าปัจจุบันในฐานข้อมูล / ค่าที่เราแก้ ทีละช่อง ให้เลือกว่าจะใช้ค่าของเราช่องใด
+    originals: PK tuple -> แถวตอนค้นหา (จาก original_data_cache)
+    """
+
+    MINE_COLOR = QColor("#e8f5e9")
+    THEIRS_COLOR = QColor("#fff3e0")
+
+    def __init__(self, conflicts, originals, column_mapper, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("ข้อมูลถูกแก้ไขโดยผู้อื่น")
+        self.resize(1100, 600)
+
+        # (conflict, field) ของแต่ละแถวในตาราง field เป็น None สำหรับแถวที่ถูกลบไปแล้ว
+        self.entries = []
+        for conflict in conflicts:
+            current = conflict["current"]
+            if current is None:
+                self.entries.append((conflict, None))
+                continue
+            original = originals.get(conflict["pk"], {})
+            for field, value in conflict["record"].items():
+                if field in LOGICAL_PK_FIELDS or field in EDIT_STAMP_FIELDS:
+                    continue
+                if field == ROW_VERSION_FIELD or field not in current:
+                    continue
+                mine_changed = _text(value) != _text(original.get(field))
+                theirs_changed = _text(current[field]) != _text(original.get(field))
+                if mine_changed or theirs_changed:
+                    self.entries.append((conflict, field))
+
+        layout = QVBoxLayout(self)
+        deleted = sum(1 for conflict in conflicts if conflict["current"] is None)
+        summary = (
+            f"มี {len(conflicts):,} แถวที่ผู้อื่นแก้ไขหลังจากคุณค้นหา จึงยังไม่ได้บันทึก"
+            "\nติ๊กช่องที่ต้องการใช้ค่าของคุณ ช่องที่ไม่ได้ติ๊กจะคงค่าปัจจุบันในฐานข้อมูล"
+        )
+        if deleted:
+            summary += f"\n{deleted:,} แถวถูกลบไปแล้วและจะไม่ถูกบันทึก"
+        summary_label = QLabel(summary)
+        summary_label.setWordWrap(True)
+        layout.addWidget(summary_label)
+
+        headers = ["ใช้ค่าของฉัน"]
+        headers += [column_mapper.get_column_name(pk) for pk in LOGICAL_PK_FIELDS]
+        headers += ["คอลัมน์", "ค่าตอนค้นหา", "ค่าปัจจุบัน", "แก้ไขโดย", "ค่าของฉัน"]
+        self.table = QTableWidget(len(self.entries), len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        mine_col = len(headers) - 1
+        theirs_col = mine_col - 2
+        self.table.setUpdatesEnabled(False)
+        for row_idx, (conflict, field) in enumerate(self.entries):
+            current = conflict["current"]
+            check_item = QTableWidgetItem()
+            values = [*conflict["pk"]]
+            if field is None:
+                check_item.setFlags(Qt.ItemIsEnabled)
+                values += ["(แถวถูกลบแล้ว)", "", "", "", ""]
+            else:
+                original = originals.get(conflict["pk"], {})
+                mine = conflict["record"].get(field)
+                mine_changed = _text(mine) != _text(original.get(field))
+                if mine_changed:
+                    check_item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
+                    check_item.setCheckState(Qt.Checked)
+                else:
+                    # ช่องที่เราไม่ได้แก้ ใช้ค่าปัจจุบันเสมอ
+                    check_item.setFlags(Qt.ItemIsEnabled)
+                values += [
+                    column_mapper.get_column_name(field),
+                    _text(original.get(field)),
+                    _text(current[field]),
+                    f"{_text(current.get('fullname'))} {_text(current.get('time_edit'))}",
+                    _text(mine),
+                ]
+            self.table.setItem(row_idx, 0, check_item)
+            for col_idx, value in enumerate(values, 1):
+                self.table.setItem(row_idx, col_idx, QTableWidgetItem(value))
+            if field is not None:
+                self.table.item(row_idx, theirs_col).setBackground(
+                    QBrush(self.THEIRS_COLOR)
+                )
+                self.table.item(row_idx, mine_col).setBackground(
+                    QBrush(self.MINE_COLOR)
+                )
+        self.table.setUpdatesEnabled(True)
+        self.table.resizeColumnsToContents()
+        layout.addWidget(self.table, 1)
+
+        buttons_layout = QHBoxLayout()
+        all_mine_button = QPushButton("ใช้ค่าของฉันทั้งหมด")
+        all_mine_button.clicked.connect(lambda: self.set_all_checked(True))
+        all_theirs_button = QPushButton("ใช้ค่าปัจจุบันทั้งหมด")
+        all_theirs_button.clicked.connect(lambda: self.set_all_checked(False))
+        save_button = QPushButton("บันทึกค่าที่รวมแล้ว")
+        save_button.setObjectName("primaryButton")
+        save_button.clicked.connect(self.accept)
+        cancel_button = QPushButton("ไม่บันทึกแถวเหล่านี้")
+        cancel_button.setObjectName("secondaryButton")
+        cancel_button.clicked.connect(self.reject)
+        buttons_layout.addWidget(all_mine_button)
+        buttons_layout.addWidget(all_theirs_button)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(cancel_button)
+        buttons_layout.addWidget(save_button)
+        layout.addLayout(buttons_layout)
+
+    def set_all_checked(self, checked):
+        state = Qt.Checked if checked else Qt.Unchecked
+        self.table.setUpdatesEnabled(False)
+        for row_idx in range(self.table.rowCount()):
+            item = self.table.item(row_idx, 0)
+            if item.flags() & Qt.ItemIsUserCheckable:
+                item.setCheckState(state)
+        self.table.setUpdatesEnabled(True)
+
+    def merged_records(self):
+        """
+        record ใหม่ของแต่ละแถวที่ยังมีอยู่: ค่าปัจจุบัน (รวม row_version ล่าสุด)
+        ทับด้วยค่าของเราในช่องที่ติ๊ก แถวที่ไม่มีช่องใดติ๊กจะไม่อยู่ในผลลัพธ์
+        """
+        merged = {}
+        for row_idx, (conflict, field) in enumerate(self.entries):
+            if field is None:
+                continue
+            if self.table.item(row_idx, 0).checkState() != Qt.Checked:
+                continue
+            record = merged.setdefault(conflict["pk"], dict(conflict["current"]))
+            record[field] = conflict["record"].get(field)
+        return list(merged.values())
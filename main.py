@@ -1,8 +1,19 @@
 import sys
+from frontend.utils import startup_timeline  # noqa: F401 เริ่มจับเวลาให้เร็วที่สุด
 from PyQt5.QtWidgets import QApplication
 from frontend.app import MainApp
 
 if __name__ == "__main__":
+    if "--import-report" in sys.argv:
+        from frontend.utils.import_report import run_import_report
+
+        sys.exit(run_import_report())
+
+    if "--profile" in sys.argv:
+        from backend import profiling
+
+        profiling.enable()
+
     app = QApplication(sys.argv)
     window = MainApp()
     window.show()